@@ -0,0 +1,236 @@
+import argparse
+import json
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.app_configs import STORAGE_PROFILE
+from studybuddy.database.pooled_storage import PooledStorage
+from studybuddy.database.profiles import PROFILES
+from studybuddy.database.sql_storage import Storage
+from studybuddy.domain.errors import SessionConflictError, SessionNotPendingError
+from benchmarks.bench_services import SCALES, build_database
+
+# Load test: many simulated users hitting one database file at the same time with a
+# mix of service calls, to see where the storage setup stops scaling (unlike
+# bench_services, which times one call after another).
+#   python -m benchmarks.bench_load --scale small --workers 8 --seconds 10
+#   python -m benchmarks.bench_load --db seeded.db --workers 16 --processes --storage pooled
+#   python -m benchmarks.bench_load --mix suggest_matches=60,request_session=40 --out load.json
+# Every worker (thread, or process with --processes) loops over the operation mix
+# until --seconds are up. --storage storage gives each worker its own Storage (its
+# own connection, the way separate app processes share the file); --storage pooled
+# shares one PooledStorage between the threads of a process (WAL, reader per thread,
+# one writer).
+# The database is a copy: --db is copied first (unless --in-place), without --db a
+# synthetic one of --scale is built. Per operation the report has throughput,
+# p50/p95/p99 latency, "database is locked" errors, rejected requests (double
+# bookings, or replies to a request another worker answered first, which are
+# expected) and any other errors.
+
+DEFAULT_MIX = "suggest_matches=45,find_classmates=35,add_availability=8,request_session=7,respond_session=5"
+
+# -------- operations: each gets the service, the worker's rng and the shared pools
+def op_suggest_matches(svc, rng, pools):
+    svc.suggest_matches(*rng.choice(pools["pairs"]))
+
+def op_find_classmates(svc, rng, pools):
+    svc.find_classmates(*rng.choice(pools["pairs"]))
+
+def op_add_availability(svc, rng, pools):
+    uid, _ = rng.choice(pools["pairs"])
+    start = rng.randrange(480, 1260, 15)
+    svc.add_availability(uid, rng.randrange(7), start, start + rng.choice((30, 60, 90)))
+
+def op_request_session(svc, rng, pools):
+    uid, code = rng.choice(pools["pairs"])
+    partner = rng.choice(pools["members"][code])
+    if partner == uid:
+        return
+    start = rng.randrange(0, 1380, 5)
+    svc.request_session(uid, partner, code, rng.randrange(7), start, start + 60)
+
+# open the inbox of a user who has pending requests and answer the oldest one
+def op_respond_session(svc, rng, pools):
+    uid = rng.choice(pools["invitees"])
+    page = svc.page_pending_requests_for_user(uid, limit=1)
+    if page.items:
+        svc.respond_session(page.items[0].session_id, uid, rng.random() < 0.8)
+
+OPERATIONS = {
+    "suggest_matches": op_suggest_matches,
+    "find_classmates": op_find_classmates,
+    "add_availability": op_add_availability,
+    "request_session": op_request_session,
+    "respond_session": op_respond_session,
+}
+
+def parse_mix(text: str):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+# what the operations pick from, read once before the workers start
+def load_pools(path: Path, invitees: int = 500):
+    db = Storage(path)
+    pairs = [(r["user_id"], r["course_code"]) for r in db.query_all("select user_id, course_code from enrollments")]
+    members = {}
+    for uid, code in pairs:
+        members.setdefault(code, []).append(uid)
+    # users with the most pending requests; anyone else's inbox would mostly be empty
+    inbox = [r["id"] for r in db.query_all(
+        "select id from users where pending_count > 0 order by pending_count desc limit :n", {"n": invitees})]
+    db.close()
+    if not pairs:
+        raise SystemExit(f"{path} has no enrollments to load test with")
+    return {"pairs": pairs, "members": members, "invitees": inbox or [uid for uid, _ in pairs[:invitees]]}
+
+# one worker: loops over the mix until the deadline. Returns
+# {operation: {"latencies_ms": [...], "locked": n, "rejected": n, "errors": n}}
+def run_worker(spec: dict, worker: int, shared=None):
+    rng = random.Random(spec["seed"] * 1000 + worker)
+    if shared is not None:
+        db = shared
+    else:
+        db = Storage(spec["path"], profile=spec["profile"])
+    svc = StudyBuddyService(db)
+    names = list(spec["mix"])
+    weights = [spec["mix"][n] for n in names]
+    results = {n: {"latencies_ms": [], "locked": 0, "rejected": 0, "errors": 0} for n in names}
+    pools = spec["pools"]
+    deadline = spec["start_at"] + spec["seconds"]
+    while time.time() < spec["start_at"]:
+        time.sleep(0.001)
+    while time.time() < deadline:
+        name = rng.choices(names, weights)[0]
+        result = results[name]
+        start = time.perf_counter()
+        try:
+            OPERATIONS[name](svc, rng, pools)
+        except (SessionConflictError, SessionNotPendingError):
+            result["rejected"] += 1
+        except sqlite3.OperationalError as ex:
+            if "locked" in str(ex) or "busy" in str(ex):
+                result["locked"] += 1
+            else:
+                result["errors"] += 1
+            continue
+        except Exception:
+            result["errors"] += 1
+            continue
+        result["latencies_ms"].append((time.perf_counter() - start) * 1000)
+    if shared is None:
+        db.close()
+    return results
+
+# runs every worker of one process; with --storage pooled they share one PooledStorage
+def run_process(spec: dict, workers: list):
+    shared = PooledStorage(spec["path"], profile=spec["profile"]) if spec["storage"] == "pooled" else None
+    try:
+        with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+            return list(pool.map(lambda w: run_worker(spec, w, shared), workers))
+    finally:
+        if shared is not None:
+            shared.close()
+
+def percentile(ordered, p: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+def summarize(worker_results, seconds: float):
+    report = {}
+    for name in worker_results[0]:
+        latencies = sorted(t for r in worker_results for t in r[name]["latencies_ms"])
+        report[name] = {
+            "ok": len(latencies),
+            "ops_per_s": round(len(latencies) / seconds, 1),
+            "p50_ms": round(percentile(latencies, 0.50), 3),
+            "p95_ms": round(percentile(latencies, 0.95), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "locked": sum(r[name]["locked"] for r in worker_results),
+            "rejected": sum(r[name]["rejected"] for r in worker_results),
+            "errors": sum(r[name]["errors"] for r in worker_results),
+        }
+    return report
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test of StudyBuddyService.")
+    parser.add_argument("--db", type=Path, help="seeded database to test against (copied unless --in-place)")
+    parser.add_argument("--in-place", action="store_true", help="write to --db itself instead of a copy")
+    parser.add_argument("--scale", default="small", choices=sorted(SCALES), help="synthetic data when no --db")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--processes", action="store_true", help="one process per worker instead of threads")
+    parser.add_argument("--storage", default="storage", choices=["storage", "pooled"])
+    parser.add_argument("--profile", default=STORAGE_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"operation=weight list (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db is None:
+            path = Path(tmp) / f"{args.scale}.db"
+            config = replace(SCALES[args.scale], seed=args.seed)
+            svc, _, build_s = build_database(path, config, args.profile)
+            svc.db.close()
+            print(f"built {args.scale} database in {build_s:.1f}s")
+        elif args.in_place:
+            path = args.db
+        else:
+            path = Path(tmp) / args.db.name
+            shutil.copyfile(args.db, path)
+        if args.storage == "pooled" or args.profile == "balanced":
+            # switch the file to WAL once, before the workers race to do it
+            PooledStorage(path, profile=args.profile).close()
+
+        spec = {"path": str(path), "profile": args.profile, "storage": args.storage, "mix": args.mix,
+                "seconds": args.seconds, "seed": args.seed, "pools": load_pools(path),
+                "start_at": time.time() + 0.5}
+        workers = list(range(args.workers))
+        if args.processes:
+            spec["start_at"] = time.time() + 2.0   # process start up isn't part of the run
+            with ProcessPoolExecutor(max_workers=args.workers) as pool:
+                worker_results = [r for rs in pool.map(run_process, [spec] * args.workers, [[w] for w in workers])
+                                  for r in rs]
+        else:
+            worker_results = run_process(spec, workers)
+
+    report = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "workers": args.workers,
+        "mode": "processes" if args.processes else "threads",
+        "storage": args.storage,
+        "profile": args.profile,
+        "seconds": args.seconds,
+        "operations": summarize(worker_results, args.seconds),
+    }
+    total = sum(op["ok"] for op in report["operations"].values())
+    print(f"{args.workers} {report['mode']}, storage={args.storage}, profile={args.profile}: "
+          f"{total / args.seconds:.0f} ops/s")
+    print(f"  {'operation':<18} {'ops/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'locked':>7} {'rejected':>8} {'errors':>7}")
+    for name, op in report["operations"].items():
+        print(f"  {name:<18} {op['ops_per_s']:>8.1f} {op['p50_ms']:>8.3f} {op['p95_ms']:>8.3f} "
+              f"{op['p99_ms']:>8.3f} {op['locked']:>7} {op['rejected']:>8} {op['errors']:>7}")
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"results written to {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.application.synthetic_data import SyntheticConfig, generate
+from studybuddy.app_configs import STORAGE_PROFILE
+from studybuddy.database.memory_storage import MemoryStorage
+from studybuddy.database.profiles import PROFILES
+from studybuddy.database.sql_storage import Storage
+
+# Benchmarks the service layer against real SQLite databases built by the synthetic
+# data generator, at several scales. Results are written as JSON so runs on two
+# branches can be compared:
+#   python -m benchmarks.bench_services --out main.json
+#   python -m benchmarks.bench_services --out branch.json --compare main.json
+# --compare exits with status 1 if any operation's median got slower than --tolerance.
+# --profile picks the storage profile (database/profiles.py) for the build and the calls.
+# --mode memory reopens the built file as MemoryStorage for the calls and also times
+# the final snapshot back to disk.
+# --overlap-table enables the materialized course_overlaps table after the build (timed
+# on its own as overlaps_s) and answers suggest_matches from it.
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "studybuddy" / "schema.sql"
+
+SCALES = {
+    "small": SyntheticConfig(users=500, courses=20),
+    "medium": SyntheticConfig(users=5000, courses=100),
+    "large": SyntheticConfig(users=20000, courses=300, enrollments_per_user=5),
+}
+
+def build_database(path: Path, config: SyntheticConfig, profile: str):
+    db = Storage(path, profile=profile)
+    db.execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+    svc = StudyBuddyService(db)
+    start = time.perf_counter()
+    summary = generate(svc, config)
+    return svc, summary, time.perf_counter() - start
+
+def time_calls(fn, args_list):
+    times = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        "calls": len(times),
+        "median_ms": round(statistics.median(times), 4),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        "mean_ms": round(statistics.fmean(times), 4),
+    }
+
+def enrolled_pairs(svc: StudyBuddyService, rng: random.Random, count: int):
+    rows = svc.db.query_all("select user_id, course_code from enrollments")
+    return [(r["user_id"], r["course_code"]) for r in rng.sample(rows, min(count, len(rows)))]
+
+# runs every benchmarked operation on one database; returns {operation: timings}
+def run_scale(svc: StudyBuddyService, summary, calls: int, seed: int):
+    rng = random.Random(seed)
+    pairs = enrolled_pairs(svc, rng, calls)
+    results = {
+        "find_classmates": time_calls(svc.find_classmates, pairs),
+        "suggest_matches": time_calls(svc.suggest_matches, pairs),
+        "list_confirmed_sessions_for_user": time_calls(
+            svc.list_confirmed_sessions_for_user, [(uid,) for uid, _ in pairs]),
+    }
+    # a classmate for each pair, so sessions are realistic. Every request gets its own
+    # 5 minute slot before 08:00 (the synthetic sessions are all later in the day),
+    # so neither the requests nor accepting them run into a double booking
+    session_args = []
+    for uid, code in pairs:
+        classmates = svc.find_classmates(uid, code)
+        if classmates:
+            slot = len(session_args) % (7 * 96)
+            start = slot // 7 * 5
+            session_args.append((uid, rng.choice(classmates).id, code, slot % 7, start, start + 5))
+    results["request_session"] = time_calls(svc.request_session, session_args)
+    pending = svc.db.query_all("""
+        select session_id, user_id from session_participants
+        where response = 'pending' order by session_id desc limit :n
+    """, {"n": calls})
+    results["respond_session"] = time_calls(
+        svc.respond_session, [(r["session_id"], r["user_id"], True) for r in pending])
+    victims = rng.sample(summary.user_ids, min(calls, len(summary.user_ids)))
+    results["delete_user"] = time_calls(svc.delete_user, [(uid,) for uid in victims])
+    return results
+
+def compare(current: dict, baseline: dict, tolerance: float) -> bool:
+    ok = True
+    for scale, ops in current["scales"].items():
+        for op, timing in ops["operations"].items():
+            old = baseline.get("scales", {}).get(scale, {}).get("operations", {}).get(op)
+            if not old:
+                continue
+            ratio = timing["median_ms"] / old["median_ms"] if old["median_ms"] else 1.0
+            flag = ""
+            if ratio > 1 + tolerance:
+                flag, ok = "  <-- slower", False
+            print(f"{scale:>7} {op:<34} {old['median_ms']:>9.3f} -> {timing['median_ms']:>9.3f} ms ({ratio:.2f}x){flag}")
+    return ok
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark StudyBuddyService on synthetic data.")
+    parser.add_argument("--scales", default="small,medium", help=f"comma list of {', '.join(SCALES)}")
+    parser.add_argument("--calls", type=int, default=200, help="calls per operation")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--profile", default=STORAGE_PROFILE, choices=sorted(PROFILES))
+    parser.add_argument("--mode", default="disk", choices=["disk", "memory"])
+    parser.add_argument("--overlap-table", action="store_true", help="use the course_overlaps table")
+    parser.add_argument("--out", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "seed": args.seed,
+        "profile": args.profile,
+        "mode": args.mode,
+        "overlap_table": args.overlap_table,
+        "scales": {},
+    }
+    for name in args.scales.split(","):
+        config = replace(SCALES[name], seed=args.seed)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / f"{name}.db"
+            svc, summary, build_s = build_database(path, config, args.profile)
+            overlaps_s = None
+            if args.overlap_table:
+                start = time.perf_counter()
+                svc = StudyBuddyService(svc.db, use_overlap_table=True)
+                overlaps_s = time.perf_counter() - start
+            if args.mode == "memory":
+                svc.db.close()
+                svc = StudyBuddyService(MemoryStorage(path, profile=args.profile), use_overlap_table=args.overlap_table)
+            operations = run_scale(svc, summary, args.calls, args.seed)
+            if args.mode == "memory":
+                operations["snapshot_on_close"] = time_calls(svc.db.close, [()])
+            else:
+                svc.db.close()
+        report["scales"][name] = {
+            "users": config.users, "courses": config.courses,
+            "enrollments": summary.enrollments, "blocks": summary.blocks, "sessions": summary.sessions,
+            "build_s": round(build_s, 3),
+            "overlaps_s": round(overlaps_s, 3) if overlaps_s is not None else None,
+            "operations": operations,
+        }
+        print(f"{name}: built in {build_s:.2f}s"
+              + (f", course_overlaps filled in {overlaps_s:.2f}s" if overlaps_s is not None else ""))
+        for op, timing in operations.items():
+            print(f"  {op:<34} median {timing['median_ms']:.3f} ms  p95 {timing['p95_ms']:.3f} ms")
+
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"results written to {args.out}")
+    if args.compare:
+        return 0 if compare(report, json.loads(args.compare.read_text(encoding="utf-8")), args.tolerance) else 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Time to first prompt of the interactive CLI: starts `python -m studybuddy.run_app`
+# as a fresh process, waits for the "choice: " prompt on stdout and answers 0 (exit).
+# Measured from outside, so interpreter startup and imports are included.
+#   new      empty database file every run (schema script + migrations run)
+#   current  database already at the current schema version (the usual case)
+# Same JSON / --compare workflow as bench_services:
+#   python -m benchmarks.bench_startup --out main.json
+#   python -m benchmarks.bench_startup --out branch.json --compare main.json
+
+PROMPT = b"choice: "
+
+def time_to_prompt(db_path: Path) -> float:
+    env = dict(os.environ, STUDYBUDDY_DB=str(db_path))
+    env.pop("STUDYBUDDY_STARTUP_TIMING", None)
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "studybuddy.run_app"], env=env,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    seen = b""
+    while PROMPT not in seen:
+        chunk = proc.stdout.read1(4096)
+        if not chunk:
+            raise RuntimeError(f"run_app exited before the prompt: {seen[-200:]!r}")
+        seen += chunk
+    elapsed = time.perf_counter() - start
+    proc.communicate(b"0\n")
+    return elapsed * 1000
+
+def summarize(times):
+    times = sorted(times)
+    return {
+        "runs": len(times),
+        "min_ms": round(times[0], 2),
+        "median_ms": round(statistics.median(times), 2),
+        "p95_ms": round(times[min(len(times) - 1, int(len(times) * 0.95))], 2),
+    }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark time to first prompt of the CLI.")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--out", type=Path, default=Path("bench_startup.json"))
+    parser.add_argument("--compare", type=Path, help="baseline results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        new_times = []
+        for i in range(args.runs):
+            new_times.append(time_to_prompt(Path(tmp) / f"new{i}.db"))
+        current = Path(tmp) / "current.db"
+        time_to_prompt(current)   # creates it
+        results["new"] = summarize(new_times)
+        results["current"] = summarize([time_to_prompt(current) for _ in range(args.runs)])
+
+    report = {"python": platform.python_version(), "scenarios": results}
+    for name, timing in results.items():
+        print(f"{name:<8} median {timing['median_ms']:.1f} ms  min {timing['min_ms']:.1f} ms  p95 {timing['p95_ms']:.1f} ms")
+    args.out.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"results written to {args.out}")
+    if not args.compare:
+        return 0
+    baseline = json.loads(args.compare.read_text(encoding="utf-8")).get("scenarios", {})
+    ok = True
+    for name, timing in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        ratio = timing["median_ms"] / old["median_ms"] if old["median_ms"] else 1.0
+        flag = ""
+        if ratio > 1 + args.tolerance:
+            flag, ok = "  <-- slower", False
+        print(f"{name:<8} {old['median_ms']:>8.1f} -> {timing['median_ms']:>8.1f} ms ({ratio:.2f}x){flag}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
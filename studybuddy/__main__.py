@@ -0,0 +1,6 @@
+import sys
+from studybuddy.run_app import main
+
+# python -m studybuddy             -> interactive menu
+# python -m studybuddy <command>   -> command mode (see application/cli/commands.py)
+sys.exit(main())
@@ -1,11 +1,40 @@
+import os
 from pathlib import Path
 
-# creates a quick reference to the database file
-DB_PATH = Path(__file__).resolve().parent / "studybuddy.db"
+# creates a quick reference to the database file (STUDYBUDDY_DB points it elsewhere,
+# e.g. for scripts and benchmarks)
+DB_PATH = Path(os.environ.get("STUDYBUDDY_DB") or Path(__file__).resolve().parent / "studybuddy.db")
 
 WEEKDAY_TO_INT = {"mon":0,"tue":1,"wed":2,"thu":3,"fri":4,"sat":5,"sun":6}
 INT_TO_WEEKDAY = {v:k.capitalize() for k,v in WEEKDAY_TO_INT.items()}
 
 MIN_MATCH_MINUTES = 30 #only counts overlap betwewen sessions as valid if its 
 #at least 30 Min. So, a user can't book a session if their and the other person's
-#schedule don't have at least 30 min of overlap
\ No newline at end of file
+#schedule don't have at least 30 min of overlap
+
+# query instrumentation (see database/instrumentation.py). Off unless
+# STUDYBUDDY_STATS=1; statements slower than STUDYBUDDY_SLOW_QUERY_MS go to the slow log
+STATS_ENABLED = os.environ.get("STUDYBUDDY_STATS") == "1"
+SLOW_QUERY_MS = float(os.environ.get("STUDYBUDDY_SLOW_QUERY_MS", "100"))
+
+# store availability merged per weekday (see StudyBuddyService.add_availability)
+NORMALIZE_AVAILABILITY = os.environ.get("STUDYBUDDY_NORMALIZE_AVAILABILITY") == "1"
+
+# answer suggest_matches from the materialized course_overlaps table (see
+# StudyBuddyService's use_overlap_table); makes availability and enrollment writes slower
+USE_OVERLAP_TABLE = os.environ.get("STUDYBUDDY_OVERLAP_TABLE") == "1"
+
+PAGE_SIZE = 20 # rows per page for the paginated listings in the menu
+READ_CACHE_SIZE = 1024 # entries kept by the service's read cache (see read_cache.py)
+
+# print how long each startup step took (to stderr) before the menu appears
+STARTUP_TIMING = os.environ.get("STUDYBUDDY_STARTUP_TIMING") == "1"
+
+# SQLite settings used by Storage: "durable" (default), "balanced" or "bulk-load"
+# (see database/profiles.py)
+STORAGE_PROFILE = os.environ.get("STUDYBUDDY_PROFILE", "durable")
+
+# "memory" serves the menu from an in-memory copy of DB_PATH that is written back every
+# STUDYBUDDY_SNAPSHOT_SECONDS and on exit (see database/memory_storage.py)
+STORAGE_MODE = os.environ.get("STUDYBUDDY_STORAGE_MODE", "disk")
+SNAPSHOT_SECONDS = float(os.environ.get("STUDYBUDDY_SNAPSHOT_SECONDS", "30"))
@@ -0,0 +1,66 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.pooled_storage import PooledStorage
+
+# asyncio facade for StudyBuddyService.
+# Every public StudyBuddyService method is available here as a coroutine with the same
+# arguments, e.g. await svc.suggest_matches(uid, "CPSC-3720"). The blocking sqlite work
+# runs on a bounded thread pool over a PooledStorage, so each worker thread reads
+# through its own connection and the event loop never waits on disk. Many lookups can
+# be awaited together with asyncio.gather; extra calls queue for a free worker.
+#
+# Every call accepts an optional timeout= (seconds, defaults to the one given to the
+# constructor). On timeout or cancellation a call that hasn't started yet is dropped
+# from the queue; one that is already running in sqlite finishes in its worker and
+# the result is thrown away (writes still commit or roll back as a whole).
+#
+# The iter_* methods return a list here: their generators read from sqlite as they are
+# consumed, so they are drained in the worker (on that thread's connection) instead of
+# being handed back to iterate on the event loop.
+
+class AsyncStudyBuddyService:
+    """Coroutine versions of the StudyBuddyService methods."""
+    def __init__(self, db_path: Path, max_workers: int = 8, timeout: float | None = None):
+        self.db = PooledStorage(db_path)
+        self.service = StudyBuddyService(self.db)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="studybuddy-db")
+
+    async def _run(self, fn, *args, timeout: float | None = None, **kwargs):
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+        return await asyncio.wait_for(future, timeout if timeout is not None else self.timeout)
+
+    async def close(self) -> None:
+        # wait for running work in a thread so the loop keeps going meanwhile
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(self._executor.shutdown, wait=True, cancel_futures=True)
+        )
+        self.db.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+def _drain(fn, *args, **kwargs):
+    return list(fn(*args, **kwargs))
+
+def _mirror(name: str):
+    async def method(self, *args, timeout: float | None = None, **kwargs):
+        fn = getattr(self.service, name)
+        if name.startswith("iter_"):
+            return await self._run(_drain, fn, *args, timeout=timeout, **kwargs)
+        return await self._run(fn, *args, timeout=timeout, **kwargs)
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = getattr(StudyBuddyService, name).__doc__
+    return method
+
+# one coroutine per public service method, so new service methods show up here too
+for _name in dir(StudyBuddyService):
+    if not _name.startswith("_") and callable(getattr(StudyBuddyService, _name)):
+        setattr(AsyncStudyBuddyService, _name, _mirror(_name))
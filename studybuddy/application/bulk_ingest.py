@@ -0,0 +1,145 @@
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Tuple
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.domain.time_parsers import parse_range
+
+# Bulk ingest of users, enrollments and availability at the start of a term.
+# Files are streamed through a small generator pipeline:
+#   read_records (csv / jsonl lines) -> parse_* (validate one record) -> *_many service
+#   method (chunked executemany, one transaction per batch)
+# Nothing holds more than one batch in memory, so the size of the file doesn't matter.
+# Records that can't be parsed, or that the database refuses (unknown user id,
+# duplicate id, ...), are written to a reject report instead of stopping the load.
+#
+# File formats (csv header names or jsonl keys):
+#   users:        name[, id]
+#   enrollments:  user_id, course_code[, title]
+#   availability: user_id, range      e.g. "Mon 13:00-15:00" (same format as the menu)
+#
+# usage: python -m studybuddy.application.bulk_ingest availability avail.csv --rejects bad.csv
+# The load runs with the "bulk-load" storage profile (no fsync, big cache; see
+# database/profiles.py) unless --profile says otherwise.
+
+# yields (line_number, record) from a .csv (with header row) or .jsonl file
+def read_records(path: Path) -> Iterator[Tuple[int, dict]]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if Path(path).suffix.lower() == ".csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+        else:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError:
+                        yield line_no, {"_raw": line.rstrip("\n")}
+
+# -------- record parsers: return the row dict for the service or raise ValueError
+def parse_user(record: dict) -> dict:
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+    raw_id = record.get("id")
+    return {"id": int(raw_id) if raw_id not in (None, "") else None, "name": name}
+
+def parse_enrollment(record: dict) -> dict:
+    course = str(record.get("course_code") or "").strip().upper()
+    if not course:
+        raise ValueError("course_code is required")
+    title = str(record.get("title") or "").strip() or None
+    return {"user_id": int(record["user_id"]), "course_code": course, "title": title}
+
+def parse_availability(record: dict) -> dict:
+    try:
+        dow, start_min, end_min = parse_range(str(record["range"]).strip())
+    except Exception:
+        raise ValueError(f"invalid range {record.get('range')!r}, expected like 'Mon 13:00-15:30'")
+    if not (0 <= start_min < end_min <= 1440):
+        raise ValueError("invalid day/time range")
+    return {"user_id": int(record["user_id"]), "day_of_week": dow,
+            "start_min": start_min, "end_min": end_min}
+
+# kind -> (record parser, name of the StudyBuddyService bulk method)
+KINDS: Dict[str, Tuple[Callable[[dict], dict], str]] = {
+    "users": (parse_user, "create_users_many"),
+    "enrollments": (parse_enrollment, "enroll_course_many"),
+    "availability": (parse_availability, "add_availability_many"),
+}
+
+class RejectReport:
+    """Counts rejected records and, if a path is given, streams them to a csv file."""
+    def __init__(self, path: Path | None = None):
+        self.count = 0
+        self._file = open(path, "w", encoding="utf-8", newline="") if path else None
+        self._writer = csv.writer(self._file) if self._file else None
+        if self._writer:
+            self._writer.writerow(["line", "reason", "record"])
+
+    def add(self, line_no: int, reason: str, record: dict) -> None:
+        self.count += 1
+        if self._writer:
+            self._writer.writerow([line_no, reason, json.dumps(record, default=str)])
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+
+# parses records lazily; bad ones go to the report, good ones carry their line number
+# along (extra dict keys are ignored by sqlite's named parameters)
+def _parsed(records: Iterator[Tuple[int, dict]], parser: Callable[[dict], dict],
+            rejects: RejectReport) -> Iterator[dict]:
+    for line_no, record in records:
+        try:
+            row = parser(record)
+        except (KeyError, TypeError, ValueError) as ex:
+            reason = f"missing field {ex}" if isinstance(ex, KeyError) else str(ex)
+            rejects.add(line_no, reason, record)
+            continue
+        row["line"] = line_no
+        yield row
+
+# Loads one file of the given kind. Returns (rows written, rows rejected)
+def ingest_file(svc: StudyBuddyService, kind: str, path: Path, batch_size: int = 1000,
+                rejects: RejectReport | None = None) -> Tuple[int, int]:
+    parser, method = KINDS[kind]
+    report = rejects or RejectReport()
+    def on_reject(row: dict, error: Exception) -> None:
+        line_no = row.pop("line", None)
+        report.add(line_no, str(error), row)
+    written = getattr(svc, method)(
+        _parsed(read_records(path), parser, report), batch_size=batch_size, on_reject=on_reject
+    )
+    return written, report.count
+
+def main(argv=None) -> int:
+    # imports kept local so importing this module doesn't open the app database
+    from studybuddy.app_configs import DB_PATH, NORMALIZE_AVAILABILITY
+    from studybuddy.database.sql_storage import Storage
+
+    parser = argparse.ArgumentParser(description="Bulk load users, enrollments or availability.")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("path", type=Path, help=".csv (with header) or .jsonl file")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--rejects", type=Path, help="write rejected records to this csv file")
+    parser.add_argument("--profile", default="bulk-load", help="storage profile used during the load")
+    args = parser.parse_args(argv)
+
+    db = Storage(args.db)
+    svc = StudyBuddyService(db, normalize_availability=NORMALIZE_AVAILABILITY)
+    report = RejectReport(args.rejects)
+    try:
+        with db.use_profile(args.profile):
+            written, rejected = ingest_file(svc, args.kind, args.path, args.batch_size, report)
+    finally:
+        report.close()
+    print(f"{args.kind}: {written} loaded, {rejected} rejected")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
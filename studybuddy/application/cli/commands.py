@@ -0,0 +1,345 @@
+import argparse
+import csv
+import io
+import json
+import shlex
+import sqlite3
+import sys
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from typing import Callable, Iterable, Iterator, List, TextIO
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.application.cli.validation import COURSE_CODE_PATTERN
+from studybuddy.domain.time_parsers import parse_range
+
+# Non-interactive command mode, for scripts. Same operations as the menu, but
+# every answer is a stream of records written as JSON Lines (default) or CSV:
+#   python -m studybuddy suggest --user 1 --course CPSC-3720 --min 30 --format jsonl
+#   python -m studybuddy classmates --user 1 --course CPSC-3720 --format csv
+# `batch` reads one command per line from stdin and runs them all over one open
+# connection, so thousands of operations cost one process start:
+#   printf 'suggest --user 1 --course CPSC-3720\nsessions --user 2\n' | python -m studybuddy batch
+# In batch output every record starts with the input line number and command name;
+# a line that fails gives one {"line", "command", "error"} record and the batch
+# goes on. Output is collected in memory and written in large chunks.
+
+FLUSH_EVERY = 1000   # records buffered before they are written out
+
+class CommandError(ValueError):
+    """Bad arguments or a request the service refused; reported, never a traceback."""
+
+class CommandParser(argparse.ArgumentParser):
+    # argparse prints and exits on bad arguments, which would end a whole batch
+    def error(self, message):
+        raise CommandError(message)
+
+# -------- argument types
+def course_code(text: str) -> str:
+    code = text.strip().upper()
+    if not COURSE_CODE_PATTERN.match(code):
+        raise argparse.ArgumentTypeError(f"invalid course code {text!r}, expected like CPSC-3720")
+    return code
+
+def time_range(text: str):
+    try:
+        return parse_range(text.strip())
+    except Exception:
+        raise argparse.ArgumentTypeError(f"invalid range {text!r}, expected like 'Mon 13:00-15:30'")
+
+def id_list(text: str) -> List[int]:
+    try:
+        ids = [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        ids = []
+    if not ids:
+        raise argparse.ArgumentTypeError(f"expected ids like 4 or 4,7,9, got {text!r}")
+    return ids
+
+# -------- output
+def _plain(value):
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+def to_record(obj) -> dict:
+    if is_dataclass(obj):
+        obj = asdict(obj)
+    elif isinstance(obj, sqlite3.Row):
+        obj = dict(obj)
+    return {key: _plain(value) for key, value in obj.items()}
+
+class RecordWriter:
+    """Buffers records and writes them as JSON Lines or CSV (a new header row
+    whenever the columns change, e.g. between commands of a batch)."""
+    def __init__(self, out: TextIO, fmt: str = "jsonl"):
+        self.out = out
+        self.fmt = fmt
+        self._lines: List[str] = []
+        self._columns = None
+        self._csv_buffer = None
+
+    def write(self, record: dict) -> None:
+        if self.fmt == "jsonl":
+            self._lines.append(json.dumps(record, separators=(",", ":")) + "\n")
+        else:
+            columns = list(record)
+            if columns != self._columns:
+                self._columns = columns
+                self._lines.append(self._csv_line(columns))
+            self._lines.append(self._csv_line(
+                ";".join(map(str, v)) if isinstance(v, (list, tuple)) else v for v in record.values()))
+        if len(self._lines) >= FLUSH_EVERY:
+            self.flush()
+
+    def _csv_line(self, values) -> str:
+        if self._csv_buffer is None:
+            self._csv_buffer = io.StringIO()
+            self._csv_writer = csv.writer(self._csv_buffer, lineterminator="\n")
+        self._csv_buffer.seek(0)
+        self._csv_buffer.truncate()
+        self._csv_writer.writerow(list(values))
+        return self._csv_buffer.getvalue()
+
+    def flush(self) -> None:
+        if self._lines:
+            self.out.write("".join(self._lines))
+            self._lines.clear()
+        self.out.flush()
+
+# -------- commands: each yields the records it outputs
+def require_user(svc: StudyBuddyService, user_id: int) -> None:
+    if not svc.user_exists(user_id):
+        raise CommandError(f"user id {user_id} not found")
+
+def cmd_create_user(svc, args) -> Iterator[dict]:
+    name = args.name.strip()
+    if not name:
+        raise CommandError("name cannot be empty")
+    yield {"id": svc.create_user(name), "name": name}
+
+def cmd_rename_user(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    name = args.name.strip()
+    if not name:
+        raise CommandError("name cannot be empty")
+    svc.update_user_name(args.user, name)
+    yield {"id": args.user, "name": name}
+
+def cmd_enroll(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    svc.enroll_course(args.user, args.course, args.title)
+    yield {"user_id": args.user, "course_code": args.course}
+
+def cmd_drop(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    svc.drop_course(args.user, args.course)
+    yield {"user_id": args.user, "course_code": args.course}
+
+def cmd_add_availability(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    dow, start, end = args.range
+    aid = svc.add_availability(args.user, dow, start, end)
+    yield {"id": aid, "user_id": args.user, "day_of_week": dow, "start_min": start, "end_min": end}
+
+def cmd_remove_availability(svc, args) -> Iterator[dict]:
+    svc.remove_availability(args.id)
+    yield {"id": args.id}
+
+def cmd_courses(svc, args) -> Iterator[dict]:
+    rows = svc.iter_all_courses() if args.user is None else svc.iter_courses_for_user(args.user)
+    return map(to_record, rows)
+
+def cmd_classmates(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    return map(to_record, svc.iter_classmates(args.user, args.course))
+
+def cmd_suggest(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    return map(to_record, svc.iter_suggest_matches(args.user, args.course, args.min))
+
+def cmd_top_partners(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    for ranking in svc.top_partners(args.user, args.course, args.k, args.min):
+        yield {"partner_id": ranking.partner_id, "total_minutes": ranking.total_minutes,
+               "windows": len(ranking.windows)}
+
+def cmd_request(svc, args) -> Iterator[dict]:
+    for uid in [args.user] + args.invitees:
+        require_user(svc, uid)
+    dow, start, end = args.range
+    sid = svc.request_group_session(args.user, args.invitees, args.course, dow, start, end)
+    yield {"session_id": sid, "status": "pending"}
+
+def cmd_respond(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    svc.respond_session(args.session, args.user, args.accept)
+    yield {"session_id": args.session, "user_id": args.user,
+           "response": "accepted" if args.accept else "declined"}
+
+def cmd_sessions(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    return map(to_record, svc.iter_confirmed_sessions_for_user(args.user))
+
+def cmd_inbox(svc, args) -> Iterator[dict]:
+    require_user(svc, args.user)
+    if args.count:
+        return iter([{"user_id": args.user, "pending": svc.pending_count(args.user)}])
+    return map(to_record, svc.iter_pending_requests_for_user(args.user))
+
+def cmd_group_slots(svc, args) -> Iterator[dict]:
+    if (args.size is None) == (args.members is None):
+        raise CommandError("give either --size or --members")
+    slots = svc.find_group_slots(args.course, group_size=args.size, member_ids=args.members,
+                                 user_id=args.user, min_minutes=args.min, limit=args.limit)
+    return map(to_record, slots)
+
+def build_parser() -> CommandParser:
+    common = CommandParser(add_help=False)
+    common.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    common.add_argument("--db", help="database file (default: the app database)")
+
+    parser = CommandParser(prog="studybuddy", description="StudyBuddy commands for scripts.")
+    sub = parser.add_subparsers(dest="command", required=True, parser_class=CommandParser)
+
+    def command(name: str, handler: Callable, help_text: str) -> CommandParser:
+        p = sub.add_parser(name, parents=[common], help=help_text)
+        p.set_defaults(handler=handler)
+        return p
+
+    p = command("create-user", cmd_create_user, "create a user")
+    p.add_argument("--name", required=True)
+    p = command("rename-user", cmd_rename_user, "change a user's name")
+    p.add_argument("--user", type=int, required=True)
+    p.add_argument("--name", required=True)
+    for name, handler, help_text in (("enroll", cmd_enroll, "enroll in a course"),
+                                     ("drop", cmd_drop, "drop a course")):
+        p = command(name, handler, help_text)
+        p.add_argument("--user", type=int, required=True)
+        p.add_argument("--course", type=course_code, required=True)
+        if name == "enroll":
+            p.add_argument("--title")
+    p = command("add-availability", cmd_add_availability, "add a free time block")
+    p.add_argument("--user", type=int, required=True)
+    p.add_argument("--range", type=time_range, required=True, help='like "Mon 13:00-15:00"')
+    p = command("remove-availability", cmd_remove_availability, "remove a free time block")
+    p.add_argument("--id", type=int, required=True)
+    p = command("courses", cmd_courses, "list all courses, or one user's")
+    p.add_argument("--user", type=int)
+    p = command("classmates", cmd_classmates, "classmates in a course")
+    p.add_argument("--user", type=int, required=True)
+    p.add_argument("--course", type=course_code, required=True)
+    for name, handler, help_text in (("suggest", cmd_suggest, "overlapping free time with classmates"),
+                                     ("top-partners", cmd_top_partners, "classmates with the most overlap")):
+        p = command(name, handler, help_text)
+        p.add_argument("--user", type=int, required=True)
+        p.add_argument("--course", type=course_code, required=True)
+        p.add_argument("--min", type=int, default=30, help="minimum overlap in minutes")
+        if name == "top-partners":
+            p.add_argument("--k", type=int, default=5)
+    p = command("request", cmd_request, "request a study session")
+    p.add_argument("--user", type=int, required=True, help="requester")
+    p.add_argument("--invitees", type=id_list, required=True, help="4 or 4,7,9")
+    p.add_argument("--course", type=course_code, required=True)
+    p.add_argument("--range", type=time_range, required=True, help='like "Mon 13:00-15:00"')
+    p = command("respond", cmd_respond, "accept or decline a session")
+    p.add_argument("--session", type=int, required=True)
+    p.add_argument("--user", type=int, required=True)
+    answer = p.add_mutually_exclusive_group(required=True)
+    answer.add_argument("--accept", dest="accept", action="store_true")
+    answer.add_argument("--decline", dest="accept", action="store_false")
+    p = command("sessions", cmd_sessions, "a user's confirmed sessions")
+    p.add_argument("--user", type=int, required=True)
+    p = command("inbox", cmd_inbox, "requests waiting on a user's answer")
+    p.add_argument("--user", type=int, required=True)
+    p.add_argument("--count", action="store_true", help="only the number of pending requests")
+    p = command("group-slots", cmd_group_slots, "times a whole group is free")
+    p.add_argument("--course", type=course_code, required=True)
+    p.add_argument("--size", type=int, help="best groups of this size")
+    p.add_argument("--members", type=id_list, help="exactly these users, e.g. 1,2,3")
+    p.add_argument("--user", type=int, help="only groups including this user")
+    p.add_argument("--min", type=int, default=30)
+    p.add_argument("--limit", type=int, default=10)
+    p = command("batch", None, "run commands read from stdin, one per line")
+    # a failing line reports its error and its own writes are rolled back, the
+    # other lines still commit together
+    p.add_argument("--single-transaction", action="store_true",
+                   help="commit once at the end instead of after every write")
+    return parser
+
+# runs one parsed command; errors the user can fix become CommandError
+def run(svc: StudyBuddyService, args) -> Iterable[dict]:
+    try:
+        # materialized here so errors raised while streaming are caught too
+        return list(args.handler(svc, args))
+    except CommandError:
+        raise
+    except sqlite3.IntegrityError as ex:
+        raise CommandError(f"rejected by the database: {ex}")
+    except ValueError as ex:
+        raise CommandError(str(ex))
+
+def run_batch(svc: StudyBuddyService, parser: CommandParser, lines: Iterable[str],
+              writer: RecordWriter) -> int:
+    errors = 0
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name = None
+        try:
+            tokens = shlex.split(line)
+            name = tokens[0]
+            if "-h" in tokens or "--help" in tokens:
+                raise CommandError("help is not available in batch mode")
+            args = parser.parse_args(tokens)
+            if args.handler is None:
+                raise CommandError("batch can't be nested")
+            # each line is all or nothing (a savepoint under --single-transaction)
+            with svc.db.transaction():
+                records = run(svc, args)
+            for record in records:
+                writer.write({"line": line_no, "command": name, **record})
+        except (CommandError, ValueError) as ex:
+            errors += 1
+            writer.write({"line": line_no, "command": name, "error": str(ex)})
+    return errors
+
+def main(argv=None, stdin: TextIO | None = None, stdout: TextIO | None = None) -> int:
+    # imports kept local so importing this module doesn't open the app database
+    from studybuddy.app_configs import DB_PATH, NORMALIZE_AVAILABILITY, USE_OVERLAP_TABLE
+    from studybuddy.database.sql_storage import Storage
+    from studybuddy.database.migrations import ensure_schema
+
+    stdin, stdout = stdin or sys.stdin, stdout or sys.stdout
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except CommandError as ex:
+        print(f"studybuddy: {ex}", file=sys.stderr)
+        return 2
+
+    db = Storage(args.db or DB_PATH)
+    ensure_schema(db)
+    svc = StudyBuddyService(db, normalize_availability=NORMALIZE_AVAILABILITY, use_overlap_table=USE_OVERLAP_TABLE)
+    writer = RecordWriter(stdout, args.format)
+    try:
+        if args.handler is None:
+            if args.single_transaction:
+                with db.transaction():
+                    errors = run_batch(svc, parser, stdin, writer)
+            else:
+                errors = run_batch(svc, parser, stdin, writer)
+            return 1 if errors else 0
+        try:
+            for record in run(svc, args):
+                writer.write(record)
+        except CommandError as ex:
+            print(f"studybuddy {args.command}: {ex}", file=sys.stderr)
+            return 1
+        return 0
+    finally:
+        writer.flush()
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
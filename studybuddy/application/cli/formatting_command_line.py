@@ -25,10 +25,48 @@ def print_match_suggestions(suggestions):
         dow = INT_TO_WEEKDAY.get(s.day_of_week, str(s.day_of_week))
         print(f"- partner {s.partner_id} | {dow} | {minutes_to_hhmm(s.overlap_start_min)} - {minutes_to_hhmm(s.overlap_end_min)} ({s.minutes} min)")
 
+# prints candidate study group windows from find_group_slots
+def print_group_slots(slots):
+    if not slots:
+        print("no group windows found.")
+        return
+    print("group windows:")
+    for s in slots:
+        dow = INT_TO_WEEKDAY.get(s.day_of_week, str(s.day_of_week))
+        members = ", ".join(str(u) for u in s.member_ids)
+        print(f"- {dow} | {minutes_to_hhmm(s.start_min)} - {minutes_to_hhmm(s.end_min)} ({s.minutes} min) | users {members}")
+
 def print_sessions(sessions):
     if not sessions:
         print("no confirmed sessions.")
         return
     for s in sessions:
         dow = INT_TO_WEEKDAY.get(s.day_of_week, str(s.day_of_week))
-        print(f"- [{SessionStatus(s.status).value}] {s.course_code} | {dow} | {minutes_to_hhmm(s.start_min)} - {minutes_to_hhmm(s.end_min)} (id {s.id})")
\ No newline at end of file
+        print(f"- [{SessionStatus(s.status).value}] {s.course_code} | {dow} | {minutes_to_hhmm(s.start_min)} - {minutes_to_hhmm(s.end_min)} (id {s.id})")
+
+# prints one page of a user's inbox (page_pending_requests_for_user)
+def print_pending_requests(requests):
+    if not requests:
+        print("no pending requests.")
+        return
+    for r in requests:
+        dow = INT_TO_WEEKDAY.get(r.day_of_week, str(r.day_of_week))
+        print(f"- session {r.session_id} | {r.course_code} | {dow} | {minutes_to_hhmm(r.start_min)} - {minutes_to_hhmm(r.end_min)} | from user {r.requester_id}")
+
+# prints a QueryStats snapshot (hidden "stats" menu option): commits, the slowest
+# statements and service methods by total time, and the slow-query log
+def print_stats(snapshot, top: int = 10):
+    if snapshot is None:
+        print("stats are off. Start the app with STUDYBUDDY_STATS=1 to collect them.")
+        return
+    print(f"commits: {snapshot['commits']}")
+    for title, section in (("service methods", snapshot["methods"]), ("statements", snapshot["statements"])):
+        print(f"{title} (by total time):")
+        ranked = sorted(section.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:top]
+        if not ranked:
+            print("- none yet")
+        for name, h in ranked:
+            print(f"- {h['count']}x total {h['total_ms']} ms | mean {h['mean_ms']} ms | max {h['max_ms']} ms | rows {h['rows']} | {name[:80]}")
+    print(f"slow queries: {len(snapshot['slow_queries'])}")
+    for q in snapshot["slow_queries"][-top:]:
+        print(f"- {q['ms']} ms | {(q['expanded'] or q['sql'])[:100]} | params {q['params']}")
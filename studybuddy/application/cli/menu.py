@@ -1,15 +1,15 @@
 from studybuddy.application.services import StudyBuddyService
+from studybuddy.app_configs import PAGE_SIZE
 from studybuddy.domain.time_parsers import parse_range
-from .formatting_command_line import print_users, print_match_suggestions, print_sessions
-
-import re
+from .validation import COURSE_CODE_PATTERN
+from .formatting_command_line import (
+    print_users, print_match_suggestions, print_sessions, print_stats, print_group_slots, print_pending_requests,
+)
 
 # ---------------------------------------
 # Robust input helpers & validators
 # ---------------------------------------
 
-COURSE_CODE_PATTERN = re.compile(r"^[A-Z]{3,4}-\d{4}$")
-
 def prompt_int(label: str):
     """Prompt until a numeric integer is entered, or 'q' to cancel (returns None)."""
     while True:
@@ -22,6 +22,21 @@ def prompt_int(label: str):
         except ValueError:
             print("Please enter a numeric id (or 'q' to cancel).")
 
+def prompt_int_list(label: str):
+    """Prompt for one or more numeric ids separated by commas, or 'q' to cancel (returns None)."""
+    while True:
+        raw = input(label).strip()
+        if raw.lower() in {"q", "quit", "exit"}:
+            print("canceled.")
+            return None
+        try:
+            ids = [int(part) for part in raw.split(",") if part.strip()]
+        except ValueError:
+            ids = []
+        if ids:
+            return ids
+        print("Please enter numeric ids like 4 or 4,7,9 (or 'q' to cancel).")
+
 def prompt_course_code(label: str):
     """Accept codes like 'CPSC-3720' or 'BIO-1220' (3–4 letters, hyphen, 4 digits)."""
     while True:
@@ -63,6 +78,19 @@ def ensure_user_exists(svc: StudyBuddyService, user_id: int) -> bool:
         return False
     return True
 
+def show_pages(fetch_page, printer):
+    """
+    Print a paginated listing one page at a time. fetch_page(after) returns a Page
+    (see the page_* service methods); stops at the last page or when the user says no.
+    """
+    cursor = None
+    while True:
+        page = fetch_page(cursor)
+        printer(page.items)
+        if page.next_cursor is None or not confirm(f"Show the next {PAGE_SIZE}?"):
+            return
+        cursor = page.next_cursor
+
 # ---------------------------------------
 # Menu
 # ---------------------------------------
@@ -81,6 +109,8 @@ studybuddy
 9) request session
 10) respond to request
 11) my confirmed sessions
+12) find group study slots
+13) my pending requests (inbox)
 0) exit
 """)
 
@@ -203,8 +233,7 @@ def handle_choice(svc: StudyBuddyService):
             course = prompt_course_code("Course code (e.g., CPSC-3720) or 'q' to cancel: ")
             if course is None:
                 continue
-            users = svc.find_classmates(uid, course)
-            print_users(users)
+            show_pages(lambda after: svc.page_classmates(uid, course, after), print_users)
 
         # ---------------------------
         # 8) SUGGEST MATCHES
@@ -232,8 +261,8 @@ def handle_choice(svc: StudyBuddyService):
             requester = prompt_int("requester id (or 'q' to cancel): ")
             if not ensure_user_exists(svc, requester):
                 continue
-            invitee = prompt_int("invitee id (or 'q' to cancel): ")
-            if not ensure_user_exists(svc, invitee):
+            invitees = prompt_int_list("invitee id(s), comma separated for a group (or 'q' to cancel): ")
+            if invitees is None or not all(ensure_user_exists(svc, u) for u in invitees):
                 continue
             course = prompt_course_code("Course code (e.g., CPSC-3720) or 'q' to cancel: ")
             if course is None:
@@ -242,7 +271,11 @@ def handle_choice(svc: StudyBuddyService):
             if rng is None:
                 continue
             dow, s, e = rng
-            sid = svc.request_session(requester, invitee, course, dow, s, e)
+            try:
+                sid = svc.request_group_session(requester, invitees, course, dow, s, e)
+            except ValueError as ex:
+                print(f"Could not create session: {ex}")
+                continue
             print(f"Session id {sid} created (pending).")
 
         # ---------------------------
@@ -257,7 +290,11 @@ def handle_choice(svc: StudyBuddyService):
                 continue
             decision = input("Accept? (y/n): ").strip().lower().startswith("y")
             # pass the decision into respond_session fxn 
-            svc.respond_session(sid, uid, decision)
+            try:
+                svc.respond_session(sid, uid, decision)
+            except ValueError as ex:
+                print(f"Could not accept: {ex}")
+                continue
             print("Response recorded.")
 
         # ---------------------------
@@ -267,8 +304,45 @@ def handle_choice(svc: StudyBuddyService):
             uid = prompt_int("user id (or 'q' to cancel): ")
             if not ensure_user_exists(svc, uid):
                 continue
-            sessions = svc.list_confirmed_sessions_for_user(uid)
-            print_sessions(sessions)
+            show_pages(lambda after: svc.page_confirmed_sessions_for_user(uid, after), print_sessions)
+
+        # ---------------------------
+        # 12) FIND GROUP STUDY SLOTS
+        # ---------------------------
+        elif choice == "12":
+            uid = prompt_int("your user id (or 'q' to cancel): ")
+            if not ensure_user_exists(svc, uid):
+                continue
+            course = prompt_course_code("Course code (e.g., CPSC-3720) or 'q' to cancel: ")
+            if course is None:
+                continue
+            size = prompt_int("group size including you, 3-6 (or 'q' to cancel): ")
+            if size is None:
+                continue
+            if size < 2:
+                print("A group needs at least 2 people.")
+                continue
+            print_group_slots(svc.find_group_slots(course, group_size=size, user_id=uid))
+
+        # ---------------------------
+        # 13) MY PENDING REQUESTS (INBOX)
+        # ---------------------------
+        elif choice == "13":
+            uid = prompt_int("user id (or 'q' to cancel): ")
+            if not ensure_user_exists(svc, uid):
+                continue
+            # the count is a stored counter, the pages come from an index range
+            print(f"{svc.pending_count(uid)} request(s) waiting for your answer (use option 10 to respond)")
+            show_pages(lambda after: svc.page_pending_requests_for_user(uid, after), print_pending_requests)
+
+        # ---------------------------
+        # STATS (hidden, not listed in the menu)
+        # ---------------------------
+        elif choice == "stats":
+            stats = getattr(svc.db, "stats", None)
+            print_stats(stats.snapshot() if stats is not None else None)
+            if getattr(svc, "read_cache", None) is not None:
+                print(f"read cache: {svc.read_cache.stats()}")
 
         # ---------------------------
         # EXIT
@@ -0,0 +1,6 @@
+import re
+
+# Input formats shared by the interactive menu and command mode
+
+# course codes like 'CPSC-3720' or 'BIO-1220' (3-4 letters, hyphen, 4 digits)
+COURSE_CODE_PATTERN = re.compile(r"^[A-Z]{3,4}-\d{4}$")
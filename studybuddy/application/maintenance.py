@@ -0,0 +1,50 @@
+import argparse
+import sys
+from pathlib import Path
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.migrations import course_overlaps_enabled, disable_course_overlaps
+
+# Maintenance commands for the derived course_overlaps table (see schema.sql).
+# Once enabled its triggers keep it current (writes made outside the service
+# included), so check and rebuild are only needed after restoring an old backup, or
+# to verify the triggers. rebuild-overlaps also enables the table, disable-overlaps drops the
+# triggers and the rows (suggest_matches then computes overlaps on every call).
+#
+# usage: python -m studybuddy.application.maintenance check-overlaps [--course CPSC-3720]
+#        python -m studybuddy.application.maintenance rebuild-overlaps
+#        python -m studybuddy.application.maintenance disable-overlaps
+
+def main(argv=None) -> int:
+    # imports kept local so importing this module doesn't open the app database
+    from studybuddy.app_configs import DB_PATH
+    from studybuddy.database.sql_storage import Storage
+
+    parser = argparse.ArgumentParser(description="Check, rebuild or disable the course_overlaps table.")
+    parser.add_argument("command", choices=["check-overlaps", "rebuild-overlaps", "disable-overlaps"])
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument("--course", help="only check this course")
+    args = parser.parse_args(argv)
+
+    db = Storage(args.db)
+    svc = StudyBuddyService(db)
+    if args.command == "rebuild-overlaps":
+        # one big rewrite of a derived table, it can always be redone
+        with db.use_profile("bulk-load"):
+            rows = svc.rebuild_overlaps()
+        print(f"course_overlaps rebuilt: {rows} rows")
+        return 0
+    if args.command == "disable-overlaps":
+        disable_course_overlaps(db)
+        print("course_overlaps disabled")
+        return 0
+    if not course_overlaps_enabled(db):
+        print("course_overlaps is not enabled (see rebuild-overlaps)")
+        return 1
+    mismatched = svc.check_overlaps(args.course.upper() if args.course else None)
+    for uid, code in mismatched:
+        print(f"user {uid} in {code}: stored overlaps differ from availability")
+    print(f"{len(mismatched)} mismatched enrollments" if mismatched else "course_overlaps is consistent")
+    return 1 if mismatched else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+from __future__ import annotations
+import heapq
+from bisect import bisect_left, insort
+from itertools import groupby
+from typing import Dict, Iterable, List, Set, Tuple
+from studybuddy.database.sql_storage import Storage
+from studybuddy.domain.intervals import intersect_intervals, merge_intervals, subtract_interval
+from studybuddy.domain.models import GroupSlot, MatchSuggestion, PartnerRanking
+
+# In-memory matching engine used by StudyBuddyService.suggest_matches when the
+# service is created with use_match_index=True.
+# For every course that has been looked up we keep the set of enrolled users and,
+# per weekday, a list of everyone's availability blocks sorted by start_min.
+# A lookup only walks the blocks that can overlap one of my blocks (found with
+# bisect) instead of joining my blocks against every block in the course.
+# Courses are loaded lazily from the database on first use and then kept up to
+# date by the service's write methods (the on_* hooks below).
+
+# one entry in a per-day list: (start_min, end_min, user_id, availability_id)
+Block = Tuple[int, int, int, int]
+
+class CourseIntervalIndex:
+
+    def __init__(self, db: Storage):
+        self.db = db
+        self._members: Dict[str, Set[int]] = {}        # course -> enrolled user ids
+        self._days: Dict[str, List[List[Block]]] = {}  # course -> 7 sorted block lists
+        # longest block ever added per course/day. It is only used as a lower
+        # bound for the bisect, so it never has to shrink when blocks are removed
+        self._max_len: Dict[str, List[int]] = {}
+        # availability of users that belong to at least one loaded course
+        self._blocks: Dict[int, Dict[int, Tuple[int, int, int]]] = {}  # user -> {avail_id: (dow, s, e)}
+        self._owner: Dict[int, int] = {}               # avail_id -> user_id
+        self._courses_of: Dict[int, Set[str]] = {}     # user -> loaded courses they're in
+
+    # drop everything; courses are reloaded on the next lookup
+    def reset(self) -> None:
+        self._members.clear()
+        self._days.clear()
+        self._max_len.clear()
+        self._blocks.clear()
+        self._owner.clear()
+        self._courses_of.clear()
+
+    # -------- loading
+    def _load_course(self, course_code: str) -> None:
+        self._members[course_code] = set()
+        self._days[course_code] = [[] for _ in range(7)]
+        self._max_len[course_code] = [0] * 7
+        members = self.db.query_all(
+            "select user_id from enrollments where course_code = :c", {"c": course_code}
+        )
+        rows = self.db.query_all("""
+            select a.id, a.user_id, a.day_of_week, a.start_min, a.end_min
+            from enrollments e
+            join availability a on a.user_id = e.user_id
+            where e.course_code = :c
+        """, {"c": course_code})
+        for r in rows:
+            if r["user_id"] not in self._courses_of:
+                self._remember_block(r["user_id"], r["id"], r["day_of_week"], r["start_min"], r["end_min"])
+        for r in members:
+            uid = r["user_id"]
+            self._blocks.setdefault(uid, {})
+            self._courses_of.setdefault(uid, set()).add(course_code)
+            self._members[course_code].add(uid)
+            for aid, (dow, s, e) in self._blocks[uid].items():
+                self._days[course_code][dow].append((s, e, uid, aid))
+                self._max_len[course_code][dow] = max(self._max_len[course_code][dow], e - s)
+        for blocks in self._days[course_code]:
+            blocks.sort()
+
+    def _load_user_blocks(self, user_id: int) -> None:
+        self._blocks[user_id] = {}
+        rows = self.db.query_all(
+            "select id, day_of_week, start_min, end_min from availability where user_id = :u",
+            {"u": user_id}
+        )
+        for r in rows:
+            self._remember_block(user_id, r["id"], r["day_of_week"], r["start_min"], r["end_min"])
+
+    def _remember_block(self, user_id: int, availability_id: int, dow: int, s: int, e: int) -> None:
+        self._blocks.setdefault(user_id, {})[availability_id] = (dow, s, e)
+        self._owner[availability_id] = user_id
+
+    def _insert(self, course_code: str, dow: int, block: Block) -> None:
+        insort(self._days[course_code][dow], block)
+        self._max_len[course_code][dow] = max(self._max_len[course_code][dow], block[1] - block[0])
+
+    def _remove(self, course_code: str, dow: int, block: Block) -> None:
+        blocks = self._days[course_code][dow]
+        i = bisect_left(blocks, block)
+        if i < len(blocks) and blocks[i] == block:
+            del blocks[i]
+
+    def _forget_user_if_unused(self, user_id: int) -> None:
+        if self._courses_of.get(user_id):
+            return
+        self._courses_of.pop(user_id, None)
+        for aid in self._blocks.pop(user_id, {}):
+            self._owner.pop(aid, None)
+
+    # -------- hooks called by the service after its write succeeded
+    def on_add_availability(self, user_id: int, availability_id: int, dow: int, s: int, e: int) -> None:
+        if user_id not in self._courses_of:
+            return  # not in any loaded course, it will be read when needed
+        self._remember_block(user_id, availability_id, dow, s, e)
+        for course in self._courses_of[user_id]:
+            self._insert(course, dow, (s, e, user_id, availability_id))
+
+    def on_remove_availability(self, availability_id: int) -> None:
+        uid = self._owner.pop(availability_id, None)
+        if uid is None:
+            return
+        dow, s, e = self._blocks[uid].pop(availability_id)
+        for course in self._courses_of.get(uid, ()):
+            self._remove(course, dow, (s, e, uid, availability_id))
+
+    def on_enroll(self, user_id: int, course_code: str) -> None:
+        members = self._members.get(course_code)
+        if members is None or user_id in members:
+            return
+        if user_id not in self._courses_of:
+            self._load_user_blocks(user_id)
+        members.add(user_id)
+        self._courses_of.setdefault(user_id, set()).add(course_code)
+        for aid, (dow, s, e) in self._blocks[user_id].items():
+            self._insert(course_code, dow, (s, e, user_id, aid))
+
+    def on_drop(self, user_id: int, course_code: str) -> None:
+        members = self._members.get(course_code)
+        if members is None or user_id not in members:
+            return
+        members.discard(user_id)
+        for aid, (dow, s, e) in self._blocks[user_id].items():
+            self._remove(course_code, dow, (s, e, user_id, aid))
+        self._courses_of[user_id].discard(course_code)
+        self._forget_user_if_unused(user_id)
+
+    def on_delete_user(self, user_id: int) -> None:
+        for course in list(self._courses_of.get(user_id, ())):
+            self.on_drop(user_id, course)
+
+    # -------- lookup
+    # Same result as the SQL in StudyBuddyService.suggest_matches: one row per distinct
+    # (partner, day, overlap window), ordered by minutes desc, day, start, partner
+    def suggest_matches(self, user_id: int, course_code: str, min_minutes: int) -> List[MatchSuggestion]:
+        if course_code not in self._members:
+            self._load_course(course_code)
+        if user_id not in self._members[course_code]:
+            return []
+        days = self._days[course_code]
+        max_len = self._max_len[course_code]
+        windows = set()
+        for dow, my_s, my_e in self._blocks[user_id].values():
+            blocks = days[dow]
+            # a block that ends after my_s can't start before my_s - (longest block)
+            lo = bisect_left(blocks, (my_s - max_len[dow],))
+            hi = bisect_left(blocks, (my_e,))
+            for s, e, partner, _ in blocks[lo:hi]:
+                if partner == user_id or e <= my_s:
+                    continue
+                start, end = max(s, my_s), min(e, my_e)
+                if end - start >= min_minutes:
+                    windows.add((partner, dow, start, end))
+        ordered = sorted(windows, key=lambda w: (w[2] - w[3], w[1], w[2], w[0]))
+        return [
+            MatchSuggestion(
+                partner_id=p, day_of_week=d, overlap_start_min=s, overlap_end_min=e, minutes=e - s
+            ) for p, d, s, e in ordered
+        ]
+
+
+# -------- course-wide batch matching
+# Computes suggest_matches for every member of a course in one pass instead of one
+# self-join per student. Per weekday the blocks are swept in start order while a
+# heap holds the blocks that are still running; each new block overlaps exactly the
+# blocks left in the heap, so the cost is the sort plus the number of overlapping
+# pairs, not (students x blocks)^2.
+# members: enrolled user ids, blocks: (user_id, day_of_week, start_min, end_min)
+# Returns {user_id: [MatchSuggestion, ...]} ordered like suggest_matches, with an
+# (empty) entry for every member.
+def match_course_blocks(members: Iterable[int], blocks: Iterable[Tuple[int, int, int, int]],
+                        min_minutes: int) -> Dict[int, List[MatchSuggestion]]:
+    per_day: List[List[Tuple[int, int, int]]] = [[] for _ in range(7)]
+    for uid, dow, s, e in blocks:
+        per_day[dow].append((s, e, uid))
+    # windows are stored as (-minutes, day, start, partner) so a plain sort gives
+    # suggest_matches' order without a key function
+    windows: Dict[int, Set[Tuple[int, int, int, int]]] = {uid: set() for uid in members}
+    for dow, day_blocks in enumerate(per_day):
+        day_blocks.sort()
+        running: List[Tuple[int, int]] = []  # heap of (end_min, user_id)
+        for s, e, uid in day_blocks:
+            while running and running[0][0] <= s:
+                heapq.heappop(running)
+            # every running block started at or before s and ends after s
+            mine = windows[uid]
+            for other_end, other in running:
+                minutes = min(e, other_end) - s
+                if other != uid and minutes >= min_minutes:
+                    mine.add((-minutes, dow, s, other))
+                    windows[other].add((-minutes, dow, s, uid))
+            heapq.heappush(running, (e, uid))
+    return {
+        uid: [MatchSuggestion(p, d, s, s - neg, -neg) for neg, d, s, p in sorted(found)]
+        for uid, found in windows.items()
+    }
+
+# -------- top-K partners
+# windows must arrive grouped by partner_id (any order inside a group). Each partner's
+# total is the length of the union of their windows per day, and only the best k
+# partners are kept in a min-heap, so only one partner's windows plus the k best are
+# held at once, whatever the number of classmates. Ties are broken by the lower
+# partner id.
+def top_k_partners(windows: Iterable[MatchSuggestion], k: int) -> List[PartnerRanking]:
+    if k <= 0:
+        return []
+    heap: List[tuple] = []  # (total_minutes, -partner_id, windows)
+    for partner, group in groupby(windows, key=lambda m: m.partner_id):
+        found = list(group)
+        per_day: Dict[int, list] = {}
+        for m in found:
+            per_day.setdefault(m.day_of_week, []).append((m.overlap_start_min, m.overlap_end_min))
+        total = sum(e - s for spans in per_day.values() for s, e in merge_intervals(spans))
+        item = (total, -partner, found)
+        if len(heap) < k:
+            heapq.heappush(heap, item)
+        elif item[:2] > heap[0][:2]:
+            heapq.heapreplace(heap, item)
+    return [
+        PartnerRanking(
+            partner_id=-neg_partner,
+            total_minutes=total,
+            windows=sorted(found, key=lambda m: (-m.minutes, m.day_of_week, m.overlap_start_min)),
+        ) for total, neg_partner, found in sorted(heap, key=lambda item: item[:2], reverse=True)
+    ]
+
+# -------- group slots (k-way intersection)
+# Finds windows of at least min_minutes where group_size people are all free.
+# Each user's blocks are merged per day first, so a user is "free" on at most one
+# block at any moment. Per day we sweep the start points in time order keeping the
+# users who are free right now (user -> end of their current block). A group window
+# always begins where its last member becomes free, so at every start point t the
+# best group is the group_size free users whose blocks run the longest: the window is
+# t .. (the earliest end among them). That is one heap selection per start point
+# instead of trying every combination of classmates.
+# must_include: only groups containing this user. Returns the best `limit` windows
+# (longest first). Later start points inside a window already found for the same
+# group (same members and end) are dropped.
+def find_group_windows(blocks: Iterable[Tuple[int, int, int, int]], group_size: int, min_minutes: int,
+                       limit: int = 10, must_include: int | None = None) -> List[GroupSlot]:
+    if group_size < 2:
+        raise ValueError("a group needs at least 2 members")
+    spans: Dict[Tuple[int, int], list] = {}
+    for uid, dow, s, e in blocks:
+        spans.setdefault((dow, uid), []).append((s, e))
+    per_day: List[List[Tuple[int, int, int]]] = [[] for _ in range(7)]
+    for (dow, uid), found in spans.items():
+        for s, e in merge_intervals(found):
+            per_day[dow].append((s, e, uid))
+
+    found_windows: Dict[Tuple[int, tuple, int], int] = {}  # (day, members, end) -> start
+    for dow, day_blocks in enumerate(per_day):
+        day_blocks.sort()
+        free: Dict[int, int] = {}  # user -> end of their current block
+        i = 0
+        while i < len(day_blocks):
+            t = day_blocks[i][0]
+            while i < len(day_blocks) and day_blocks[i][0] == t:
+                free[day_blocks[i][2]] = day_blocks[i][1]
+                i += 1
+            for uid in [u for u, end in free.items() if end <= t]:
+                del free[uid]
+            if len(free) < group_size:
+                continue
+            if must_include is not None:
+                if must_include not in free:
+                    continue
+                others = heapq.nlargest(group_size - 1, ((end, u) for u, end in free.items() if u != must_include))
+                group = others + [(free[must_include], must_include)]
+            else:
+                group = heapq.nlargest(group_size, ((end, u) for u, end in free.items()))
+            end = min(e for e, _ in group)
+            if end - t < min_minutes:
+                continue
+            # start points are visited in order, so the first one seen is the earliest
+            found_windows.setdefault((dow, tuple(sorted(u for _, u in group)), end), t)
+    top = heapq.nsmallest(limit, found_windows.items(),
+                          key=lambda kv: (kv[1] - kv[0][2], kv[0][0], kv[1], kv[0][1]))
+    return [
+        GroupSlot(day_of_week=dow, start_min=s, end_min=e, minutes=e - s, member_ids=list(members))
+        for (dow, members, e), s in top
+    ]
+
+# -------- batch scheduling
+# Gives each (requester, invitee) pair one slot of `duration` minutes where both are
+# free. Everyone's availability is merged per day and their busy times (confirmed
+# sessions) are cut out of it, so each user has a short sorted list of free ranges per
+# day and a pair's candidate windows are the two-pointer intersection of two lists.
+# Greedy, most constrained first: pairs are placed in order of how much shared free
+# time they start with (least first, ties in input order), so pairs with few options
+# aren't crowded out by flexible ones. Each pair takes the tightest window that still
+# fits (best fit, earliest on ties) at its start, and the slot is cut out of both
+# users' free time before the next pair. Cost: a sort plus, per pair, a walk over
+# the two users' free ranges.
+# blocks / busy: (user_id, day_of_week, start_min, end_min)
+# Returns (placed, unplaced): placed is [(pair index, day, start, end)] in input order,
+# unplaced is [(pair index, reason)].
+def assign_pair_slots(pairs: List[Tuple[int, int]], blocks: Iterable[Tuple[int, int, int, int]],
+                      busy: Iterable[Tuple[int, int, int, int]], duration: int):
+    spans: Dict[Tuple[int, int], list] = {}
+    for uid, dow, s, e in blocks:
+        spans.setdefault((uid, dow), []).append((s, e))
+    free = {key: merge_intervals(found) for key, found in spans.items()}
+    for uid, dow, s, e in busy:
+        if (uid, dow) in free:
+            free[(uid, dow)] = _cut(free[(uid, dow)], (s, e))
+
+    def windows(a: int, b: int):
+        for dow in range(7):
+            for s, e in intersect_intervals(free.get((a, dow), []), free.get((b, dow), [])):
+                if e - s >= duration:
+                    yield dow, s, e
+
+    placed, unplaced, order = [], [], []
+    for i, (a, b) in enumerate(pairs):
+        if a == b:
+            unplaced.append((i, "requester and invitee are the same user"))
+            continue
+        room = sum(e - s for _, s, e in windows(a, b))
+        if not room:
+            unplaced.append((i, f"no shared free time of {duration} minutes"))
+            continue
+        order.append((room, i))
+    order.sort()
+    for _, i in order:
+        a, b = pairs[i]
+        best = min(windows(a, b), key=lambda w: (w[2] - w[1], w[0], w[1]), default=None)
+        if best is None:
+            unplaced.append((i, "shared free time taken by other pairs in this batch"))
+            continue
+        dow, start, _ = best
+        slot = (start, start + duration)
+        for uid in (a, b):
+            free[(uid, dow)] = _cut(free[(uid, dow)], slot)
+        placed.append((i, dow, slot[0], slot[1]))
+    placed.sort()
+    unplaced.sort()
+    return placed, unplaced
+
+# a sorted list of disjoint ranges without cut
+def _cut(ranges: List[Tuple[int, int]], cut: Tuple[int, int]) -> List[Tuple[int, int]]:
+    return [piece for r in ranges
+            for piece in (subtract_interval(r, cut) if r[0] < cut[1] and cut[0] < r[1] else [r])]
@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable
+
+# Bounded LRU cache for the service's hot reads (user_exists, list_all_courses,
+# list_courses_for_user, find_classmates).
+# Every cached value is stored with a "stamp": the version counters it depends on at
+# the time it was read (e.g. find_classmates(u, c) depends on course c's version).
+# The service bumps a user's or course's version whenever it changes that data, so a
+# cached value whose stamp no longer matches is simply treated as a miss. Nothing has
+# to be searched or evicted eagerly, and a read never returns stale data as long as
+# all writes go through this StudyBuddyService.
+
+class ReadCache:
+    """Version-stamped LRU cache; thread safe."""
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._user_versions: Dict[int, int] = {}
+        self._course_versions: Dict[str, int] = {}
+        self._course_list_version = 0
+        self._lock = threading.Lock()
+
+    # -------- stamps
+    def user_stamp(self, user_id: int) -> tuple:
+        return ("u", self._user_versions.get(user_id, 0))
+
+    def course_stamp(self, course_code: str) -> tuple:
+        return ("c", self._course_versions.get(course_code, 0))
+
+    def course_list_stamp(self) -> tuple:
+        return ("all", self._course_list_version)
+
+    # -------- invalidation
+    def bump_user(self, user_id: int) -> None:
+        with self._lock:
+            self._user_versions[user_id] = self._user_versions.get(user_id, 0) + 1
+
+    def bump_course(self, course_code: str) -> None:
+        with self._lock:
+            self._course_versions[course_code] = self._course_versions.get(course_code, 0) + 1
+
+    def bump_course_list(self) -> None:
+        with self._lock:
+            self._course_list_version += 1
+
+    # drops everything, used after bulk writes that touch many users at once
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_versions.clear()
+            self._course_versions.clear()
+            self._course_list_version += 1
+
+    # -------- lookup
+    # returns the cached value for key if it was stored with the same stamp,
+    # otherwise calls load() and caches its result
+    def get(self, key: Hashable, stamp: tuple, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = load()
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+            }
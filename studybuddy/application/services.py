@@ -1,27 +1,115 @@
-from typing import List
+from __future__ import annotations
+import sqlite3
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
 from studybuddy.database.sql_storage import Storage
-from studybuddy.domain.models import User, Session, MatchSuggestion
+from studybuddy.database.migrations import course_overlaps_enabled, enable_course_overlaps
+from studybuddy.domain.models import (
+    User, Session, MatchSuggestion, Page, PartnerRanking, GroupSlot, SessionConflict,
+    ScheduleResult, UnplacedPair, PendingRequest,
+)
+from studybuddy.domain.errors import SessionConflictError, SessionNotPendingError
 from studybuddy.domain.domain_types import SessionStatus
-from studybuddy.app_configs import MIN_MATCH_MINUTES
+from studybuddy.domain.intervals import merge_intervals, subtract_interval
+from studybuddy.app_configs import MIN_MATCH_MINUTES, PAGE_SIZE, READ_CACHE_SIZE
+from studybuddy.application.matching import (
+    CourseIntervalIndex, assign_pair_slots, find_group_windows, match_course_blocks, top_k_partners,
+)
+from studybuddy.application.read_cache import ReadCache
+
+# splits any iterable into lists of at most size items without reading ahead,
+# so bulk writes never hold more than one batch in memory
+def _chunks(rows: Iterable, size: int):
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+# builds a Page from limit + 1 fetched rows: the extra row only tells us whether
+# there is a next page, the cursor is the key of the last row shown
+def _page(items: list, limit: int, key) -> Page:
+    if len(items) > limit:
+        items = items[:limit]
+        return Page(items=items, next_cursor=key(items[-1]))
+    return Page(items=items, next_cursor=None)
 
 class StudyBuddyService:
 
-    def __init__(self, db: Storage):
+    # use_match_index: answer suggest_matches from an in-memory interval index
+    # (see matching.py) instead of the availability self-join in SQL
+    # normalize_availability: keep each user's blocks merged per weekday, so
+    # overlapping or touching ranges are stored as one block (see add_availability)
+    # use_read_cache: serve user_exists, list_all_courses, list_courses_for_user and
+    # find_classmates from a version-stamped LRU cache (see read_cache.py); hit and
+    # miss counters are in self.read_cache.stats()
+    # use_overlap_table: answer suggest_matches from the materialized course_overlaps
+    # table, enabling it for the database first if needed (one full rebuild). Every
+    # availability and enrollment write then also updates the overlaps with all of
+    # that user's classmates, so this trades write and bulk load speed for reads
+    def __init__(self, db: Storage, use_match_index: bool = False, normalize_availability: bool = False,
+                 use_read_cache: bool = False, use_overlap_table: bool = False):
         self.db = db
+        self.match_index = CourseIntervalIndex(db) if use_match_index else None
+        self.normalize_availability = normalize_availability
+        self.read_cache = ReadCache(READ_CACHE_SIZE) if use_read_cache else None
+        self.use_overlap_table = use_overlap_table
+        if use_overlap_table and not course_overlaps_enabled(db):
+            enable_course_overlaps(db)
+
+    # bumps the cache versions of a user and every course they're enrolled in
+    # (their name shows up in those courses' classmate lists)
+    def _invalidate_user_and_courses(self, user_id: int) -> None:
+        self.read_cache.bump_user(user_id)
+        for r in self.db.query_all("select course_code from enrollments where user_id = :u", {"u": user_id}):
+            self.read_cache.bump_course(r["course_code"])
 
     # quick existence check for guardrails in CLI
     def user_exists(self, user_id: int) -> bool:
+        if self.read_cache is not None:
+            return self.read_cache.get(("user_exists", user_id), self.read_cache.user_stamp(user_id),
+                                       lambda: self._user_exists(user_id))
+        return self._user_exists(user_id)
+
+    def _user_exists(self, user_id: int) -> bool:
         row = self.db.query_one("select 1 as ok from users where id = :u", {"u": user_id})
         return row is not None
 
+    # The listing methods below come in two flavours sharing one query: list_* /
+    # find_* / suggest_* return a list, iter_* yield results lazily through
+    # Storage.query_iter so even huge results (campus wide exports) use flat memory.
+    # The shared private generators take the fetch function (query_all or query_iter).
+
     # navigation helpers for courses
     def list_all_courses(self):
+        if self.read_cache is not None:
+            return list(self.read_cache.get(("list_all_courses",), self.read_cache.course_list_stamp(),
+                                            lambda: tuple(self._all_courses())))
+        return self._all_courses()
+
+    def _all_courses(self):
         return self.db.query_all(
             "select code, coalesce(title, '') as title from courses order by code"
         )
 
+    def iter_all_courses(self) -> Iterator:
+        return self.db.query_iter(
+            "select code, coalesce(title, '') as title from courses order by code"
+        )
+
     def list_courses_for_user(self, user_id: int):
-        return self.db.query_all(
+        if self.read_cache is not None:
+            return list(self.read_cache.get(
+                ("list_courses_for_user", user_id), self.read_cache.user_stamp(user_id),
+                lambda: tuple(self._courses_for_user(self.db.query_all, user_id))))
+        return self._courses_for_user(self.db.query_all, user_id)
+
+    def iter_courses_for_user(self, user_id: int) -> Iterator:
+        return self._courses_for_user(self.db.query_iter, user_id)
+
+    def _courses_for_user(self, fetch, user_id: int):
+        return fetch(
             """
             select c.code, coalesce(c.title,'') as title
             from enrollments e
@@ -31,58 +119,328 @@ class StudyBuddyService:
             """,
             {"u": user_id}
         )
+    # -------- Keyset pagination
+    # page_* methods return one Page at a time. Instead of offset they continue after
+    # the last key seen (course code, user id or (day, start, session id)). For
+    # courses, a user's courses and classmates that key is an index, so the hundredth
+    # page costs the same as the first (page_confirmed_sessions_for_user is the
+    # exception, see there). Pass the previous page's next_cursor as after=.
+    def page_all_courses(self, after: str | None = None, limit: int = PAGE_SIZE) -> Page:
+        rows = self.db.query_all("""
+            select code, coalesce(title, '') as title from courses
+            where code > :after order by code limit :n
+        """, {"after": after or "", "n": limit + 1})
+        return _page(rows, limit, lambda r: r["code"])
+
+    def page_courses_for_user(self, user_id: int, after: str | None = None, limit: int = PAGE_SIZE) -> Page:
+        rows = self.db.query_all("""
+            select c.code, coalesce(c.title,'') as title
+            from enrollments e
+            join courses c on c.code = e.course_code
+            where e.user_id = :u and e.course_code > :after
+            order by e.course_code
+            limit :n
+        """, {"u": user_id, "after": after or "", "n": limit + 1})
+        return _page(rows, limit, lambda r: r["code"])
+
+    def page_classmates(self, user_id: int, course_code: str, after: int | None = None,
+                        limit: int = PAGE_SIZE) -> Page:
+        rows = self.db.query_all("""
+            select users_classmate.id, users_classmate.name
+            from enrollments as enrollments_for_me
+            join enrollments as enrollments_for_classmate
+              on enrollments_for_classmate.course_code = enrollments_for_me.course_code
+            join users as users_classmate
+              on users_classmate.id = enrollments_for_classmate.user_id
+            where enrollments_for_me.user_id = :u
+              and enrollments_for_me.course_code = :c
+              and enrollments_for_classmate.user_id > :after
+              and enrollments_for_classmate.user_id <> :u
+            order by enrollments_for_classmate.user_id
+            limit :n
+        """, {"u": user_id, "c": course_code, "after": after or 0, "n": limit + 1})
+        users = [User(id=r["id"], name=r["name"]) for r in rows]
+        return _page(users, limit, lambda u: u.id)
+
+    # cursor is (day_of_week, start_min, session id). Not constant per page: the order
+    # key lives on sessions while the user is on session_participants, so no index
+    # gives this order and every page sorts the user's confirmed sessions after the
+    # cursor (a temp b-tree). That set stays small because confirmed sessions of one
+    # user can't overlap (at most a week's worth of non-overlapping slots), so the
+    # weekly calendar order is kept rather than paging by session id
+    def page_confirmed_sessions_for_user(self, user_id: int, after: tuple | None = None,
+                                         limit: int = PAGE_SIZE) -> Page:
+        d, s, sid = after or (-1, -1, 0)
+        rows = self.db.query_all("""
+            select s.id, s.course_code, s.day_of_week, s.start_min, s.end_min, s.status
+            from sessions s
+            join session_participants sp on sp.session_id = s.id
+            where sp.user_id = :u and s.status = 'confirmed'
+              and (s.day_of_week, s.start_min, s.id) > (:d, :s, :sid)
+            order by s.day_of_week, s.start_min, s.id
+            limit :n
+        """, {"u": user_id, "d": d, "s": s, "sid": sid, "n": limit + 1})
+        sessions = [Session(
+            id=r["id"], course_code=r["course_code"], day_of_week=r["day_of_week"],
+            start_min=r["start_min"], end_min=r["end_min"], status=SessionStatus(r["status"])
+        ) for r in rows]
+        return _page(sessions, limit, lambda x: (x.day_of_week, x.start_min, x.id))
+
     # -------- Profiles & Courses (FR1, FR2) --------
     def create_user(self, name: str) -> int:
-        self.db.execute("insert into users(name) values(:name)", {"name": name})
-        return int(self.db.query_one("select last_insert_rowid() as id")["id"])
+        uid = int(self.db.execute("insert into users(name) values(:name)", {"name": name}))
+        if self.read_cache is not None:
+            self.read_cache.bump_user(uid)
+        return uid
 
     def update_user_name(self, user_id: int, new_name: str) -> None:
         self.db.execute("update users set name = :n where id = :u", {"n": new_name, "u": user_id})
+        if self.read_cache is not None:
+            self._invalidate_user_and_courses(user_id)
 
     def delete_user(self, user_id: int) -> None:
+        if self.read_cache is not None:
+            # before the delete, the cascade removes the enrollments we need here
+            self._invalidate_user_and_courses(user_id)
         self.db.execute("delete from users where id = :u", {"u": user_id})
+        if self.read_cache is not None:
+            self.read_cache.bump_user(user_id)
+        if self.match_index is not None:
+            self.match_index.on_delete_user(user_id)
 
     def enroll_course(self, user_id: int, course_code: str, title: str | None = None) -> None:
-        if title is not None:
-            self.db.execute("insert or ignore into courses(code,title) values(:c,:t)", {"c":course_code, "t":title})
-        else:
-            self.db.execute("insert or ignore into courses(code) values(:c)", {"c":course_code})
-        self.db.execute("""
-            insert or ignore into enrollments(user_id, course_code)
-            values(:u, :c)
-        """, {"u": user_id, "c": course_code})
+        # course + enrollment are written in one transaction (one commit)
+        with self.db.transaction():
+            if title is not None:
+                self.db.execute("insert or ignore into courses(code,title) values(:c,:t)", {"c":course_code, "t":title})
+            else:
+                self.db.execute("insert or ignore into courses(code) values(:c)", {"c":course_code})
+            self.db.execute("""
+                insert or ignore into enrollments(user_id, course_code)
+                values(:u, :c)
+            """, {"u": user_id, "c": course_code})
+        if self.read_cache is not None:
+            self.read_cache.bump_user(user_id)
+            self.read_cache.bump_course(course_code)
+            self.read_cache.bump_course_list()
+        if self.match_index is not None:
+            self.match_index.on_enroll(user_id, course_code)
 
     def drop_course(self, user_id: int, course_code: str) -> None:
         self.db.execute("delete from enrollments where user_id=:u and course_code=:c", {"u": user_id, "c": course_code})
+        if self.read_cache is not None:
+            self.read_cache.bump_user(user_id)
+            self.read_cache.bump_course(course_code)
+        if self.match_index is not None:
+            self.match_index.on_drop(user_id, course_code)
 
     # -------- Availability
     # This function adds a user's availability time slots to the database by
    
+    # With normalize_availability the new range is merged with the user's blocks on that
+    # day that overlap or touch it ("Mon 13:00-14:00" + "Mon 13:30-15:00" -> one
+    # "Mon 13:00-15:00" block) and the id of the merged block is returned
     def add_availability(self, user_id: int, day_of_week: int, start_min: int, end_min: int) -> int:
         #check if the value for day of week is valid ( aka 0-6) and that the time
         #range is valid within 1 24 hr day ( aka 0-1440)
         if not (0 <= day_of_week <= 6) or not (0 <= start_min < end_min <= 1440):
             raise ValueError("invalid day/time range")
+        if self.normalize_availability:
+            return self._add_merged_availability(user_id, day_of_week, start_min, end_min)
         #creates a new time slot in the availability table telling when the user is available
-
-        self.db.execute("""
+        # execute hands back the new row's id so we can reference it later
+        aid = int(self.db.execute("""
             insert into availability(user_id, day_of_week, start_min, end_min)
             values(:user_id,:day_of_week,:start_min,:end_min)
-        """, {"user_id":user_id,"day_of_week":day_of_week,"start_min":start_min,"end_min":end_min})
-        # return the ID of the new availability slot or row so we can reference it later 
-        return int(self.db.query_one("select last_insert_rowid() as id")["id"])
+        """, {"user_id":user_id,"day_of_week":day_of_week,"start_min":start_min,"end_min":end_min}))
+        if self.match_index is not None:
+            self.match_index.on_add_availability(user_id, aid, day_of_week, start_min, end_min)
+        return aid
 
     def remove_availability(self, availability_id: int) -> None:
         self.db.execute("delete from availability where id = :id", {"id": availability_id})
+        if self.match_index is not None:
+            self.match_index.on_remove_availability(availability_id)
+
+    # replaces the given blocks of one user/day with new ones in a single transaction
+    # and keeps the match index in step. Returns the ids of the new blocks
+    def _replace_blocks(self, user_id: int, day_of_week: int, old_ids: List[int],
+                        new_blocks: List[tuple]) -> List[int]:
+        with self.db.transaction():
+            for aid in old_ids:
+                self.db.execute("delete from availability where id = :id", {"id": aid})
+            new_ids = [int(self.db.execute("""
+                insert into availability(user_id, day_of_week, start_min, end_min)
+                values(:u, :d, :s, :e)
+            """, {"u": user_id, "d": day_of_week, "s": s, "e": e})) for s, e in new_blocks]
+        if self.match_index is not None:
+            for aid in old_ids:
+                self.match_index.on_remove_availability(aid)
+            for aid, (s, e) in zip(new_ids, new_blocks):
+                self.match_index.on_add_availability(user_id, aid, day_of_week, s, e)
+        return new_ids
+
+    # The blocks are read inside the same transaction that replaces them, so a block
+    # another connection adds or removes in between can't be lost or resurrected
+    def _add_merged_availability(self, user_id: int, day_of_week: int, start_min: int, end_min: int) -> int:
+        with self.db.transaction():
+            # blocks that overlap or touch the new range (touching: one ends where the other starts)
+            rows = self.db.query_all("""
+                select id, start_min, end_min from availability
+                where user_id = :u and day_of_week = :d and start_min <= :e and end_min >= :s
+            """, {"u": user_id, "d": day_of_week, "s": start_min, "e": end_min})
+            merged = merge_intervals([(start_min, end_min)] + [(r["start_min"], r["end_min"]) for r in rows])
+            return self._replace_blocks(user_id, day_of_week, [r["id"] for r in rows], merged)[0]
+
+    # Removes a time range from a user's availability on one day, e.g. subtracting
+    # "Mon 14:00-15:00" from "Mon 13:00-16:00" leaves 13:00-14:00 and 15:00-16:00.
+    # Returns how many blocks were changed or removed
+    def subtract_availability(self, user_id: int, day_of_week: int, start_min: int, end_min: int) -> int:
+        with self.db.transaction():
+            rows = self.db.query_all("""
+                select id, start_min, end_min from availability
+                where user_id = :u and day_of_week = :d and start_min < :e and end_min > :s
+            """, {"u": user_id, "d": day_of_week, "s": start_min, "e": end_min})
+            if not rows:
+                return 0
+            left = [piece for r in rows
+                    for piece in subtract_interval((r["start_min"], r["end_min"]), (start_min, end_min))]
+            self._replace_blocks(user_id, day_of_week, [r["id"] for r in rows], left)
+        return len(rows)
+
+    # One-off clean up for data stored before normalize_availability: merges every
+    # user's (or one user's) overlapping and touching blocks per weekday.
+    # Returns how many rows were removed
+    def compact_availability(self, user_id: int | None = None) -> int:
+        with self.db.transaction():
+            if user_id is None:
+                rows = self.db.query_all("""
+                    select id, user_id, day_of_week, start_min, end_min from availability
+                    order by user_id, day_of_week, start_min
+                """)
+            else:
+                rows = self.db.query_all("""
+                    select id, user_id, day_of_week, start_min, end_min from availability
+                    where user_id = :u order by day_of_week, start_min
+                """, {"u": user_id})
+            groups: Dict[tuple, list] = {}
+            for r in rows:
+                groups.setdefault((r["user_id"], r["day_of_week"]), []).append(r)
+            deletes, inserts = [], []
+            for (uid, dow), blocks in groups.items():
+                merged = merge_intervals((r["start_min"], r["end_min"]) for r in blocks)
+                if len(merged) == len(blocks):
+                    continue
+                deletes.extend({"id": r["id"]} for r in blocks)
+                inserts.extend({"u": uid, "d": dow, "s": s, "e": e} for s, e in merged)
+            if not deletes:
+                return 0
+            self.db.executemany("delete from availability where id = :id", deletes)
+            self.db.executemany("""
+                insert into availability(user_id, day_of_week, start_min, end_min)
+                values(:u, :d, :s, :e)
+            """, inserts)
+        if self.match_index is not None:
+            self.match_index.reset()
+        return len(deletes) - len(inserts)
+
+    # -------- Bulk writes (term start loads, see bulk_ingest.py)
+    # Each *_many method takes an iterable of dicts using the same keys as the single
+    # row method, writes them with executemany in one transaction per batch_size rows
+    # and returns how many rows were written. If a batch hits a constraint error
+    # (e.g. an unknown user id) it is rolled back and retried row by row so only the
+    # bad rows are skipped; those are passed to on_reject(row, error) when given.
+    # Called inside a caller's transaction the batch and every retried row are
+    # savepoints, so a rejected batch or row leaves nothing behind either way.
+    def _write_many(self, statements: List[str], rows: Iterable[dict], batch_size: int,
+                    on_reject: Callable[[dict, Exception], None] | None) -> int:
+        written = 0
+        for chunk in _chunks(rows, batch_size):
+            try:
+                with self.db.transaction():
+                    for sql in statements:
+                        self.db.executemany(sql, chunk)
+                written += len(chunk)
+                continue
+            except sqlite3.IntegrityError:
+                pass
+            with self.db.transaction():
+                for row in chunk:
+                    try:
+                        # all statements of a row or none of them
+                        with self.db.transaction():
+                            for sql in statements:
+                                self.db.execute(sql, row)
+                        written += 1
+                    except sqlite3.IntegrityError as ex:
+                        if on_reject is not None:
+                            on_reject(row, ex)
+        # bulk loads bypass the per-row hooks, so let the index reload lazily
+        if self.match_index is not None and written:
+            self.match_index.reset()
+        if self.read_cache is not None and written:
+            self.read_cache.clear()
+        return written
+
+    # rows: {"name": ...} with an optional "id" to keep ids from the source system
+    def create_users_many(self, rows: Iterable[dict], batch_size: int = 1000,
+                          on_reject: Callable[[dict, Exception], None] | None = None) -> int:
+        return self._write_many(
+            ["insert into users(id, name) values(:id, :name)"],
+            ({"id": None, **r} for r in rows), batch_size, on_reject,
+        )
+
+    # rows: {"user_id", "course_code"} with an optional "title"
+    def enroll_course_many(self, rows: Iterable[dict], batch_size: int = 1000,
+                           on_reject: Callable[[dict, Exception], None] | None = None) -> int:
+        return self._write_many([
+            "insert or ignore into courses(code, title) values(:course_code, :title)",
+            "insert or ignore into enrollments(user_id, course_code) values(:user_id, :course_code)",
+        ], ({"title": None, **r} for r in rows), batch_size, on_reject)
+
+    # rows: {"user_id", "day_of_week", "start_min", "end_min"}; ranges are checked
+    # like add_availability and an invalid one is skipped and handed to on_reject
+    # (with a ValueError) like a row the database refused, so it doesn't abort the
+    # rest of the batch. With normalize_availability the loaded users' blocks are
+    # merged afterwards
+    def add_availability_many(self, rows: Iterable[dict], batch_size: int = 1000,
+                              on_reject: Callable[[dict, Exception], None] | None = None) -> int:
+        touched = set()
+        def checked(rows):
+            for r in rows:
+                if not (0 <= r["day_of_week"] <= 6) or not (0 <= r["start_min"] < r["end_min"] <= 1440):
+                    if on_reject is not None:
+                        on_reject(r, ValueError("invalid day/time range"))
+                    continue
+                touched.add(r["user_id"])
+                yield r
+        written = self._write_many(["""
+            insert into availability(user_id, day_of_week, start_min, end_min)
+            values(:user_id, :day_of_week, :start_min, :end_min)
+        """], checked(rows), batch_size, on_reject)
+        if self.normalize_availability:
+            for uid in touched:
+                self.compact_availability(uid)
+        return written
 
     # -------- Classmates 
     # This function uses the tables "users" and "enrollments" to find classmates
     def find_classmates(self, user_id: int, course_code: str) -> List[User]:
+        if self.read_cache is not None:
+            return list(self.read_cache.get(
+                ("find_classmates", user_id, course_code), self.read_cache.course_stamp(course_code),
+                lambda: tuple(self._classmates(self.db.query_all, user_id, course_code))))
+        return list(self._classmates(self.db.query_all, user_id, course_code))
+
+    def iter_classmates(self, user_id: int, course_code: str) -> Iterator[User]:
+        return self._classmates(self.db.query_iter, user_id, course_code)
+
+    def _classmates(self, fetch, user_id: int, course_code: str) -> Iterator[User]:
         # Selects classmate id and name from enrollment table for both user
         # Defined classmate as a user who is shares the same course code 
         # as the user who is currently looking (line 89). Exclude user with <> so 
         # They are not included in this select
-        rows = self.db.query_all("""
+        rows = fetch("""
             select users_classmate.id, users_classmate.name
             from enrollments as enrollments_for_me
             join enrollments as enrollments_for_classmate
@@ -94,17 +452,104 @@ class StudyBuddyService:
               and enrollments_for_classmate.user_id <> :u
             group by users_classmate.id, users_classmate.name
         """, {"u": user_id, "c": course_code})
-        # Create a list of users with their id and names as the classmates for that
+        # Create users with their id and names as the classmates for that
         # course code 
-        return [User(id=r["id"], name=r["name"]) for r in rows]
+        for r in rows:
+            yield User(id=r["id"], name=r["name"])
 
     # Suggest Matches
     # Parameters: user_id, course_code, min_minutes
     def suggest_matches(self, user_id: int, course_code: str, min_minutes: int = MIN_MATCH_MINUTES) -> List[MatchSuggestion]:
+        if self.match_index is not None:
+            return self.match_index.suggest_matches(user_id, course_code, min_minutes)
+        return list(self._suggestions(self.db.query_all, user_id, course_code, min_minutes))
+
+    def iter_suggest_matches(self, user_id: int, course_code: str,
+                             min_minutes: int = MIN_MATCH_MINUTES) -> Iterator[MatchSuggestion]:
+        if self.match_index is not None:
+            return iter(self.match_index.suggest_matches(user_id, course_code, min_minutes))
+        return self._suggestions(self.db.query_iter, user_id, course_code, min_minutes)
+
+    # Top-K partners: totals each classmate's overlap with me across the whole week and
+    # returns the best k, each with the per-day windows behind it. The windows are
+    # streamed grouped by partner into top_k_partners' k-sized heap. Neither query
+    # sorts for it: the live join's order by is its own group by (which dedupes the
+    # windows anyway), and course_overlaps has a (course, user, partner) index
+    def top_partners(self, user_id: int, course_code: str, k: int = 5,
+                     min_minutes: int = MIN_MATCH_MINUTES) -> List[PartnerRanking]:
+        if self.match_index is not None:
+            windows = sorted(self.match_index.suggest_matches(user_id, course_code, min_minutes),
+                             key=lambda m: m.partner_id)
+        else:
+            windows = self._suggestions(self.db.query_iter, user_id, course_code, min_minutes,
+                                        by_partner=True)
+        return top_k_partners(windows, k)
+
+    def _suggestions(self, fetch, user_id: int, course_code: str, min_minutes: int,
+                     by_partner: bool = False) -> Iterator[MatchSuggestion]:
+        if self.use_overlap_table:
+            return self._stored_matches(fetch, user_id, course_code, min_minutes, by_partner)
+        return self._matches(fetch, user_id, course_code, min_minutes, by_partner)
+
+    # Reads my suggestions from the course_overlaps table, which its triggers keep in
+    # step with availability and enrollments once enabled. This is one range of its
+    # primary key, already in suggest_matches order (by_partner: one range of
+    # idx_course_overlaps_user_partner instead)
+    def _stored_matches(self, fetch, user_id: int, course_code: str, min_minutes: int,
+                        by_partner: bool = False) -> Iterator[MatchSuggestion]:
+        rows = fetch("""
+            select partner_id, day_of_week, start_min as overlap_start_min,
+                   end_min as overlap_end_min, minutes
+            from course_overlaps
+            where course_code = :course and user_id = :me and minutes >= :min
+            order by {order}
+        """.format(order="partner_id, day_of_week, start_min" if by_partner
+                   else "minutes desc, day_of_week, start_min, partner_id"),
+        {"me": user_id, "course": course_code, "min": min_minutes})
+        for r in rows:
+            yield MatchSuggestion(
+                partner_id=r["partner_id"],
+                day_of_week=r["day_of_week"],
+                overlap_start_min=r["overlap_start_min"],
+                overlap_end_min=r["overlap_end_min"],
+                minutes=r["minutes"],
+            )
+
+    # Recomputes course_overlaps from scratch (after restoring a backup, or if
+    # check_overlaps finds drift) and enables it if it wasn't. Returns the number of
+    # rows stored
+    def rebuild_overlaps(self) -> int:
+        return enable_course_overlaps(self.db)
+
+    # Compares the stored overlaps with the live availability join (_matches) for
+    # every enrollment, or one course's. Returns the (user_id, course_code) pairs
+    # whose suggestions differ; empty means the table is consistent
+    def check_overlaps(self, course_code: str | None = None) -> List[Tuple[int, str]]:
+        if course_code is None:
+            rows = self.db.query_all("select user_id, course_code from enrollments order by course_code, user_id")
+        else:
+            rows = self.db.query_all(
+                "select user_id, course_code from enrollments where course_code = :c order by user_id",
+                {"c": course_code},
+            )
+        mismatched = []
+        for r in rows:
+            uid, code = r["user_id"], r["course_code"]
+            # min 1 minute: every stored window
+            if (list(self._matches(self.db.query_all, uid, code, 1))
+                    != list(self._stored_matches(self.db.query_all, uid, code, 1))):
+                mismatched.append((uid, code))
+        return mismatched
+
+    # The live SQL version: computes the overlaps from availability on every call.
+    # Used unless use_overlap_table is set, and the reference for check_overlaps.
+    # by_partner: rows in group by order (no second sort) instead of by minutes
+    def _matches(self, fetch, user_id: int, course_code: str, min_minutes: int,
+                 by_partner: bool = False) -> Iterator[MatchSuggestion]:
         # 1 step: Find my availability 2: Find classmates' availability 3: Find overlapping time slots
         # 4: Filter by min_minutes (30) this is a constant defined in app_config
         # (Re-use the same query structure as find_classmates)
-        rows = self.db.query_all("""
+        rows = fetch("""
             with my as (
                 select day_of_week, start_min, end_min
                 from availability where user_id = :me
@@ -136,17 +581,59 @@ class StudyBuddyService:
                 and classmates.start_min < my.end_min
             group by partner_id, classmates.day_of_week, overlap_start_min, overlap_end_min
             having minutes >= :min
-            order by minutes desc, classmates.day_of_week, overlap_start_min
-        """, {"me": user_id, "course": course_code, "min": min_minutes})
-        return [
-            MatchSuggestion(
+            order by {order}
+        """.format(order="partner_id, classmates.day_of_week, overlap_start_min, overlap_end_min" if by_partner
+                   else "minutes desc, classmates.day_of_week, overlap_start_min, partner_id"),
+        {"me": user_id, "course": course_code, "min": min_minutes})
+        for r in rows:
+            yield MatchSuggestion(
                 partner_id=r["partner_id"],
                 day_of_week=r["day_of_week"],
                 overlap_start_min=r["overlap_start_min"],
                 overlap_end_min=r["overlap_end_min"],
                 minutes=r["minutes"],
-            ) for r in rows
-        ]
+            )
+
+    # Batch version of suggest_matches for a whole course (nightly "who should study
+    # with whom" pass). Reads the course's availability once and returns
+    # {user_id: suggestions}; each list equals suggest_matches(user_id, course_code, min_minutes)
+    def match_course(self, course_code: str, min_minutes: int = MIN_MATCH_MINUTES) -> Dict[int, List[MatchSuggestion]]:
+        members = self.db.query_all(
+            "select user_id from enrollments where course_code = :c", {"c": course_code}
+        )
+        rows = self.db.query_all("""
+            select a.user_id, a.day_of_week, a.start_min, a.end_min
+            from enrollments e
+            join availability a on a.user_id = e.user_id
+            where e.course_code = :c
+        """, {"c": course_code})
+        return match_course_blocks(
+            (r["user_id"] for r in members),
+            ((r["user_id"], r["day_of_week"], r["start_min"], r["end_min"]) for r in rows),
+            min_minutes,
+        )
+
+    # Group study slots: windows of at least min_minutes where a whole group of
+    # classmates is free. Either give group_size (best groups of that size in the
+    # course, optionally only ones including user_id) or member_ids (windows where
+    # exactly those people are all free). Returns the longest `limit` windows
+    def find_group_slots(self, course_code: str, group_size: int | None = None,
+                         member_ids: List[int] | None = None, user_id: int | None = None,
+                         min_minutes: int = MIN_MATCH_MINUTES, limit: int = 10) -> List[GroupSlot]:
+        if (group_size is None) == (member_ids is None):
+            raise ValueError("give either group_size or member_ids")
+        rows = self.db.query_iter("""
+            select a.user_id, a.day_of_week, a.start_min, a.end_min
+            from enrollments e
+            join availability a on a.user_id = e.user_id
+            where e.course_code = :c
+        """, {"c": course_code})
+        blocks = ((r["user_id"], r["day_of_week"], r["start_min"], r["end_min"]) for r in rows)
+        if member_ids is not None:
+            wanted = set(member_ids)
+            blocks = (b for b in blocks if b[0] in wanted)
+            group_size = len(wanted)
+        return find_group_windows(blocks, group_size, min_minutes, limit, must_include=user_id)
 
     # -------- Sessions
     # This function creates a new study session request between 2 users
@@ -159,28 +646,112 @@ class StudyBuddyService:
     # end_min: the end time of the session in minutes since midnight
     def request_session(self, requester_id: int, invitee_id: int, course_code: str,
                         day_of_week: int, start_min: int, end_min: int) -> int:
-        #insert a row into the sessions table with status pending for a potential
-        # session with it's date and time 
-        self.db.execute("""
-            insert into sessions(course_code, day_of_week, start_min, end_min, status)
-            values(:c,:d,:s,:e,'pending')
-        """, {"c":course_code,"d":day_of_week,"s":start_min,"e":end_min})
-        # use the last_insert_rowid function that will grab the last successful
-        # row id from the insert and assign it to sid (session id)
-        sid = int(self.db.query_one("select last_insert_rowid() as id")["id"])
-        # insert a row into the session_participants table with the Requester user 
-        # if their response is accepted. Using same session_id
-        self.db.execute("""
-            insert into session_participants(session_id, user_id, role, response)
-            values(:sid,:u,'requester','accepted')
-        """, {"sid":sid,"u":requester_id})
-       # insert a row into the session_participants table with the Invitee user
-       # and their response is pending (awaiting confirmation)
-        self.db.execute("""
-            insert into session_participants(session_id, user_id, role, response)
-            values(:sid,:u,'invitee','pending')
-        """, {"sid":sid,"u":invitee_id})
+        return self.request_group_session(requester_id, [invitee_id], course_code,
+                                          day_of_week, start_min, end_min)
+
+    # Same as request_session but with any number of invitees (study groups). The
+    # session is confirmed by respond_session once every participant has accepted
+    def request_group_session(self, requester_id: int, invitee_ids: List[int], course_code: str,
+                              day_of_week: int, start_min: int, end_min: int) -> int:
+        invitees = list(dict.fromkeys(invitee_ids))  # drop repeats, keep order
+        if not invitees or requester_id in invitees:
+            raise ValueError("invite at least one other user")
+        # all inserts happen in one transaction so a session can never be
+        # left without its participants
+        with self.db.transaction():
+            # nobody may be double-booked (raises SessionConflictError)
+            self._check_conflicts([requester_id] + invitees, day_of_week, start_min, end_min)
+            #insert a row into the sessions table with status pending for a potential
+            # session with it's date and time. execute returns the new row id which
+            # we assign to sid (session id)
+            sid = int(self.db.execute("""
+                insert into sessions(course_code, day_of_week, start_min, end_min, status)
+                values(:c,:d,:s,:e,'pending')
+            """, {"c":course_code,"d":day_of_week,"s":start_min,"e":end_min}))
+            # insert a row into the session_participants table with the Requester user 
+            # if their response is accepted. Using same session_id
+            self.db.execute("""
+                insert into session_participants(session_id, user_id, role, response)
+                values(:sid,:u,'requester','accepted')
+            """, {"sid":sid,"u":requester_id})
+           # insert a row into the session_participants table for every Invitee
+           # and their response is pending (awaiting confirmation)
+            self.db.executemany("""
+                insert into session_participants(session_id, user_id, role, response)
+                values(:sid,:u,'invitee','pending')
+            """, [{"sid":sid,"u":u} for u in invitees])
         return sid
+
+    # Batch auto-scheduler: finds every (requester_id, invitee_id) pair a slot of
+    # duration_min minutes inside both users' availability that clashes neither with
+    # their confirmed sessions nor with the other sessions of the batch (greedy, see
+    # matching.assign_pair_slots). The sessions are created pending, exactly as
+    # request_session would create them, all in one transaction. Both users of a pair
+    # must be enrolled in course_code. Pairs that aren't or don't fit come back in
+    # result.unplaced with the reason
+    def schedule_sessions(self, course_code: str, pairs: Iterable[Tuple[int, int]],
+                          duration_min: int = MIN_MATCH_MINUTES) -> ScheduleResult:
+        if duration_min <= 0:
+            raise ValueError("duration_min must be positive")
+        pairs = [(int(a), int(b)) for a, b in pairs]
+        user_ids = sorted({uid for pair in pairs for uid in pair})
+        with self.db.transaction():
+            # enrollments primary key (user_id, course_code)
+            enrolled = set()
+            for chunk in _chunks(user_ids, 500):
+                params = {f"u{i}": uid for i, uid in enumerate(chunk)}
+                marks = ", ".join(f":{name}" for name in params)
+                enrolled.update(r["user_id"] for r in self.db.query_all(f"""
+                    select user_id from enrollments
+                    where user_id in ({marks}) and course_code = :c
+                """, {**params, "c": course_code}))
+            unplaced, eligible = [], []
+            for i, (a, b) in enumerate(pairs):
+                outside = [uid for uid in dict.fromkeys((a, b)) if uid not in enrolled]
+                if outside:
+                    names = " and ".join(f"user {uid}" for uid in outside)
+                    unplaced.append((i, f"{names} not enrolled in {course_code}"))
+                else:
+                    eligible.append(i)
+            # read inside the transaction so nothing can be booked in between
+            blocks, busy = [], []
+            for chunk in _chunks(sorted(enrolled), 500):
+                params = {f"u{i}": uid for i, uid in enumerate(chunk)}
+                marks = ", ".join(f":{name}" for name in params)
+                blocks += self.db.query_all(f"""
+                    select user_id, day_of_week, start_min, end_min
+                    from availability
+                    where user_id in ({marks})
+                """, params)
+                busy += self.db.query_all(f"""
+                    select user_id, day_of_week, start_min, end_min
+                    from confirmed_bookings
+                    where user_id in ({marks})
+                """, params)
+            placed, not_fitting = assign_pair_slots([pairs[i] for i in eligible], blocks, busy, duration_min)
+            # back to positions in pairs
+            placed = [(eligible[j], dow, start, end) for j, dow, start, end in placed]
+            unplaced = sorted(unplaced + [(eligible[j], reason) for j, reason in not_fitting])
+            sessions, participants = [], []
+            for i, dow, start, end in placed:
+                sid = int(self.db.execute("""
+                    insert into sessions(course_code, day_of_week, start_min, end_min, status)
+                    values(:c,:d,:s,:e,'pending')
+                """, {"c": course_code, "d": dow, "s": start, "e": end}))
+                participants.append({"sid": sid, "u": pairs[i][0], "role": "requester", "r": "accepted"})
+                participants.append({"sid": sid, "u": pairs[i][1], "role": "invitee", "r": "pending"})
+                sessions.append(Session(id=sid, course_code=course_code, day_of_week=dow,
+                                        start_min=start, end_min=end, status=SessionStatus.pending))
+            if participants:
+                self.db.executemany("""
+                    insert into session_participants(session_id, user_id, role, response)
+                    values(:sid,:u,:role,:r)
+                """, participants)
+        return ScheduleResult(
+            sessions=sessions,
+            unplaced=[UnplacedPair(requester_id=pairs[i][0], invitee_id=pairs[i][1], reason=reason)
+                      for i, reason in unplaced],
+        )
 # This function handles the response to a session request
 # Parameters: session_id, user_id, accept
 # session_id: the ID of the session
@@ -191,30 +762,165 @@ class StudyBuddyService:
 # choice == 10 if statement from the menu. IF the accept == T, then the sessions
 # _participants table is updated accordingly with the user and user id
     def respond_session(self, session_id: int, user_id: int, accept: bool) -> None:
+        # the response and the resulting status change are committed together
+        with self.db.transaction():
+            self._respond(session_id, user_id, accept)
+
+    # Many replies in one transaction. rows: {"session_id", "user_id", "accept"}.
+    # Accepts that would double-book someone and replies to sessions that are no
+    # longer pending go to on_reject (with the SessionConflictError or
+    # SessionNotPendingError) and the rest are still applied. Returns replies applied
+    def respond_sessions(self, rows: Iterable[dict],
+                         on_reject: Callable[[dict, Exception], None] | None = None) -> int:
+        applied = 0
+        with self.db.transaction():
+            for row in rows:
+                try:
+                    self._respond(row["session_id"], row["user_id"], bool(row["accept"]))
+                except (SessionConflictError, SessionNotPendingError) as ex:
+                    if on_reject is not None:
+                        on_reject(row, ex)
+                    continue
+                applied += 1
+        return applied
+
+    # one reply, inside the caller's transaction. Only pending sessions take replies
+    # (a declined session, or one canceled because its requester was deleted, must
+    # not become confirmed). The checks run before anything is written, so a
+    # rejected reply leaves no trace, counters included
+    def _respond(self, session_id: int, user_id: int, accept: bool) -> None:
         new_resp = "accepted" if accept else "declined"
+        for session in self.db.query_all("select status from sessions where id = :sid", {"sid": session_id}):
+            if session["status"] != SessionStatus.pending.value:
+                raise SessionNotPendingError(session_id, session["status"])
+        if accept:
+            # accepting must not double-book any participant, including ones who
+            # got another confirmed session since the request was made
+            self._check_session_conflicts(session_id)
         self.db.execute("""
             update session_participants
             set response = :r
             where session_id = :sid and user_id = :u
         """, {"r": new_resp, "sid": session_id, "u": user_id})
         if not accept:
-            self.db.execute("update sessions set status='declined' where id=:sid", {"sid": session_id})
+            self.db.execute("update sessions set status='declined' where id=:sid and status='pending'",
+                            {"sid": session_id})
             return
-        # confirm if all accepted by counting all participants (count(*)) if 
-        # their response = 1 = accepted. Select '1' because we don't care about
-        # column name just if a row exists at all that meets the conditions. Then
-        # update the status to confirmed
+        # the schema triggers keep accepted_count / participant_count current, so
+        # "everyone accepted" is a compare on the session row itself (primary key
+        # lookup) no matter how many participants the session has
         self.db.execute("""
             update sessions
             set status = 'confirmed'
-            where id = :sid
-              and exists (
-                select 1 from session_participants
-                where session_id = :sid
-                group by session_id
-                having sum(case when response='accepted' then 1 else 0 end) = count(*)
-              )
+            where id = :sid and status = 'pending' and accepted_count = participant_count
         """, {"sid": session_id})
+
+    # -------- Double-booking checks
+    # For each user, their confirmed sessions on day_of_week that overlap start..end,
+    # read from confirmed_bookings (user, day, start). One user's confirmed bookings
+    # never overlap each other (that's what these checks enforce), so the only one
+    # starting before start_min that can reach into the range is the nearest one:
+    # each user costs two index seeks, however many sessions they have. Bookings
+    # that already overlapped (data from before the checks) are audit_session_conflicts'
+    # job. Returns {user_id: [session ids]} for users with a clash
+    def find_conflicts(self, user_ids: List[int], day_of_week: int, start_min: int, end_min: int,
+                       exclude_session_id: int | None = None) -> Dict[int, List[int]]:
+        conflicts: Dict[int, List[int]] = {}
+        for uid in user_ids:
+            # one range: from the nearest earlier booking's start up to end_min
+            rows = self.db.query_all("""
+                select session_id from confirmed_bookings
+                where user_id = :u and day_of_week = :d and start_min < :e and end_min > :s
+                  and session_id <> :skip
+                  and start_min >= coalesce((
+                      select start_min from confirmed_bookings
+                      where user_id = :u and day_of_week = :d and start_min < :s and session_id <> :skip
+                      order by start_min desc
+                      limit 1
+                  ), :s)
+            """, {"u": uid, "d": day_of_week, "s": start_min, "e": end_min,
+                  "skip": exclude_session_id if exclude_session_id is not None else -1})
+            ids = sorted(r["session_id"] for r in rows)
+            if ids:
+                conflicts[uid] = ids
+        return conflicts
+
+    def _check_conflicts(self, user_ids: List[int], day_of_week: int, start_min: int, end_min: int,
+                         exclude_session_id: int | None = None) -> None:
+        conflicts = self.find_conflicts(user_ids, day_of_week, start_min, end_min, exclude_session_id)
+        if conflicts:
+            raise SessionConflictError(conflicts)
+
+    # every participant of a session checked against its own time slot
+    def _check_session_conflicts(self, session_id: int) -> None:
+        rows = self.db.query_all("""
+            select p.user_id, s.day_of_week, s.start_min, s.end_min
+            from sessions s
+            join session_participants p on p.session_id = s.id
+            where s.id = :sid
+            order by p.user_id
+        """, {"sid": session_id})
+        if rows:
+            self._check_conflicts([r["user_id"] for r in rows], rows[0]["day_of_week"],
+                                  rows[0]["start_min"], rows[0]["end_min"], exclude_session_id=session_id)
+
+    # Report of existing double bookings: every pair of overlapping confirmed sessions
+    # that share a participant (e.g. data from before conflict checks existed)
+    def audit_session_conflicts(self) -> List[SessionConflict]:
+        rows = self.db.query_all("""
+            select a.user_id, a.session_id as first_id, b.session_id as second_id
+            from session_participants a
+            join session_participants b on b.user_id = a.user_id and b.session_id > a.session_id
+            join sessions sa on sa.id = a.session_id
+            join sessions sb on sb.id = b.session_id
+            where sa.status = 'confirmed' and sb.status = 'confirmed'
+              and sa.day_of_week = sb.day_of_week
+              and sa.start_min < sb.end_min and sb.start_min < sa.end_min
+            order by a.user_id, first_id, second_id
+        """)
+        return [SessionConflict(user_id=r["user_id"], session_id=r["first_id"], other_session_id=r["second_id"])
+                for r in rows]
+
+    # -------- Pending requests (inbox)
+    # Requests waiting on user_id: their own response is pending and so is the session
+    # (a group session someone else declined drops out). Oldest first. The rows come
+    # straight from the (user_id, response, session_id) index, so a page costs the same
+    # however many requests the user has been sent
+    def list_pending_requests_for_user(self, user_id: int) -> List[PendingRequest]:
+        return list(self._pending_requests(self.db.query_all, user_id))
+
+    def iter_pending_requests_for_user(self, user_id: int) -> Iterator[PendingRequest]:
+        return self._pending_requests(self.db.query_iter, user_id)
+
+    # cursor is the session id
+    def page_pending_requests_for_user(self, user_id: int, after: int | None = None,
+                                       limit: int = PAGE_SIZE) -> Page:
+        requests = list(self._pending_requests(self.db.query_all, user_id, after or 0, limit + 1))
+        return _page(requests, limit, lambda r: r.session_id)
+
+    # users.pending_count, kept current by the schema triggers (one primary key read)
+    def pending_count(self, user_id: int) -> int:
+        row = self.db.query_one("select pending_count from users where id = :u", {"u": user_id})
+        return row["pending_count"] if row is not None else 0
+
+    # limit -1 means no limit in sqlite
+    def _pending_requests(self, fetch, user_id: int, after: int = 0, limit: int = -1) -> Iterator[PendingRequest]:
+        rows = fetch("""
+            select s.id, s.course_code, s.day_of_week, s.start_min, s.end_min, r.user_id as requester_id
+            from session_participants sp
+            join sessions s on s.id = sp.session_id
+            join session_participants r on r.session_id = s.id and r.role = 'requester'
+            where sp.user_id = :u and sp.response = 'pending' and sp.session_id > :after
+              and s.status = 'pending'
+            order by sp.session_id
+            limit :n
+        """, {"u": user_id, "after": after, "n": limit})
+        for r in rows:
+            yield PendingRequest(
+                session_id=r["id"], course_code=r["course_code"], day_of_week=r["day_of_week"],
+                start_min=r["start_min"], end_min=r["end_min"], requester_id=r["requester_id"]
+            )
+
 # This function lists all confirmed sessions for a given user 
 # Parameters: user_id
 # Looks at all the sessions join on only sessions where 
@@ -222,16 +928,23 @@ class StudyBuddyService:
 # orders sessions by day_of_week and start_min
 # returns a 'dictionary' mapping session IDs to session details. 
 # For loop: builds a session object for each row and creates a list of those
-# akak List[Session]
+# akak List[Session] (iter_confirmed_sessions_for_user yields them one by one)
     def list_confirmed_sessions_for_user(self, user_id: int) -> List[Session]:
-        rows = self.db.query_all("""
+        return list(self._confirmed_sessions(self.db.query_all, user_id))
+
+    def iter_confirmed_sessions_for_user(self, user_id: int) -> Iterator[Session]:
+        return self._confirmed_sessions(self.db.query_iter, user_id)
+
+    def _confirmed_sessions(self, fetch, user_id: int) -> Iterator[Session]:
+        rows = fetch("""
             select s.id, s.course_code, s.day_of_week, s.start_min, s.end_min, s.status
             from sessions s
             join session_participants sp on sp.session_id = s.id
             where sp.user_id = :u and s.status = 'confirmed'
             order by s.day_of_week, s.start_min
         """, {"u": user_id})
-        return [Session(
-            id=r["id"], course_code=r["course_code"], day_of_week=r["day_of_week"],
-            start_min=r["start_min"], end_min=r["end_min"], status=SessionStatus(r["status"])
-        ) for r in rows]
\ No newline at end of file
+        for r in rows:
+            yield Session(
+                id=r["id"], course_code=r["course_code"], day_of_week=r["day_of_week"],
+                start_min=r["start_min"], end_min=r["end_min"], status=SessionStatus(r["status"])
+            )
\ No newline at end of file
@@ -0,0 +1,98 @@
+import random
+from dataclasses import dataclass
+from typing import Iterator, List
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.domain.errors import SessionConflictError
+
+# Seeded generator for realistic StudyBuddy databases, used by the benchmarks and
+# load tests. The same config + seed always produces the same database.
+# - course popularity is skewed (a few big intro courses, a long tail of small ones)
+# - availability blocks are mostly on weekdays between 08:00 and 22:00, 30 min to
+#   3 h long, on 15 minute boundaries like people actually type them
+# - some students already have confirmed sessions with a classmate (never double-booked)
+# Everything is written through the service's *_many bulk methods.
+
+DEPARTMENTS = ["CPSC", "MATH", "BIO", "CHEM", "PHYS", "ENGL", "HIST", "ECON", "PSYC", "STAT"]
+
+@dataclass
+class SyntheticConfig:
+    users: int = 1000
+    courses: int = 40
+    enrollments_per_user: int = 4
+    blocks_per_user: int = 6
+    sessions_per_user: float = 0.5   # average confirmed sessions requested per student
+    seed: int = 42
+
+@dataclass
+class SyntheticSummary:
+    user_ids: List[int]
+    course_codes: List[str]
+    enrollments: int
+    blocks: int
+    sessions: int
+
+def course_codes(count: int, rng: random.Random) -> List[str]:
+    codes = set()
+    while len(codes) < count:
+        codes.add(f"{rng.choice(DEPARTMENTS)}-{rng.randrange(1000, 5000)}")
+    return sorted(codes)
+
+def random_block(rng: random.Random):
+    dow = rng.choices(range(7), weights=[5, 5, 5, 5, 4, 1, 1])[0]
+    start = rng.randrange(8 * 60, 21 * 60, 15)
+    end = min(22 * 60, start + rng.randrange(30, 181, 15))
+    return dow, start, end
+
+def generate(svc: StudyBuddyService, config: SyntheticConfig) -> SyntheticSummary:
+    rng = random.Random(config.seed)
+    first_id = svc.db.query_one("select coalesce(max(id), 0) + 1 as id from users")["id"]
+    user_ids = list(range(first_id, first_id + config.users))
+    codes = course_codes(config.courses, rng)
+    # zipf-like popularity: course i is picked with weight 1 / (i + 1)
+    weights = [1 / (i + 1) for i in range(len(codes))]
+
+    svc.create_users_many({"id": uid, "name": f"Student {uid}"} for uid in user_ids)
+
+    enrolled = {}
+    def enrollment_rows() -> Iterator[dict]:
+        for uid in user_ids:
+            picked = set()
+            for _ in range(min(config.enrollments_per_user, len(codes))):
+                code = rng.choices(codes, weights=weights)[0]
+                while code in picked:
+                    code = rng.choice(codes)
+                picked.add(code)
+                yield {"user_id": uid, "course_code": code}
+            enrolled[uid] = sorted(picked)
+    enrollments = svc.enroll_course_many(enrollment_rows())
+
+    def block_rows() -> Iterator[dict]:
+        for uid in user_ids:
+            for _ in range(config.blocks_per_user):
+                dow, start, end = random_block(rng)
+                yield {"user_id": uid, "day_of_week": dow, "start_min": start, "end_min": end}
+    blocks = svc.add_availability_many(block_rows())
+
+    # confirmed sessions between random classmates, all in one transaction
+    members = {}
+    for uid, courses in enrolled.items():
+        for code in courses:
+            members.setdefault(code, []).append(uid)
+    sessions = 0
+    with svc.db.transaction():
+        for _ in range(int(config.users * config.sessions_per_user)):
+            requester = rng.choice(user_ids)
+            if not enrolled[requester]:
+                continue
+            code = rng.choice(enrolled[requester])
+            invitee = rng.choice(members[code])
+            if invitee == requester:
+                continue
+            dow, start, end = random_block(rng)
+            try:
+                sid = svc.request_session(requester, invitee, code, dow, start, min(end, start + 90))
+            except SessionConflictError:
+                continue   # one of them is already booked then
+            svc.respond_session(sid, invitee, True)
+            sessions += 1
+    return SyntheticSummary(user_ids, codes, enrollments, blocks, sessions)
@@ -0,0 +1,121 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from functools import wraps
+from typing import Dict
+
+# Optional query instrumentation for Storage (see Storage.enable_stats).
+# While enabled, Storage times every statement it runs and reports it here:
+# - per-statement latency histograms and row counts, keyed by the SQL text
+# - per-service-method latency histograms (instrument_service)
+# - number of commits, counted from sqlite's trace callback, so implicit commits
+#   are included too
+# - a slow-query log of statements above slow_query_ms, with their bound parameters
+# When stats are off Storage skips all of this after a single "is None" check.
+
+# upper bounds of the histogram buckets in milliseconds (the last one catches the rest)
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+class LatencyHistogram:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, ms: float, rows: int = 0) -> None:
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows
+        self.buckets[bisect_left(BUCKETS_MS, ms)] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "rows": self.rows,
+            "buckets": {f"<={b:g}ms" if b != float("inf") else "slower": n
+                        for b, n in zip(BUCKETS_MS, self.buckets) if n},
+        }
+
+class QueryStats:
+    """Collects timings from Storage (and optionally the service); thread safe."""
+    def __init__(self, slow_query_ms: float = 100.0, slow_log_size: int = 100):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_size = slow_log_size
+        self._lock = threading.Lock()
+        self._local = threading.local()   # last expanded statement per thread
+        self._sql_keys: Dict[str, str] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements: Dict[str, LatencyHistogram] = {}
+            self.methods: Dict[str, LatencyHistogram] = {}
+            self.commits = 0
+            self.slow_log = deque(maxlen=self.slow_log_size)
+
+    # sqlite3 trace callback: gets every statement with its parameters filled in
+    def trace(self, expanded_sql: str) -> None:
+        self._local.last = expanded_sql
+        if expanded_sql.startswith("COMMIT"):
+            with self._lock:
+                self.commits += 1
+
+    def _key(self, sql: str) -> str:
+        key = self._sql_keys.get(sql)
+        if key is None:
+            key = self._sql_keys[sql] = " ".join(sql.split())
+        return key
+
+    def record_statement(self, sql: str, params, seconds: float, rows: int) -> None:
+        ms = seconds * 1000
+        key = self._key(sql)
+        with self._lock:
+            self.statements.setdefault(key, LatencyHistogram()).add(ms, rows)
+            if ms >= self.slow_query_ms:
+                self.slow_log.append({
+                    "sql": key,
+                    "params": dict(params) if isinstance(params, dict) else params,
+                    "expanded": getattr(self._local, "last", None),
+                    "ms": round(ms, 3),
+                    "at": time.time(),
+                })
+
+    def record_method(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.methods.setdefault(name, LatencyHistogram()).add(seconds * 1000)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "commits": self.commits,
+                "statements": {sql: h.snapshot() for sql, h in self.statements.items()},
+                "methods": {name: h.snapshot() for name, h in self.methods.items()},
+                "slow_queries": list(self.slow_log),
+            }
+
+# Wraps every public method of a service instance so its latency is recorded under
+# its name. Only the given instance changes; the class stays untouched.
+def instrument_service(svc, stats: QueryStats) -> None:
+    for name in dir(type(svc)):
+        if name.startswith("_"):
+            continue
+        method = getattr(svc, name)
+        if callable(method):
+            setattr(svc, name, _timed(name, method, stats))
+
+def _timed(name: str, method, stats: QueryStats):
+    @wraps(method)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.record_method(name, time.perf_counter() - start)
+    return timed
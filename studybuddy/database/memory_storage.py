@@ -0,0 +1,173 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from studybuddy.database.sql_storage import Storage
+
+# Storage that serves everything from an in-memory copy of the database file
+# (STUDYBUDDY_STORAGE_MODE=memory, see app_configs.py), for read heavy stretches like
+# the start of term. Nothing on the request path touches the disk:
+# - at startup the file is copied into ":memory:" with sqlite's backup API
+# - snapshot() copies the database back into "<file>.snapshot" a few hundred pages at
+#   a time and then swaps it in with os.replace. A crash in the middle leaves the old
+#   file as it was; at worst a stale .snapshot file is left behind (and overwritten
+#   by the next snapshot)
+# - start_snapshots(seconds) takes a snapshot from a background thread every few
+#   seconds (skipped if nothing changed); close() stops it and takes a last one
+# Whatever was written since the last snapshot is lost if the process dies, so the
+# interval is how much you are willing to lose. The file belongs to this process while
+# it runs: changes made by anyone else are overwritten by the next snapshot.
+#
+# The snapshot thread shares the connection with the request thread. Writes hold
+# _lock, and so does each backup step, so a snapshot never contains half of a
+# transaction; between steps the lock is let go so writes carry on. sqlite starts the
+# copy over whenever an in-memory database is written to mid-backup, so after
+# SNAPSHOT_MAX_RESTARTS restarts the rest is copied without letting go of the lock
+# (writes then wait for one straight copy, a few ms per MB). Reads don't take the lock.
+
+SNAPSHOT_PAGES = 256       # pages copied per backup step (1 MB with 4 KB pages)
+SNAPSHOT_PAUSE_S = 0.001   # pause between steps so waiting writes get the lock
+SNAPSHOT_MAX_RESTARTS = 3
+
+class MemoryStorage(Storage):
+    """Storage on an in-memory copy of db_path, written back with snapshot()."""
+    def __init__(self, db_path: Path, stats=None, profile=None,
+                 snapshot_pages: int = SNAPSHOT_PAGES, snapshot_pause_s: float = SNAPSHOT_PAUSE_S):
+        if str(db_path) == ":memory:":
+            raise ValueError("MemoryStorage needs a database file to load from and snapshot to")
+        self.db_path = Path(db_path).resolve()
+        self.snapshot_pages = snapshot_pages
+        self.snapshot_pause_s = snapshot_pause_s
+        self._lock = threading.RLock()
+        self._snapshot_lock = threading.Lock()   # one snapshot at a time
+        self._scheduler = None
+        super().__init__(self.db_path, stats=stats, profile=profile)
+        # changes already on disk (total_changes counts every row written on conn)
+        self._saved_changes = self.conn.total_changes
+
+    # warm load: the whole file is copied into memory before the first request
+    def _open(self, db_path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(":memory:", check_same_thread=False,
+                               cached_statements=self.profile.cached_statements)
+        if db_path.exists():
+            disk = sqlite3.connect(str(db_path))
+            try:
+                # a WAL left next to the file would be replayed on top of our snapshots,
+                # so fold it into the file first
+                disk.execute("pragma journal_mode = delete")
+                # an in-memory target can't change its page size during the copy
+                conn.execute(f"pragma page_size = {disk.execute('pragma page_size').fetchone()[0]}")
+                disk.backup(conn)
+            finally:
+                disk.close()
+        return conn
+
+    # Copies the database to disk. Returns False if nothing changed since the last one
+    def snapshot(self) -> bool:
+        with self._snapshot_lock:
+            if self.conn.total_changes == self._saved_changes and self.db_path.exists():
+                return False
+            tmp = self.db_path.with_name(self.db_path.name + ".snapshot")
+            tmp.unlink(missing_ok=True)
+            target = sqlite3.connect(str(tmp))
+            try:
+                # synchronous=full: the copy is on disk before it replaces anything
+                target.execute("pragma synchronous = full")
+                self._remaining, self._restarts = None, 0
+                with self._lock:
+                    self.conn.backup(target, pages=self.snapshot_pages, progress=self._between_steps)
+                    saved = self.conn.total_changes
+            finally:
+                target.close()
+            os.replace(tmp, self.db_path)
+            _fsync_dir(self.db_path.parent)
+            self._saved_changes = saved
+            return True
+
+    # called by backup() after every step, with _lock held
+    def _between_steps(self, status, remaining, total) -> None:
+        if self._remaining is not None and remaining > self._remaining:
+            self._restarts += 1
+        self._remaining = remaining
+        if remaining and self._restarts < SNAPSHOT_MAX_RESTARTS:
+            self._lock.release()
+            try:
+                time.sleep(self.snapshot_pause_s)
+            finally:
+                self._lock.acquire()
+
+    def start_snapshots(self, interval_s: float) -> "SnapshotScheduler":
+        if self._scheduler is None:
+            self._scheduler = SnapshotScheduler(self, interval_s)
+            self._scheduler.start()
+        return self._scheduler
+
+    def stop_snapshots(self) -> None:
+        if self._scheduler is not None:
+            self._scheduler.stop()
+            self._scheduler = None
+
+    # -------- writes hold _lock so they never land in the middle of a backup step
+    def execute_script(self, sql_text: str) -> None:
+        with self._lock:
+            super().execute_script(sql_text)
+
+    def execute(self, sql: str, params: dict = {}) -> int:
+        with self._lock:
+            return super().execute(sql, params)
+
+    def executemany(self, sql: str, rows) -> int:
+        with self._lock:
+            return super().executemany(sql, rows)
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            with super().transaction():
+                yield self
+
+    # shutdown: last snapshot, then the in-memory database goes away
+    def close(self) -> None:
+        self.stop_snapshots()
+        try:
+            self.snapshot()
+        finally:
+            self.conn.close()
+
+# Background thread behind MemoryStorage.start_snapshots(). A failed snapshot
+# (disk full, ...) is reported on stderr and retried at the next interval; serving
+# carries on from memory either way
+class SnapshotScheduler(threading.Thread):
+    def __init__(self, storage: MemoryStorage, interval_s: float):
+        super().__init__(name="studybuddy-snapshots", daemon=True)
+        self.storage = storage
+        self.interval_s = interval_s
+        self.snapshots = 0
+        self.last_error = None
+        self._stopping = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopping.wait(self.interval_s):
+            try:
+                if self.storage.snapshot():
+                    self.snapshots += 1
+            except (sqlite3.Error, OSError) as ex:
+                self.last_error = ex
+                print(f"snapshot of {self.storage.db_path} failed: {ex}", file=sys.stderr)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self.join()
+
+# makes the rename itself durable (POSIX only; Windows has no directory handles)
+def _fsync_dir(path: Path) -> None:
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
@@ -0,0 +1,364 @@
+from pathlib import Path
+from typing import List
+from studybuddy.database.sql_storage import Storage
+
+# Upgrades for databases created by an older schema.sql. The schema script only
+# uses "create ... if not exists", which can't add columns to a table that is
+# already there or fill a new table from existing data, so those steps live here.
+# Run after the schema script. PRAGMA user_version records the last step applied,
+# so each step runs once per database (steps also check first, because a brand
+# new database already has everything the schema script creates).
+#
+# ensure_schema() only runs the schema script when user_version is behind
+# SCHEMA_VERSION, so an up to date database costs a single pragma read at start.
+# Any change to schema.sql therefore needs a new step here (it may do nothing)
+# so existing databases pick it up.
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "schema.sql"
+
+# both directions of every classmate overlap; fills course_overlaps when it is
+# enabled (see enable_course_overlaps below)
+REBUILD_OVERLAPS_SQL = """
+    insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+    select me.course_code, me.user_id, them.user_id, mine.day_of_week,
+           max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+           min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+    from enrollments me
+    join availability mine on mine.user_id = me.user_id
+    join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+    join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+     and theirs.start_min < mine.end_min and mine.start_min < theirs.end_min
+"""
+
+# -------- course_overlaps (opt-in)
+# The triggers that keep course_overlaps current. They are not in schema.sql: on a
+# campus sized database the table holds millions of rows and every availability or
+# enrollment write fans out to all of the user's classmates, so a database only gets
+# them once enable_course_overlaps() runs (StudyBuddyService(use_overlap_table=True)
+# or rebuild_overlaps). Inserts, updates and deletes of availability and enrollments
+# are all covered, so writes that bypass the service keep the table current too.
+# Each change only touches the rows of the user whose availability or enrollment
+# changed (both directions). SQLite triggers can't use
+# CTEs, so every trigger spells out the overlap join for "my rows" and for the
+# mirrored "partner rows".
+OVERLAP_TRIGGERS = {
+    # new block: its overlaps with classmates in every course I take
+    "trg_availability_overlaps_insert": """
+        create trigger if not exists trg_availability_overlaps_insert
+        after insert on availability
+        begin
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, me.user_id, them.user_id, new.day_of_week,
+                 max(new.start_min, theirs.start_min), min(new.end_min, theirs.end_min),
+                 min(new.end_min, theirs.end_min) - max(new.start_min, theirs.start_min)
+          from enrollments me
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = new.day_of_week
+           and theirs.start_min < new.end_min and new.start_min < theirs.end_min
+          where me.user_id = new.user_id;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, them.user_id, me.user_id, new.day_of_week,
+                 max(new.start_min, theirs.start_min), min(new.end_min, theirs.end_min),
+                 min(new.end_min, theirs.end_min) - max(new.start_min, theirs.start_min)
+          from enrollments me
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = new.day_of_week
+           and theirs.start_min < new.end_min and new.start_min < theirs.end_min
+          where me.user_id = new.user_id;
+        end;
+    """,
+    # removed block: drops my windows that lie inside it, then puts back the ones my
+    # other blocks still produce (the same window can come from more than one block).
+    # Skipped for the delete_user cascade, where the enrollment trigger removes all
+    # of the user's rows anyway
+    "trg_availability_overlaps_delete": """
+        create trigger if not exists trg_availability_overlaps_delete
+        after delete on availability
+        when exists (select 1 from users where id = old.user_id)
+        begin
+          delete from course_overlaps
+          where course_code in (select course_code from enrollments where user_id = old.user_id)
+            and user_id = old.user_id and day_of_week = old.day_of_week
+            and start_min >= old.start_min and end_min <= old.end_min;
+
+          delete from course_overlaps
+          where course_code in (select course_code from enrollments where user_id = old.user_id)
+            and partner_id = old.user_id and day_of_week = old.day_of_week
+            and start_min >= old.start_min and end_min <= old.end_min;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, me.user_id, them.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from enrollments me
+          join availability mine on mine.user_id = me.user_id and mine.day_of_week = old.day_of_week
+           and mine.start_min < old.end_min and old.start_min < mine.end_min
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < min(mine.end_min, old.end_min) and max(mine.start_min, old.start_min) < theirs.end_min
+          where me.user_id = old.user_id
+            and max(mine.start_min, theirs.start_min) >= old.start_min
+            and min(mine.end_min, theirs.end_min) <= old.end_min;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, them.user_id, me.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from enrollments me
+          join availability mine on mine.user_id = me.user_id and mine.day_of_week = old.day_of_week
+           and mine.start_min < old.end_min and old.start_min < mine.end_min
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < min(mine.end_min, old.end_min) and max(mine.start_min, old.start_min) < theirs.end_min
+          where me.user_id = old.user_id
+            and max(mine.start_min, theirs.start_min) >= old.start_min
+            and min(mine.end_min, theirs.end_min) <= old.end_min;
+        end;
+    """,
+    # changed block (e.g. an edit by hand): the removed block's clean up for the old
+    # values, then the new block's windows
+    "trg_availability_overlaps_update": """
+        create trigger if not exists trg_availability_overlaps_update
+        after update of user_id, day_of_week, start_min, end_min on availability
+        begin
+          delete from course_overlaps
+          where course_code in (select course_code from enrollments where user_id = old.user_id)
+            and user_id = old.user_id and day_of_week = old.day_of_week
+            and start_min >= old.start_min and end_min <= old.end_min;
+
+          delete from course_overlaps
+          where course_code in (select course_code from enrollments where user_id = old.user_id)
+            and partner_id = old.user_id and day_of_week = old.day_of_week
+            and start_min >= old.start_min and end_min <= old.end_min;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, me.user_id, them.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from enrollments me
+          join availability mine on mine.user_id = me.user_id and mine.day_of_week = old.day_of_week
+           and mine.start_min < old.end_min and old.start_min < mine.end_min
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < min(mine.end_min, old.end_min) and max(mine.start_min, old.start_min) < theirs.end_min
+          where me.user_id = old.user_id
+            and max(mine.start_min, theirs.start_min) >= old.start_min
+            and min(mine.end_min, theirs.end_min) <= old.end_min;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, them.user_id, me.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from enrollments me
+          join availability mine on mine.user_id = me.user_id and mine.day_of_week = old.day_of_week
+           and mine.start_min < old.end_min and old.start_min < mine.end_min
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < min(mine.end_min, old.end_min) and max(mine.start_min, old.start_min) < theirs.end_min
+          where me.user_id = old.user_id
+            and max(mine.start_min, theirs.start_min) >= old.start_min
+            and min(mine.end_min, theirs.end_min) <= old.end_min;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, me.user_id, them.user_id, new.day_of_week,
+                 max(new.start_min, theirs.start_min), min(new.end_min, theirs.end_min),
+                 min(new.end_min, theirs.end_min) - max(new.start_min, theirs.start_min)
+          from enrollments me
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = new.day_of_week
+           and theirs.start_min < new.end_min and new.start_min < theirs.end_min
+          where me.user_id = new.user_id;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select me.course_code, them.user_id, me.user_id, new.day_of_week,
+                 max(new.start_min, theirs.start_min), min(new.end_min, theirs.end_min),
+                 min(new.end_min, theirs.end_min) - max(new.start_min, theirs.start_min)
+          from enrollments me
+          join enrollments them on them.course_code = me.course_code and them.user_id <> me.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = new.day_of_week
+           and theirs.start_min < new.end_min and new.start_min < theirs.end_min
+          where me.user_id = new.user_id;
+        end;
+    """,
+    # new enrollment: my overlaps with everyone already in the course
+    "trg_enrollments_overlaps_insert": """
+        create trigger if not exists trg_enrollments_overlaps_insert
+        after insert on enrollments
+        begin
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select new.course_code, new.user_id, them.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from availability mine
+          join enrollments them on them.course_code = new.course_code and them.user_id <> new.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < mine.end_min and mine.start_min < theirs.end_min
+          where mine.user_id = new.user_id;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select new.course_code, them.user_id, new.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from availability mine
+          join enrollments them on them.course_code = new.course_code and them.user_id <> new.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < mine.end_min and mine.start_min < theirs.end_min
+          where mine.user_id = new.user_id;
+        end;
+    """,
+    # dropped course (also runs for the delete_user cascade)
+    "trg_enrollments_overlaps_delete": """
+        create trigger if not exists trg_enrollments_overlaps_delete
+        after delete on enrollments
+        begin
+          delete from course_overlaps where course_code = old.course_code and user_id = old.user_id;
+          delete from course_overlaps where course_code = old.course_code and partner_id = old.user_id;
+        end;
+    """,
+    # changed enrollment: the old course's rows go, the new one's are added
+    "trg_enrollments_overlaps_update": """
+        create trigger if not exists trg_enrollments_overlaps_update
+        after update of user_id, course_code on enrollments
+        begin
+          delete from course_overlaps where course_code = old.course_code and user_id = old.user_id;
+          delete from course_overlaps where course_code = old.course_code and partner_id = old.user_id;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select new.course_code, new.user_id, them.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from availability mine
+          join enrollments them on them.course_code = new.course_code and them.user_id <> new.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < mine.end_min and mine.start_min < theirs.end_min
+          where mine.user_id = new.user_id;
+
+          insert or ignore into course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min, minutes)
+          select new.course_code, them.user_id, new.user_id, mine.day_of_week,
+                 max(mine.start_min, theirs.start_min), min(mine.end_min, theirs.end_min),
+                 min(mine.end_min, theirs.end_min) - max(mine.start_min, theirs.start_min)
+          from availability mine
+          join enrollments them on them.course_code = new.course_code and them.user_id <> new.user_id
+          join availability theirs on theirs.user_id = them.user_id and theirs.day_of_week = mine.day_of_week
+           and theirs.start_min < mine.end_min and mine.start_min < theirs.end_min
+          where mine.user_id = new.user_id;
+        end;
+    """,
+}
+
+# indexes only the enabled table needs
+OVERLAP_INDEXES = {
+    # one user's windows grouped by partner (top_partners), covering
+    "idx_course_overlaps_user_partner": """
+        create index if not exists idx_course_overlaps_user_partner
+          on course_overlaps(course_code, user_id, partner_id, day_of_week, start_min, end_min)
+    """,
+}
+
+def course_overlaps_enabled(db: Storage) -> bool:
+    names = [*OVERLAP_TRIGGERS, *OVERLAP_INDEXES]
+    return db.query_one("""
+        select count(*) as n from sqlite_master where type in ('trigger', 'index') and name in ({names})
+    """.format(names=", ".join(f"'{name}'" for name in names)))["n"] == len(names)
+
+# Adds the triggers and indexes (those still missing) and fills course_overlaps from
+# scratch, in one transaction so no write slips in between. Also the way to repair a
+# table that check_overlaps reports as drifted. Returns the number of rows stored
+def enable_course_overlaps(db: Storage) -> int:
+    with db.transaction():
+        for sql in OVERLAP_TRIGGERS.values():
+            db.execute(sql)
+        db.execute("delete from course_overlaps")
+        db.execute(REBUILD_OVERLAPS_SQL)
+        # built after the fill, which is cheaper than keeping it sorted row by row
+        for sql in OVERLAP_INDEXES.values():
+            db.execute(sql)
+    return db.query_one("select count(*) as n from course_overlaps")["n"]
+
+# Drops the triggers and indexes and empties the table; suggest_matches then uses
+# the live join
+def disable_course_overlaps(db: Storage) -> None:
+    with db.transaction():
+        for name in OVERLAP_TRIGGERS:
+            db.execute(f"drop trigger if exists {name}")
+        for name in OVERLAP_INDEXES:
+            db.execute(f"drop index if exists {name}")
+        db.execute("delete from course_overlaps")
+
+# sessions.participant_count / accepted_count
+def _session_counters(db: Storage) -> None:
+    existing = {r["name"] for r in db.query_all("pragma table_info(sessions)")}
+    if "participant_count" not in existing:
+        db.execute("alter table sessions add column participant_count integer not null default 0")
+        db.execute("""
+            update sessions set participant_count =
+              (select count(*) from session_participants where session_id = sessions.id)
+        """)
+    if "accepted_count" not in existing:
+        db.execute("alter table sessions add column accepted_count integer not null default 0")
+        db.execute("""
+            update sessions set accepted_count =
+              (select count(*) from session_participants
+               where session_id = sessions.id and response = 'accepted')
+        """)
+
+# users.pending_count (requests waiting on each user)
+def _pending_counts(db: Storage) -> None:
+    existing = {r["name"] for r in db.query_all("pragma table_info(users)")}
+    if "pending_count" not in existing:
+        db.execute("alter table users add column pending_count integer not null default 0")
+    # requests left behind by deleted requesters (see trg_pending_requester_delete)
+    db.execute("""
+        update sessions set status = 'canceled'
+        where status = 'pending'
+          and not exists (select 1 from session_participants
+                          where session_id = sessions.id and role = 'requester')
+    """)
+    db.execute("""
+        update users set pending_count =
+          (select count(*) from session_participants sp
+           join sessions s on s.id = sp.session_id
+           where sp.user_id = users.id and sp.response = 'pending' and s.status = 'pending')
+    """)
+
+# confirmed_bookings for sessions confirmed before the table existed
+def _confirmed_bookings(db: Storage) -> None:
+    db.execute("""
+        insert or ignore into confirmed_bookings(user_id, day_of_week, start_min, end_min, session_id)
+        select sp.user_id, s.day_of_week, s.start_min, s.end_min, s.id
+        from sessions s
+        join session_participants sp on sp.session_id = s.id
+        where s.status = 'confirmed'
+    """)
+
+# (user_version after the step, step)
+MIGRATIONS = [
+    (1, _session_counters),
+    (2, _pending_counts),
+    (3, _confirmed_bookings),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# applies the steps this database hasn't had yet; returns their names
+def upgrade(db: Storage) -> List[str]:
+    applied = []
+    with db.transaction():
+        current = db.query_one("pragma user_version")[0]
+        for version, step in MIGRATIONS:
+            if version <= current:
+                continue
+            step(db)
+            db.execute(f"pragma user_version = {version}")
+            applied.append(step.__name__.lstrip("_"))
+    return applied
+
+# Brings a database up to SCHEMA_VERSION: runs schema.sql and the missing steps,
+# or nothing at all if it is already current. Returns True if anything ran
+def ensure_schema(db: Storage, schema_path: Path = SCHEMA_PATH) -> bool:
+    if db.query_one("pragma user_version")[0] >= SCHEMA_VERSION:
+        return False
+    db.execute_script(Path(schema_path).read_text(encoding="utf-8"))
+    upgrade(db)
+    return True
@@ -0,0 +1,123 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from studybuddy.database.sql_storage import Storage
+from studybuddy.database.profiles import StorageProfile, apply_profile, get_profile
+
+# Storage that can be shared by many worker threads (e.g. one StudyBuddyService behind
+# a multi-threaded front end).
+# - the database runs in WAL mode, so readers never wait for a writer and vice versa
+# - every thread gets its own read-only connection for query_all / query_one
+#   (Storage's read methods go through _reader())
+# - all writes (execute, executemany, transaction) go through the single writer
+#   connection, one thread at a time
+# Inside transaction() the writing thread reads through the writer connection so it
+# sees its own uncommitted rows. The database has to be a file; ":memory:" can't be
+# shared between connections. (StudyBuddyService's use_match_index keeps its own
+# in-memory state and is not meant to be shared between threads.)
+
+class PooledStorage(Storage):
+    """Thread-safe Storage: WAL, per-thread read-only connections, one writer."""
+    def __init__(self, db_path: Path, profile: str | StorageProfile | None = None):
+        if str(db_path) == ":memory:":
+            raise ValueError("PooledStorage needs a database file, not :memory:")
+        if profile is None:
+            from studybuddy.app_configs import STORAGE_PROFILE
+            profile = STORAGE_PROFILE
+        self.profile = get_profile(profile)
+        self.db_path = Path(db_path).resolve()
+        # the writer is shared by all threads, access is serialized by _write_lock
+        self.conn = self._connect(self.db_path, check_same_thread=False,
+                                  cached_statements=self.profile.cached_statements)
+        self._tx_depth = 0
+        self.stats = None
+        # the profile's journal mode is ignored: readers need WAL
+        apply_profile(self.conn, self.profile, set_journal=False)
+        self.conn.execute("pragma journal_mode = wal")
+        self.conn.execute("pragma foreign_keys = on")
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+
+    @staticmethod
+    def _connect(target, **kwargs) -> sqlite3.Connection:
+        conn = sqlite3.connect(target, **kwargs)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # the calling thread's read connection (opened on first use)
+    def _reader(self) -> sqlite3.Connection:
+        if getattr(self._local, "writing", 0):
+            return self.conn
+        conn = getattr(self._local, "reader", None)
+        if conn is None:
+            conn = self._connect(self.db_path.as_uri() + "?mode=ro", uri=True, check_same_thread=False,
+                                 cached_statements=self.profile.cached_statements)
+            conn.execute("pragma query_only = on")
+            apply_profile(conn, self.profile, set_journal=False)
+            if self.stats is not None:
+                conn.set_trace_callback(self.stats.trace)
+            self._local.reader = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    def enable_stats(self, stats=None):
+        stats = super().enable_stats(stats)
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.set_trace_callback(stats.trace)
+        return stats
+
+    def disable_stats(self) -> None:
+        super().disable_stats()
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.set_trace_callback(None)
+
+    # -------- writes: single writer connection
+    # use_profile() only retunes the writer (bulk loads are writes) and keeps WAL.
+    # It holds the writer for the whole block, so another thread's open transaction
+    # makes it wait instead of tripping the inside-a-transaction check
+    @contextmanager
+    def use_profile(self, profile: str | StorageProfile):
+        with self._write_lock:
+            with super().use_profile(profile) as db:
+                yield db
+
+    def _apply_profile(self, profile: StorageProfile) -> None:
+        with self._write_lock:
+            apply_profile(self.conn, profile, set_journal=False)
+
+    def execute_script(self, sql_text: str) -> None:
+        with self._write_lock:
+            super().execute_script(sql_text)
+
+    def execute(self, sql: str, params: dict = {}) -> int:
+        with self._write_lock:
+            return super().execute(sql, params)
+
+    def executemany(self, sql: str, rows) -> int:
+        with self._write_lock:
+            return super().executemany(sql, rows)
+
+    # holds the writer for the whole block, other threads' writes wait until it commits
+    @contextmanager
+    def transaction(self):
+        with self._write_lock:
+            self._local.writing = getattr(self._local, "writing", 0) + 1
+            try:
+                with super().transaction():
+                    yield self
+            finally:
+                self._local.writing -= 1
+
+    def close(self) -> None:
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+        with self._write_lock:
+            self.conn.close()
@@ -0,0 +1,75 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict
+
+# Named SQLite settings for Storage. Pick one with STUDYBUDDY_PROFILE (see
+# app_configs.STORAGE_PROFILE), Storage(path, profile="balanced"), or temporarily
+# with `with db.use_profile("bulk-load"): ...` around a big load.
+#
+# durable    sqlite's stock settings: fsync on every commit, small cache. The default,
+#            so existing databases behave exactly as before. Keeps the journal mode
+#            the database already has (a new file gets the rollback journal)
+# balanced   WAL (readers don't block the writer, one fsync per checkpoint instead
+#            of per commit), bigger page cache, memory mapped reads. A crash can
+#            lose the last commits but never corrupts the file
+# bulk-load  no fsync at all and a large cache, for one-off imports. A power loss
+#            in the middle can corrupt a database in rollback-journal mode, so only
+#            use it around loads that can be redone. It keeps the journal mode the
+#            database already has
+#
+# journal_mode is stored in the database file; the other pragmas are per connection.
+# Changing it needs the database to itself for a moment; if another connection is
+# busy the database simply keeps its current mode.
+# The prepared statement cache is fixed when the connection is opened, so use_profile()
+# can't change it.
+
+@dataclass(frozen=True)
+class StorageProfile:
+    name: str
+    journal_mode: str | None   # None: keep whatever the database uses
+    synchronous: str
+    cache_size: int            # pages if positive, KiB if negative (sqlite convention)
+    mmap_size: int             # bytes, 0 = off
+    temp_store: str
+    cached_statements: int     # sqlite3.connect(cached_statements=...)
+
+PROFILES: Dict[str, StorageProfile] = {
+    "durable": StorageProfile("durable", None, "full", -2000, 0, "default", 128),
+    "balanced": StorageProfile("balanced", "wal", "normal", -16000, 64 * 1024 * 1024, "memory", 256),
+    "bulk-load": StorageProfile("bulk-load", None, "off", -131072, 256 * 1024 * 1024, "memory", 512),
+}
+
+def get_profile(profile: "str | StorageProfile") -> StorageProfile:
+    if isinstance(profile, StorageProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"unknown storage profile {profile!r}, expected one of {', '.join(PROFILES)}")
+
+# Applies a profile's pragmas to one open connection. set_journal is False for
+# connections that must not change the file's journal mode (read-only readers)
+def apply_profile(conn: sqlite3.Connection, profile: StorageProfile, set_journal: bool = True) -> None:
+    if set_journal and profile.journal_mode is not None:
+        try:
+            conn.execute(f"pragma journal_mode = {profile.journal_mode}")
+        except sqlite3.OperationalError:
+            pass   # "database is locked"
+    conn.execute(f"pragma synchronous = {profile.synchronous}")
+    conn.execute(f"pragma cache_size = {int(profile.cache_size)}")
+    conn.execute(f"pragma mmap_size = {int(profile.mmap_size)}")
+    conn.execute(f"pragma temp_store = {profile.temp_store}")
+
+# The current settings of a connection as a profile, so use_profile() can go back
+def current_settings(conn: sqlite3.Connection, cached_statements: int) -> StorageProfile:
+    synchronous = {0: "off", 1: "normal", 2: "full", 3: "extra"}
+    temp_store = {0: "default", 1: "file", 2: "memory"}
+    return StorageProfile(
+        name="(current)",
+        journal_mode=conn.execute("pragma journal_mode").fetchone()[0],
+        synchronous=synchronous[conn.execute("pragma synchronous").fetchone()[0]],
+        cache_size=conn.execute("pragma cache_size").fetchone()[0],
+        mmap_size=conn.execute("pragma mmap_size").fetchone()[0],
+        temp_store=temp_store[conn.execute("pragma temp_store").fetchone()[0]],
+        cached_statements=cached_statements,
+    )
@@ -1,28 +1,196 @@
+from __future__ import annotations
 import sqlite3
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING
+from studybuddy.database.profiles import StorageProfile, apply_profile, current_settings, get_profile
+if TYPE_CHECKING:
+    # only needed once stats are turned on, so it isn't imported at startup
+    from studybuddy.database.instrumentation import QueryStats
 # This class defines the interface for interacting with the SQLite database
 # It is a helper of sorts so that the StudyBuddy app doesn't ever directly call
 # sqlite3 functions so that the DB could be changed later on if necessary 
 
 class Storage:
     """Thin SQLite wrapper used by the service layer."""
-    def __init__(self, db_path: Path):
-        self.conn = sqlite3.connect(str(db_path))
+    def __init__(self, db_path: Path, stats: QueryStats | None = None,
+                 profile: str | StorageProfile | None = None):
+        if profile is None:
+            from studybuddy.app_configs import STORAGE_PROFILE
+            profile = STORAGE_PROFILE
+        self.profile = get_profile(profile)
+        self.conn = self._open(db_path)
         self.conn.row_factory = sqlite3.Row
+        apply_profile(self.conn, self.profile)
+        # per connection setting; schema.sql only turns it on for the connection
+        # that runs the script, which no longer happens on every start
+        self.conn.execute("pragma foreign_keys = on")
+        self._tx_depth = 0
+        self.stats = None
+        if stats is not None:
+            self.enable_stats(stats)
+
+# opens the connection everything runs on (MemoryStorage opens ":memory:" instead)
+    def _open(self, db_path: Path) -> sqlite3.Connection:
+        return sqlite3.connect(str(db_path), cached_statements=self.profile.cached_statements)
+
+# Turns on query timing (see instrumentation.py) and returns the stats object.
+# With stats off (the default) every call below only pays for one "is None" check
+    def enable_stats(self, stats: QueryStats | None = None) -> QueryStats:
+        if stats is None:
+            from studybuddy.database.instrumentation import QueryStats
+            stats = QueryStats()
+        self.stats = stats
+        self.conn.set_trace_callback(self.stats.trace)
+        return self.stats
+
+    def disable_stats(self) -> None:
+        self.stats = None
+        self.conn.set_trace_callback(None)
+
+# Switches to another profile (see profiles.py) for the duration of the block and
+# then restores the previous settings, e.g. around a bulk import:
+#     with db.use_profile("bulk-load"):
+#         ingest_file(...)
+# It has to be entered outside of transaction(): sqlite refuses to change
+# synchronous mid transaction, so the block would half apply. Nest it the other
+# way round (transaction() inside use_profile()) instead
+    @contextmanager
+    def use_profile(self, profile: str | StorageProfile):
+        if self._tx_depth:
+            raise RuntimeError("use_profile() can't be entered inside transaction(); "
+                               "open the transaction inside the use_profile() block")
+        profile = get_profile(profile)
+        previous, previous_settings = self.profile, current_settings(self.conn, self.profile.cached_statements)
+        self._apply_profile(profile)
+        self.profile = profile
+        try:
+            yield self
+        finally:
+            self._apply_profile(previous_settings)
+            self.profile = previous
+
+    def _apply_profile(self, profile: StorageProfile) -> None:
+        apply_profile(self.conn, profile)
+
+# connection used for reads (PooledStorage hands out one per thread)
+    def _reader(self) -> sqlite3.Connection:
+        return self.conn
 
     def execute_script(self, sql_text: str) -> None:
         self.conn.executescript(sql_text)
         self.conn.commit()
 
-    def execute(self, sql: str, params: dict = {}) -> None:
-        self.conn.execute(sql, params)
-        self.conn.commit()
+# Runs one write statement and returns the rowid of the inserted row (cursor.lastrowid)
+# so callers don't need a second "select last_insert_rowid()" round trip. Outside of
+# transaction() every statement is committed on its own
+    def execute(self, sql: str, params: dict = {}) -> int:
+        if self.stats is None:
+            cur = self.conn.execute(sql, params)
+        else:
+            start = time.perf_counter()
+            cur = self.conn.execute(sql, params)
+            self.stats.record_statement(sql, params, time.perf_counter() - start, cur.rowcount)
+        if not self._tx_depth:
+            self.conn.commit()
+        return cur.lastrowid
+
+# Runs the same write statement for every params dict in rows (one round trip into
+# sqlite for the whole batch). Returns the number of rows changed
+    def executemany(self, sql: str, rows) -> int:
+        if self.stats is None:
+            cur = self.conn.executemany(sql, rows)
+        else:
+            start = time.perf_counter()
+            cur = self.conn.executemany(sql, rows)
+            self.stats.record_statement(sql, {}, time.perf_counter() - start, cur.rowcount)
+        if not self._tx_depth:
+            self.conn.commit()
+        return cur.rowcount
+
+# Groups several statements into one transaction with a single commit, e.g.
+#     with db.transaction():
+#         db.execute(...)
+#         db.execute(...)
+# If anything inside raises, everything is rolled back. Nested transaction() blocks
+# run inside the outer one as a SAVEPOINT: if the inner block raises, only its own
+# statements are undone (the outer block decides what to do with the error), so
+# service methods can call each other freely.
+# The outer block starts with "begin immediate", taking the write lock up front:
+# most blocks read before they write (conflict checks, status reads), and a
+# deferred transaction that has to upgrade its read lock while another connection
+# writes fails at once with "database is locked" instead of waiting for the busy
+# timeout
+    @contextmanager
+    def transaction(self):
+        if self._tx_depth:
+            savepoint = f"sp_{self._tx_depth}"
+            self.conn.execute(f"savepoint {savepoint}")
+            self._tx_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.conn.execute(f"rollback to {savepoint}")
+                self.conn.execute(f"release {savepoint}")
+                raise
+            else:
+                self.conn.execute(f"release {savepoint}")
+            finally:
+                self._tx_depth -= 1
+            return
+        self.conn.execute("begin immediate")
+        self._tx_depth = 1
+        try:
+            yield self
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+        finally:
+            self._tx_depth = 0
+
 # Runs a SELECT query and fetches all rows at once. Returns a list of sqlite3.Row 
 # objects (behave like dicts)
     def query_all(self, sql: str, params: dict = {}):
-        cur = self.conn.execute(sql, params)
-        return cur.fetchall()
+        if self.stats is None:
+            return self._reader().execute(sql, params).fetchall()
+        start = time.perf_counter()
+        rows = self._reader().execute(sql, params).fetchall()
+        self.stats.record_statement(sql, params, time.perf_counter() - start, len(rows))
+        return rows
+# Runs a SELECT and yields its rows lazily, fetching chunk_size rows at a time, so
+# memory stays flat no matter how big the result is. Stats (if on) are recorded
+# when the iteration finishes and only count time spent inside sqlite
+    def query_iter(self, sql: str, params: dict = {}, chunk_size: int = 500):
+        if self.stats is None:
+            cur = self._reader().execute(sql, params)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+        start = time.perf_counter()
+        cur = self._reader().execute(sql, params)
+        spent, count = time.perf_counter() - start, 0
+        while True:
+            start = time.perf_counter()
+            rows = cur.fetchmany(chunk_size)
+            spent += time.perf_counter() - start
+            if not rows:
+                break
+            count += len(rows)
+            yield from rows
+        self.stats.record_statement(sql, params, spent, count)
  #Runs a SELECT and fetches only the first row
     def query_one(self, sql: str, params: dict = {}):
-        cur = self.conn.execute(sql, params)
-        return cur.fetchone()
\ No newline at end of file
+        if self.stats is None:
+            return self._reader().execute(sql, params).fetchone()
+        start = time.perf_counter()
+        row = self._reader().execute(sql, params).fetchone()
+        self.stats.record_statement(sql, params, time.perf_counter() - start, 0 if row is None else 1)
+        return row
+
+    def close(self) -> None:
+        self.conn.close()
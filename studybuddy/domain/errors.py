@@ -0,0 +1,22 @@
+from typing import Dict, List
+
+# Errors raised by the service layer. They subclass ValueError, like the other
+# "bad input" errors the service raises, so existing `except ValueError` handling
+# in the CLI keeps working.
+
+class SessionConflictError(ValueError):
+    """A participant already has a confirmed session overlapping the requested time."""
+    def __init__(self, conflicts: Dict[int, List[int]]):
+        # conflicts: user id -> ids of that user's clashing confirmed sessions
+        self.conflicts = conflicts
+        self.session_ids = sorted({sid for ids in conflicts.values() for sid in ids})
+        details = "; ".join(f"user {uid}: session {', '.join(map(str, ids))}"
+                            for uid, ids in sorted(conflicts.items()))
+        super().__init__(f"time clashes with confirmed sessions ({details})")
+
+class SessionNotPendingError(ValueError):
+    """The session was already confirmed, declined or canceled, so it takes no more replies."""
+    def __init__(self, session_id: int, status: str):
+        self.session_id = session_id
+        self.status = status
+        super().__init__(f"session {session_id} is {status}, not waiting for replies")
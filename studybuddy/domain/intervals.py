@@ -0,0 +1,39 @@
+from typing import Iterable, List, Tuple
+
+# Small helpers for half-open minute ranges [start, end) on one weekday, shared by
+# the availability and scheduling code in the service layer.
+
+Interval = Tuple[int, int]
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Merge overlapping and touching ranges: [(780, 840), (810, 900), (900, 960)] -> [(780, 960)]"""
+    merged: List[List[int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
+
+def subtract_interval(interval: Interval, cut: Interval) -> List[Interval]:
+    """What is left of interval after removing cut (zero, one or two pieces)."""
+    start, end = interval
+    pieces = []
+    if start < cut[0]:
+        pieces.append((start, min(end, cut[0])))
+    if end > cut[1]:
+        pieces.append((max(start, cut[1]), end))
+    return [(s, e) for s, e in pieces if s < e]
+
+def intersect_intervals(a: List[Interval], b: List[Interval]) -> List[Interval]:
+    """Common parts of two sorted lists of disjoint ranges (two-pointer sweep)."""
+    common, i, j = [], 0, 0
+    while i < len(a) and j < len(b):
+        start, end = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if start < end:
+            common.append((start, end))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return common
@@ -1,12 +1,15 @@
+from __future__ import annotations
 from dataclasses import dataclass
+from typing import Any, List
 from studybuddy.domain.domain_types import SessionStatus, ParticipantRole, ParticipantResponse
 
 # This file defines the data models used throughout the application using dataclasses
 # Each class represents one of the main functions ie User, Avail. Sesion, Session Particpant etc.
 # These are used to mirror the database schema (in schema.sql
 # encorporate the enums defined earlier 
-# 
-@dataclass
+# slots=True: no per-instance __dict__, so big result lists (classmates of a large
+# course, campus wide exports) take roughly half the memory
+@dataclass(slots=True)
 class User:
     #Represents a student in the system (row in users table)
     # Comes directly from the users table in the database
@@ -14,7 +17,7 @@ class User:
     id: int
     name: str
 
-@dataclass
+@dataclass(slots=True)
 class Availability:
     #Represents one weekly availability block for a user (row in availability table)
     # This comes directly from the availability table in the database
@@ -24,7 +27,7 @@ class Availability:
     start_min: int
     end_min: int
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     #Represents a proposed or confirmed study session (row in sessions table)
     # course_code links it to the relevant course, and status comes from the SessionStatus enum.
@@ -35,7 +38,7 @@ class Session:
     end_min: int
     status: SessionStatus
 
-@dataclass
+@dataclass(slots=True)
 class SessionParticipant:
     #Represents a user's role and response in a session (row in session_participants table)
     session_id: int
@@ -43,7 +46,7 @@ class SessionParticipant:
     role: ParticipantRole
     response: ParticipantResponse
 
-@dataclass
+@dataclass(slots=True)
 class MatchSuggestion:
     #Represents a suggested study partner and overlapping availability (computed, not stored)
     # this is a helper object for the suggestions 
@@ -51,4 +54,61 @@ class MatchSuggestion:
     day_of_week: int
     overlap_start_min: int
     overlap_end_min: int
-    minutes: int
\ No newline at end of file
+    minutes: int
+
+@dataclass(slots=True)
+class GroupSlot:
+    #A window where every member of a candidate study group is free (computed, not stored)
+    day_of_week: int
+    start_min: int
+    end_min: int
+    minutes: int
+    member_ids: List[int]
+
+@dataclass(slots=True)
+class PartnerRanking:
+    #One classmate ranked by how much time they share with a user in a course (computed)
+    # total_minutes counts shared time once even if windows overlap; windows are the
+    # per-day overlaps behind it, ordered like suggest_matches
+    partner_id: int
+    total_minutes: int
+    windows: List[MatchSuggestion]
+
+@dataclass(slots=True)
+class SessionConflict:
+    #Two confirmed sessions of the same user that overlap (computed, audit report)
+    user_id: int
+    session_id: int
+    other_session_id: int
+
+@dataclass(slots=True)
+class PendingRequest:
+    #A session request waiting on one user's answer (inbox entry, computed)
+    session_id: int
+    course_code: str
+    day_of_week: int
+    start_min: int
+    end_min: int
+    requester_id: int
+
+@dataclass(slots=True)
+class UnplacedPair:
+    #A pairing the batch scheduler couldn't fit anywhere (computed, not stored)
+    requester_id: int
+    invitee_id: int
+    reason: str
+
+@dataclass(slots=True)
+class ScheduleResult:
+    #Outcome of StudyBuddyService.schedule_sessions: the sessions it created (pending,
+    # like request_session, in the order the pairs were given) and the pairs left over
+    sessions: List[Session]
+    unplaced: List[UnplacedPair]
+
+@dataclass(slots=True)
+class Page:
+    #One page of a keyset-paginated listing (computed, not stored)
+    # next_cursor is passed back as after= to get the following page; None means
+    # this was the last page
+    items: List[Any]
+    next_cursor: Any = None
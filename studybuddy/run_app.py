@@ -1,19 +1,79 @@
-from pathlib import Path
-from studybuddy.app_configs import DB_PATH
-from studybuddy.database.sql_storage import Storage
-from studybuddy.application.services import StudyBuddyService
-from studybuddy.application.cli.menu import handle_choice
-
-def main():
-    # init db (first run creates tables)
-    db = Storage(DB_PATH)
-    schema_path = Path(__file__).resolve().parent / "schema.sql"
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema = f.read()
-    db.execute_script(schema)
-
-    svc = StudyBuddyService(db)
-    handle_choice(svc)
+import sys
+import time
+
+_started = time.perf_counter()
+
+# Startup is kept short because the CLI is launched from scripts a lot:
+# - the schema script only runs when the database's user_version is behind
+#   (see database/migrations.py ensure_schema)
+# - the service, menu and stats modules are imported inside main(), so the time
+#   they take shows up in the startup report and paths that don't need them skip it
+# STUDYBUDDY_STARTUP_TIMING=1 prints the time of each step before the first prompt.
+# With arguments (python -m studybuddy suggest --user 1 ...) the non-interactive
+# command mode in application/cli/commands.py runs instead of the menu.
+# STUDYBUDDY_STORAGE_MODE=memory runs the menu on MemoryStorage (in-memory copy of the
+# database, snapshotted back to the file).
+
+class StartupTimer:
+    def __init__(self, started: float):
+        self.started = self.last = started
+        self.steps = []
+
+    def mark(self, step: str) -> None:
+        now = time.perf_counter()
+        self.steps.append((step, now - self.last))
+        self.last = now
+
+    def report(self, out=None) -> None:
+        out = out or sys.stderr
+        for step, seconds in self.steps:
+            print(f"  {step:<22} {seconds * 1000:8.2f} ms", file=out)
+        print(f"  {'time to first prompt':<22} {(self.last - self.started) * 1000:8.2f} ms", file=out)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        from studybuddy.application.cli.commands import main as run_command
+        return run_command(argv)
+    timer = StartupTimer(_started)
+    from studybuddy.app_configs import (DB_PATH, STATS_ENABLED, SLOW_QUERY_MS, NORMALIZE_AVAILABILITY,
+                                        USE_OVERLAP_TABLE, STARTUP_TIMING, STORAGE_MODE, SNAPSHOT_SECONDS)
+    from studybuddy.database.sql_storage import Storage
+    from studybuddy.database.migrations import ensure_schema
+    timer.mark("config + storage import")
+
+    # init db (first run creates tables, later runs only check user_version)
+    if STORAGE_MODE == "memory":
+        from studybuddy.database.memory_storage import MemoryStorage
+        db = MemoryStorage(DB_PATH)
+        db.start_snapshots(SNAPSHOT_SECONDS)
+    elif STORAGE_MODE == "disk":
+        db = Storage(DB_PATH)
+    else:
+        raise SystemExit(f"unknown STUDYBUDDY_STORAGE_MODE {STORAGE_MODE!r}, expected disk or memory")
+    timer.mark("open database")
+    ensure_schema(db)
+    timer.mark("schema check")
+
+    from studybuddy.application.services import StudyBuddyService
+    from studybuddy.application.cli.menu import handle_choice
+    timer.mark("service + menu import")
+
+    # the menu is the only writer, so its reads (ensure_user_exists etc.) can be cached
+    svc = StudyBuddyService(db, normalize_availability=NORMALIZE_AVAILABILITY, use_read_cache=True,
+                            use_overlap_table=USE_OVERLAP_TABLE)
+    if STATS_ENABLED:
+        from studybuddy.database.instrumentation import QueryStats, instrument_service
+        # hidden menu option "stats" prints what was collected
+        instrument_service(svc, db.enable_stats(QueryStats(slow_query_ms=SLOW_QUERY_MS)))
+    timer.mark("service setup")
+    if STARTUP_TIMING:
+        timer.report()
+    try:
+        handle_choice(svc)
+    finally:
+        # memory mode writes its last snapshot here
+        db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
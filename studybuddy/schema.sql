@@ -25,7 +25,10 @@ tracked in session_participants, where the combination of session_id
 
 create table if not exists users (
   id integer primary key,
-  name text not null
+  name text not null,
+  -- requests waiting on this user's answer, kept up to date by the triggers below
+  -- (older databases get it from migrations.py)
+  pending_count integer not null default 0
 );
 
 create table if not exists courses (
@@ -62,6 +65,10 @@ create table if not exists sessions (
   start_min integer not null,
   end_min integer not null,
   status text not null check (status in ('pending','confirmed','declined','canceled')),
+  -- kept up to date by the triggers below, so confirming a session never has to
+  -- count its participants (older databases get them from migrations.py)
+  participant_count integer not null default 0,
+  accepted_count integer not null default 0,
   foreign key (course_code) references courses(code) on delete cascade,
   check (day_of_week between 0 and 6),
   check (start_min >= 0 and end_min <= 1440 and start_min < end_min)
@@ -78,3 +85,212 @@ create table if not exists session_participants (
   foreign key (user_id) references users(id) on delete cascade
 );
 
+-- one row per participant of every confirmed session, keyed by when it takes place,
+-- so a double-booking check is a seek for the user's nearest bookings that day
+-- instead of reading all of their sessions. Kept current by the triggers below
+-- (older databases are filled by migrations.py)
+create table if not exists confirmed_bookings (
+  user_id integer not null,
+  day_of_week integer not null,
+  start_min integer not null,
+  end_min integer not null,
+  session_id integer not null,
+  primary key (user_id, day_of_week, start_min, session_id)
+) without rowid;
+
+-- materialized overlaps: every window where two classmates are both free, stored
+-- once from each side so one user's suggestions are a single range of the primary
+-- key (ordered the way suggest_matches returns them). Opt-in: it stays empty until
+-- it is enabled (StudyBuddyService(use_overlap_table=True) or rebuild_overlaps()),
+-- which adds the triggers that keep it current (see migrations.py)
+create table if not exists course_overlaps (
+  course_code text not null,
+  user_id integer not null,
+  partner_id integer not null,
+  day_of_week integer not null,
+  start_min integer not null,
+  end_min integer not null,
+  minutes integer not null,
+  primary key (course_code, user_id, minutes desc, day_of_week, start_min, partner_id)
+) without rowid;
+
+
+-- INDEXES:
+-- Lookups used by the hot queries in services.py. "if not exists" makes them
+-- safe to apply to an existing database: running this script again just adds
+-- whichever indexes are missing. tests/test_query_plans.py checks that no
+-- service query falls back to a full table scan.
+
+-- classmates of a course (find_classmates, suggest_matches); by-user lookups use the PK
+create index if not exists idx_enrollments_course_user
+  on enrollments(course_code, user_id);
+
+-- one user's blocks on one day, covering so the overlap join never reads the table
+-- (also used by the delete_user cascade)
+create index if not exists idx_availability_user_day
+  on availability(user_id, day_of_week, start_min, end_min);
+
+-- sessions a user takes part in (list_confirmed_sessions_for_user, delete_user cascade)
+create index if not exists idx_session_participants_user_session
+  on session_participants(user_id, session_id);
+
+
+-- requests waiting on a user, oldest first (list_pending_requests_for_user and the
+-- inbox pages read one range of it)
+create index if not exists idx_session_participants_user_response
+  on session_participants(user_id, response, session_id);
+
+-- the other side of a user's overlap rows, for removing them when the user changes
+create index if not exists idx_course_overlaps_partner
+  on course_overlaps(course_code, partner_id, day_of_week);
+
+
+-- TRIGGERS:
+-- Maintain sessions.participant_count / accepted_count for every write to
+-- session_participants, whether it comes from the service or not.
+create trigger if not exists trg_session_participants_insert
+after insert on session_participants
+begin
+  update sessions
+  set participant_count = participant_count + 1,
+      accepted_count = accepted_count + (new.response = 'accepted')
+  where id = new.session_id;
+end;
+
+create trigger if not exists trg_session_participants_response
+after update of response on session_participants
+when old.response is not new.response
+begin
+  update sessions
+  set accepted_count = accepted_count + (new.response = 'accepted') - (old.response = 'accepted')
+  where id = new.session_id;
+end;
+
+create trigger if not exists trg_session_participants_delete
+after delete on session_participants
+begin
+  update sessions
+  set participant_count = participant_count - 1,
+      accepted_count = accepted_count - (old.response = 'accepted')
+  where id = old.session_id;
+end;
+
+-- Maintain users.pending_count: participant rows whose response is pending in a
+-- session that is still pending. Changes of either side are counted here, so
+-- requesting, answering, declining or deleting a session all keep it current.
+create trigger if not exists trg_pending_participant_insert
+after insert on session_participants
+when new.response = 'pending'
+begin
+  update users set pending_count = pending_count + 1
+  where id = new.user_id
+    and exists (select 1 from sessions where id = new.session_id and status = 'pending');
+end;
+
+create trigger if not exists trg_pending_participant_response
+after update of response on session_participants
+when (old.response = 'pending') <> (new.response = 'pending')
+begin
+  update users set pending_count = pending_count + (new.response = 'pending') - (old.response = 'pending')
+  where id = new.user_id
+    and exists (select 1 from sessions where id = new.session_id and status = 'pending');
+end;
+
+-- during the cascade of a session delete the session row is already gone, so this
+-- does nothing and trg_pending_session_delete has done the counting
+create trigger if not exists trg_pending_participant_delete
+after delete on session_participants
+when old.response = 'pending'
+begin
+  update users set pending_count = pending_count - 1
+  where id = old.user_id
+    and exists (select 1 from sessions where id = old.session_id and status = 'pending');
+end;
+
+-- a request whose requester is gone (delete_user) can't be answered any more, so it
+-- is canceled, which also takes it out of the invitees' inboxes
+create trigger if not exists trg_pending_requester_delete
+after delete on session_participants
+when old.role = 'requester'
+begin
+  update sessions set status = 'canceled' where id = old.session_id and status = 'pending';
+end;
+
+create trigger if not exists trg_pending_session_status
+after update of status on sessions
+when (old.status = 'pending') <> (new.status = 'pending')
+begin
+  update users set pending_count = pending_count + (new.status = 'pending') - (old.status = 'pending')
+  where id in (select user_id from session_participants where session_id = new.id and response = 'pending');
+end;
+
+create trigger if not exists trg_pending_session_delete
+before delete on sessions
+when old.status = 'pending'
+begin
+  update users set pending_count = pending_count - 1
+  where id in (select user_id from session_participants where session_id = old.id and response = 'pending');
+end;
+
+-- Maintain confirmed_bookings: a session's participants are booked while it is
+-- confirmed. Rows are found by their primary key (user, day, start, session), with
+-- the participants taken from session_participants.
+create trigger if not exists trg_bookings_session_status
+after update of status on sessions
+when (old.status = 'confirmed') <> (new.status = 'confirmed')
+begin
+  delete from confirmed_bookings
+  where old.status = 'confirmed'
+    and user_id in (select user_id from session_participants where session_id = old.id)
+    and day_of_week = old.day_of_week and start_min = old.start_min and session_id = old.id;
+
+  insert or ignore into confirmed_bookings(user_id, day_of_week, start_min, end_min, session_id)
+  select user_id, new.day_of_week, new.start_min, new.end_min, new.id
+  from session_participants
+  where new.status = 'confirmed' and session_id = new.id;
+end;
+
+-- a confirmed session moved to another time
+create trigger if not exists trg_bookings_session_time
+after update of day_of_week, start_min, end_min on sessions
+when new.status = 'confirmed' and old.status = 'confirmed'
+begin
+  delete from confirmed_bookings
+  where user_id in (select user_id from session_participants where session_id = old.id)
+    and day_of_week = old.day_of_week and start_min = old.start_min and session_id = old.id;
+
+  insert or ignore into confirmed_bookings(user_id, day_of_week, start_min, end_min, session_id)
+  select user_id, new.day_of_week, new.start_min, new.end_min, new.id
+  from session_participants
+  where session_id = new.id;
+end;
+
+-- before the delete, while the participant rows can still be read
+create trigger if not exists trg_bookings_session_delete
+before delete on sessions
+when old.status = 'confirmed'
+begin
+  delete from confirmed_bookings
+  where user_id in (select user_id from session_participants where session_id = old.id)
+    and day_of_week = old.day_of_week and start_min = old.start_min and session_id = old.id;
+end;
+
+create trigger if not exists trg_bookings_participant_insert
+after insert on session_participants
+begin
+  insert or ignore into confirmed_bookings(user_id, day_of_week, start_min, end_min, session_id)
+  select new.user_id, day_of_week, start_min, end_min, id
+  from sessions
+  where id = new.session_id and status = 'confirmed';
+end;
+
+-- during the cascade of a session delete the session row is already gone and
+-- trg_bookings_session_delete has removed the rows
+create trigger if not exists trg_bookings_participant_delete
+after delete on session_participants
+begin
+  delete from confirmed_bookings
+  where user_id = old.user_id
+    and (day_of_week, start_min) in (select day_of_week, start_min from sessions where id = old.session_id)
+    and session_id = old.session_id;
+end;
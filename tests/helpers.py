@@ -0,0 +1,10 @@
+from pathlib import Path
+from studybuddy.database.sql_storage import Storage
+
+SCHEMA_PATH = Path(__file__).resolve().parent.parent / "studybuddy" / "schema.sql"
+
+# a fresh in-memory database with the real schema, for tests that need actual SQL
+def make_memory_db() -> Storage:
+    db = Storage(":memory:")
+    db.execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+    return db
@@ -0,0 +1,58 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from studybuddy.application.async_services import AsyncStudyBuddyService
+from tests.helpers import SCHEMA_PATH
+
+class TestAsyncStudyBuddyService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.svc = AsyncStudyBuddyService(Path(self.tmp.name) / "async.db", max_workers=4)
+        self.svc.db.execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+
+    async def asyncTearDown(self):
+        await self.svc.close()
+        self.tmp.cleanup()
+
+    async def test_gather_many_lookups(self):
+        users = [await self.svc.create_user(f"u{i}") for i in range(20)]
+        await asyncio.gather(*(self.svc.enroll_course(u, "CPSC-3720") for u in users))
+        await asyncio.gather(*(self.svc.add_availability(u, 0, 600, 660) for u in users))
+        results = await asyncio.gather(*(self.svc.suggest_matches(u, "CPSC-3720") for u in users * 10))
+        self.assertTrue(all(len(r) == 19 for r in results))
+        self.assertEqual(len(await self.svc.find_classmates(users[0], "CPSC-3720")), 19)
+
+    async def test_timeout(self):
+        def slow():
+            time.sleep(0.3)
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.svc._run(slow, timeout=0.01)
+
+    async def test_iter_methods_are_read_in_a_worker(self):
+        users = [await self.svc.create_user(f"u{i}") for i in range(3)]
+        for u in users:
+            await self.svc.enroll_course(u, "CPSC-3720")
+        classmates = await self.svc.iter_classmates(users[0], "CPSC-3720")
+        self.assertIsInstance(classmates, list)
+        self.assertEqual(classmates, await self.svc.find_classmates(users[0], "CPSC-3720"))
+
+    async def test_cancelled_call_that_has_not_started_never_runs(self):
+        release = threading.Event()
+        busy = [self.svc._executor.submit(release.wait) for _ in range(4)]  # every worker
+        call = asyncio.create_task(self.svc.create_user("late"))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await call
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.svc.create_user("later", timeout=0.01)
+        release.set()
+        for f in busy:
+            f.result()
+        self.assertFalse(await self.svc.user_exists(1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.domain.intervals import merge_intervals, subtract_interval
+from tests.helpers import make_memory_db
+
+class TestIntervals(unittest.TestCase):
+    def test_merge_and_subtract(self):
+        self.assertEqual(merge_intervals([(900, 960), (780, 840), (810, 900), (1000, 1020)]),
+                         [(780, 960), (1000, 1020)])
+        self.assertEqual(subtract_interval((780, 960), (840, 900)), [(780, 840), (900, 960)])
+        self.assertEqual(subtract_interval((780, 960), (700, 1000)), [])
+
+class TestNormalizedAvailability(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db, use_match_index=True, normalize_availability=True)
+        self.me = self.svc.create_user("me")
+        self.other = self.svc.create_user("other")
+        for uid in (self.me, self.other):
+            self.svc.enroll_course(uid, "CPSC-3720")
+
+    def blocks(self, uid):
+        return [tuple(r) for r in self.db.query_all(
+            "select day_of_week, start_min, end_min from availability where user_id = :u order by 1, 2",
+            {"u": uid})]
+
+    def test_add_merges_overlapping_and_touching_blocks(self):
+        self.svc.add_availability(self.me, 0, 780, 840)     # Mon 13:00-14:00
+        self.svc.add_availability(self.me, 0, 810, 900)     # Mon 13:30-15:00
+        self.svc.add_availability(self.me, 0, 900, 930)     # touches 15:00
+        self.svc.add_availability(self.me, 1, 780, 840)     # other day stays separate
+        self.assertEqual(self.blocks(self.me), [(0, 780, 930), (1, 780, 840)])
+
+        self.svc.add_availability(self.other, 0, 800, 860)
+        matches = self.svc.suggest_matches(self.me, "CPSC-3720")
+        self.assertEqual([(m.overlap_start_min, m.overlap_end_min) for m in matches], [(800, 860)])
+
+    def test_subtract_splits_blocks(self):
+        self.svc.add_availability(self.me, 0, 780, 960)
+        self.assertEqual(self.svc.subtract_availability(self.me, 0, 840, 900), 1)
+        self.assertEqual(self.blocks(self.me), [(0, 780, 840), (0, 900, 960)])
+        self.svc.add_availability(self.other, 0, 780, 960)
+        matches = self.svc.suggest_matches(self.me, "CPSC-3720")
+        self.assertEqual(sorted((m.overlap_start_min, m.overlap_end_min) for m in matches),
+                         [(780, 840), (900, 960)])
+
+    def test_compact_existing_rows(self):
+        raw = StudyBuddyService(self.db)  # writes without normalizing, like old data
+        for s, e in [(600, 660), (630, 700), (700, 720), (800, 830)]:
+            raw.add_availability(self.other, 2, s, e)
+        self.assertEqual(self.svc.compact_availability(), 2)
+        self.assertEqual(self.blocks(self.other), [(2, 600, 720), (2, 800, 830)])
+        self.assertEqual(self.svc.compact_availability(), 0)
+
+    # the blocks a merge or subtract replaces are read inside its write transaction
+    def test_blocks_are_read_inside_the_write_transaction(self):
+        seen = []
+        query_all = self.db.query_all
+        def recording(sql, params={}):
+            if "from availability" in sql:
+                seen.append(self.db.conn.in_transaction)
+            return query_all(sql, params)
+        self.db.query_all = recording
+        self.svc.add_availability(self.me, 0, 780, 840)
+        self.svc.subtract_availability(self.me, 0, 800, 820)
+        self.svc.compact_availability(self.me)
+        self.assertEqual(seen, [True, True, True])
+
+if __name__ == "__main__":
+    unittest.main()
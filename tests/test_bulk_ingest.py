@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+from pathlib import Path
+from studybuddy.application.bulk_ingest import RejectReport, ingest_file
+from studybuddy.application.services import StudyBuddyService
+from tests.helpers import make_memory_db
+
+class TestBulkIngest(unittest.TestCase):
+    def setUp(self):
+        self.svc = StudyBuddyService(make_memory_db())
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.write_text(text, encoding="utf-8")
+        return path
+
+    def test_loads_files_and_reports_rejects(self):
+        users = self.write("users.csv", "id,name\n1,Ana\n2,Ben\n3,\n2,Dup\n")
+        enrollments = self.write("enrollments.jsonl",
+            '{"user_id": 1, "course_code": "cpsc-3720", "title": "Software Eng"}\n'
+            '{"user_id": 2, "course_code": "CPSC-3720"}\n'
+            '{"user_id": 99, "course_code": "CPSC-3720"}\n'
+            'not json\n')
+        availability = self.write("availability.csv",
+            "user_id,range\n1,Mon 13:00-15:00\n2,Mon 14:00-16:00\n2,Funday 10:00-11:00\n1,Tue 12:00-11:00\n")
+
+        # batch_size=2 so batches with a bad row fall back to row-by-row inserts
+        self.assertEqual(ingest_file(self.svc, "users", users, batch_size=2), (2, 2))
+        report = RejectReport(self.dir / "rejects.csv")
+        self.assertEqual(ingest_file(self.svc, "enrollments", enrollments, 2, report), (2, 2))
+        report.close()
+        self.assertEqual(ingest_file(self.svc, "availability", availability, 2), (2, 2))
+
+        self.assertEqual(len((self.dir / "rejects.csv").read_text().splitlines()), 3)
+        matches = self.svc.suggest_matches(1, "CPSC-3720")
+        self.assertEqual([(m.partner_id, m.overlap_start_min, m.overlap_end_min) for m in matches],
+                         [(2, 840, 900)])
+
+if __name__ == "__main__":
+    unittest.main()
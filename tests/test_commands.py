@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from studybuddy.application.cli.commands import main
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = str(Path(self.tmp.name) / "app.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_cli(self, *argv, stdin=""):
+        out = io.StringIO()
+        code = main(list(argv) + ["--db", self.db], stdin=io.StringIO(stdin), stdout=out)
+        return code, out.getvalue()
+
+    def jsonl(self, *argv, stdin=""):
+        code, text = self.run_cli(*argv, stdin=stdin)
+        return code, [json.loads(line) for line in text.splitlines()]
+
+    def test_inbox(self):
+        for name in ("Ana", "Ben"):
+            self.run_cli("create-user", "--name", name)
+            self.run_cli("enroll", "--user", "1" if name == "Ana" else "2", "--course", "CPSC-3720")
+        self.run_cli("request", "--user", "1", "--invitees", "2", "--course", "CPSC-3720", "--range", "Tue 10:00-11:00")
+        code, rows = self.jsonl("inbox", "--user", "2")
+        self.assertEqual(rows, [{"session_id": 1, "course_code": "CPSC-3720", "day_of_week": 1,
+                                 "start_min": 600, "end_min": 660, "requester_id": 1}])
+        self.assertEqual(self.jsonl("inbox", "--user", "2", "--count"), (0, [{"user_id": 2, "pending": 1}]))
+
+    def test_single_commands(self):
+        self.assertEqual(self.jsonl("create-user", "--name", "Ana"), (0, [{"id": 1, "name": "Ana"}]))
+        self.jsonl("create-user", "--name", "Ben")
+        for uid, rng in ((1, "Mon 10:00-12:00"), (2, "Mon 11:00-13:00")):
+            self.run_cli("enroll", "--user", str(uid), "--course", "cpsc-3720")
+            self.run_cli("add-availability", "--user", str(uid), "--range", rng)
+        code, rows = self.jsonl("suggest", "--user", "1", "--course", "CPSC-3720", "--min", "30")
+        self.assertEqual(rows, [{"partner_id": 2, "day_of_week": 0, "overlap_start_min": 660,
+                                 "overlap_end_min": 720, "minutes": 60}])
+        code, text = self.run_cli("classmates", "--user", "1", "--course", "CPSC-3720", "--format", "csv")
+        self.assertEqual(list(csv.reader(io.StringIO(text))), [["id", "name"], ["2", "Ben"]])
+        self.assertEqual(self.run_cli("sessions", "--user", "42"), (1, ""))
+
+    def test_batch_runs_many_commands_over_one_connection(self):
+        script = "\n".join([
+            "create-user --name 'Ana B'",
+            "create-user --name Ben",
+            "enroll --user 1 --course CPSC-3720",
+            "enroll --user 2 --course CPSC-3720",
+            "# comments and blank lines are skipped",
+            "",
+            "request --user 1 --invitees 2 --course CPSC-3720 --range 'Tue 09:00-10:00'",
+            "respond --session 1 --user 2 --accept",
+            "request --user 1 --invitees 2 --course CPSC-3720 --range 'Tue 09:30-10:30'",
+            "sessions --user 2",
+            "suggest --user 1",
+            "nonsense",
+        ])
+        code, rows = self.jsonl("batch", "--single-transaction", stdin=script)
+        self.assertEqual(code, 1)
+        self.assertEqual([(r["line"], r["command"], "error" in r) for r in rows], [
+            (1, "create-user", False), (2, "create-user", False), (3, "enroll", False), (4, "enroll", False),
+            (7, "request", False), (8, "respond", False), (9, "request", True), (10, "sessions", False),
+            (11, "suggest", True), (12, "nonsense", True),
+        ])
+        self.assertIn("session 1", rows[6]["error"])
+        self.assertEqual(rows[7]["status"], "confirmed")
+        # the successful lines were committed
+        self.assertEqual(self.jsonl("courses", "--user", "2"), (0, [{"code": "CPSC-3720", "title": ""}]))
+
+    def test_failed_batch_line_leaves_nothing_behind(self):
+        for name in ("Ana", "Ben"):
+            self.run_cli("create-user", "--name", name)
+        self.run_cli("enroll", "--user", "1", "--course", "CPSC-3720")
+        # the session row goes in, then the invitee's participant row fails
+        conn = sqlite3.connect(self.db)
+        conn.execute("create trigger no_invitees before insert on session_participants "
+                     "when new.role = 'invitee' begin select raise(abort, 'no invitees'); end")
+        conn.commit()
+        code, rows = self.jsonl("batch", "--single-transaction",
+                                stdin="request --user 1 --invitees 2 --course CPSC-3720 --range 'Mon 10:00-11:00'\n")
+        self.assertEqual(code, 1)
+        self.assertIn("no invitees", rows[0]["error"])
+        self.assertEqual(conn.execute("select count(*) from sessions").fetchone()[0], 0)
+        conn.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import random
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.migrations import course_overlaps_enabled, disable_course_overlaps
+from tests.helpers import make_memory_db
+
+# once enabled, course_overlaps is maintained by triggers; after any mix of writes it
+# must match what the live availability join computes
+
+class TestCourseOverlaps(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db, use_overlap_table=True)
+        self.rng = random.Random(5)
+        self.courses = ["CPSC-3720", "MATH-1010", "BIO-2000"]
+
+    def random_block(self, uid):
+        dow = self.rng.randrange(3)
+        start = self.rng.randrange(480, 1200, 15)
+        return {"user_id": uid, "day_of_week": dow, "start_min": start,
+                "end_min": min(1440, start + self.rng.randrange(15, 240, 15))}
+
+    def assert_consistent(self):
+        self.assertEqual(self.svc.check_overlaps(), [])
+
+    def test_incremental_maintenance_matches_live_join(self):
+        users = [self.svc.create_user(f"u{i}") for i in range(15)]
+        for uid in users:
+            for code in self.courses:
+                if self.rng.random() < 0.6:
+                    self.svc.enroll_course(uid, code)
+            for _ in range(3):
+                self.svc.add_availability(**self.random_block(uid))
+        self.assert_consistent()
+
+        for _ in range(60):
+            uid = self.rng.choice(users)
+            op = self.rng.randrange(5)
+            if op == 0:
+                self.svc.add_availability(**self.random_block(uid))
+            elif op == 1:
+                row = self.db.query_one("select id from availability where user_id = :u", {"u": uid})
+                if row:
+                    self.svc.remove_availability(row["id"])
+            elif op == 2:
+                self.svc.enroll_course(uid, self.rng.choice(self.courses))
+            elif op == 3:
+                self.svc.drop_course(uid, self.rng.choice(self.courses))
+            else:
+                self.svc.subtract_availability(uid, self.rng.randrange(3), 600, 690)
+        self.assert_consistent()
+
+        self.svc.compact_availability()
+        self.svc.add_availability_many(self.random_block(uid) for uid in users)
+        self.svc.delete_user(users[0])
+        self.assert_consistent()
+        self.assertEqual(self.db.query_one(
+            "select count(*) as n from course_overlaps where user_id = :u or partner_id = :u",
+            {"u": users[0]})["n"], 0)
+
+    def test_suggest_matches_reads_the_table(self):
+        a, b = self.svc.create_user("Ana"), self.svc.create_user("Ben")
+        for uid in (a, b):
+            self.svc.enroll_course(uid, "CPSC-3720")
+        self.svc.add_availability(a, 0, 600, 720)
+        self.svc.add_availability(b, 0, 660, 780)
+        self.assertEqual([(m.partner_id, m.overlap_start_min, m.overlap_end_min)
+                          for m in self.svc.suggest_matches(a, "CPSC-3720")], [(b, 660, 720)])
+        self.assertEqual([m.partner_id for m in self.svc.suggest_matches(b, "CPSC-3720")], [a])
+
+    def test_checker_finds_drift_and_rebuild_fixes_it(self):
+        a, b = self.svc.create_user("Ana"), self.svc.create_user("Ben")
+        for uid in (a, b):
+            self.svc.enroll_course(uid, "CPSC-3720")
+            self.svc.add_availability(uid, 1, 600, 700)
+        self.db.execute("delete from course_overlaps where user_id = :u", {"u": a})
+        self.assertEqual(self.svc.check_overlaps(), [(a, "CPSC-3720")])
+        self.assertEqual(self.svc.rebuild_overlaps(), 2)
+        self.assert_consistent()
+
+    def test_table_is_opt_in(self):
+        a, b = self.svc.create_user("Ana"), self.svc.create_user("Ben")
+        for uid in (a, b):
+            self.svc.enroll_course(uid, "CPSC-3720")
+            self.svc.add_availability(uid, 1, 600, 700)
+        disable_course_overlaps(self.db)
+        plain = StudyBuddyService(self.db)
+        plain.add_availability(a, 2, 600, 700)
+        plain.add_availability(b, 2, 630, 700)
+        self.assertFalse(course_overlaps_enabled(self.db))
+        self.assertEqual(self.db.query_one("select count(*) as n from course_overlaps")["n"], 0)
+        self.assertEqual(len(plain.suggest_matches(a, "CPSC-3720")), 2)  # live join
+
+        # turning it on again fills it with everything written meanwhile
+        enabled = StudyBuddyService(self.db, use_overlap_table=True)
+        self.assertTrue(course_overlaps_enabled(self.db))
+        self.assertEqual(enabled.suggest_matches(a, "CPSC-3720"), plain.suggest_matches(a, "CPSC-3720"))
+        self.assert_consistent()
+
+    def test_updates_made_outside_the_service_are_followed(self):
+        a, b, c = (self.svc.create_user(n) for n in ("Ana", "Ben", "Cy"))
+        for uid in (a, b, c):
+            self.svc.enroll_course(uid, "CPSC-3720")
+        self.svc.enroll_course(c, "MATH-1010")
+        block = self.svc.add_availability(a, 0, 600, 720)
+        self.svc.add_availability(b, 0, 660, 780)
+        self.svc.add_availability(c, 1, 600, 700)
+        self.db.execute("update availability set day_of_week = 1, start_min = 630 where id = :id", {"id": block})
+        self.assert_consistent()
+        self.db.execute("update availability set user_id = :b where id = :id", {"b": b, "id": block})
+        self.assert_consistent()
+        self.db.execute("update enrollments set course_code = 'MATH-1010' where user_id = :b", {"b": b})
+        self.assert_consistent()
+
+if __name__ == "__main__":
+    unittest.main()
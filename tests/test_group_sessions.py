@@ -0,0 +1,69 @@
+import itertools
+import random
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.domain.intervals import merge_intervals
+from tests.helpers import make_memory_db
+
+class TestGroupSlots(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db)
+        rng = random.Random(11)
+        self.users = [self.svc.create_user(f"u{i}") for i in range(9)]
+        self.free = {}
+        for uid in self.users:
+            self.svc.enroll_course(uid, "CPSC-3720")
+            for _ in range(4):
+                dow = rng.randrange(3)
+                start = rng.randrange(480, 1080, 30)
+                end = start + rng.randrange(60, 240, 30)
+                self.svc.add_availability(uid, dow, start, end)
+                self.free.setdefault((uid, dow), []).append((start, end))
+
+    # all windows where every member is free, checked slot by slot (all block
+    # boundaries in setUp are on the half hour)
+    def brute_force(self, members, min_minutes):
+        windows = []
+        for dow in range(7):
+            slots = [m for m in range(0, 1440, 30) if all(
+                any(s <= m < e for s, e in self.free.get((u, dow), [])) for u in members)]
+            for s, e in merge_intervals((m, m + 30) for m in slots):
+                if e - s >= min_minutes:
+                    windows.append((dow, s, e))
+        return windows
+
+    def test_member_set_windows_are_exact(self):
+        members = self.users[:3]
+        slots = self.svc.find_group_slots("CPSC-3720", member_ids=members, limit=100)
+        self.assertEqual(sorted((s.day_of_week, s.start_min, s.end_min) for s in slots),
+                         sorted(self.brute_force(members, 30)))
+
+    def test_group_size_finds_longest_window(self):
+        for size in (3, 4):
+            best = max((e - s for combo in itertools.combinations(self.users, size)
+                        for _, s, e in self.brute_force(combo, 30)), default=None)
+            slots = self.svc.find_group_slots("CPSC-3720", group_size=size)
+            if best is None:
+                self.assertEqual(slots, [])
+                continue
+            self.assertEqual(slots[0].minutes, best)
+            for slot in slots:  # every suggested group really is free together
+                self.assertEqual(len(slot.member_ids), size)
+                self.assertTrue(any(s <= slot.start_min and slot.end_min <= e
+                                    for d, s, e in self.brute_force(slot.member_ids, 30)
+                                    if d == slot.day_of_week))
+
+    def test_group_session_confirms_when_everyone_accepts(self):
+        me, *invitees = self.users[:4]
+        sid = self.svc.request_group_session(me, invitees, "CPSC-3720", 0, 600, 660)
+        for uid in invitees[:-1]:
+            self.svc.respond_session(sid, uid, True)
+        self.assertEqual(self.svc.list_confirmed_sessions_for_user(me), [])
+        self.svc.respond_session(sid, invitees[-1], True)
+        self.assertEqual([s.id for s in self.svc.list_confirmed_sessions_for_user(me)], [sid])
+        with self.assertRaises(ValueError):
+            self.svc.request_group_session(me, [me], "CPSC-3720", 0, 600, 660)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import random
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from tests.helpers import make_memory_db
+
+# the indexed suggest_matches must give exactly the same list as the SQL version
+
+class TestCourseIntervalIndex(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.sql = StudyBuddyService(self.db)
+        self.indexed = StudyBuddyService(self.db, use_match_index=True)
+        self.rng = random.Random(7)
+
+    def add_random_block(self, uid):
+        dow = self.rng.randrange(7)
+        start = self.rng.randrange(0, 1380, 15)
+        end = min(1440, start + self.rng.randrange(15, 240, 15))
+        return self.indexed.add_availability(uid, dow, start, end)
+
+    def assert_same(self, users, courses):
+        for uid in users:
+            for course in courses:
+                for mins in (0, 30, 90):
+                    self.assertEqual(
+                        self.indexed.suggest_matches(uid, course, mins),
+                        self.sql.suggest_matches(uid, course, mins),
+                    )
+
+    def test_matches_sql_path_after_incremental_updates(self):
+        users = [self.indexed.create_user(f"u{i}") for i in range(25)]
+        courses = ["CPSC-3720", "MATH-1010"]
+        for uid in users:
+            for course in courses:
+                if self.rng.random() < 0.7:
+                    self.indexed.enroll_course(uid, course)
+            for _ in range(4):
+                self.add_random_block(uid)
+        self.assert_same(users, courses)  # loads the index
+
+        # writes after the index is warm must be applied incrementally
+        for uid in users[:8]:
+            aid = self.add_random_block(uid)
+            if self.rng.random() < 0.5:
+                self.indexed.remove_availability(aid)
+        self.indexed.drop_course(users[0], courses[0])
+        self.indexed.enroll_course(users[1], courses[0])
+        self.indexed.enroll_course(users[2], "BIO-1220")
+        self.indexed.delete_user(users[3])
+        self.assert_same(users, courses + ["BIO-1220"])
+
+    def test_match_course_agrees_with_suggest_matches(self):
+        users = [self.sql.create_user(f"u{i}") for i in range(30)]
+        for uid in users[:25]:
+            self.sql.enroll_course(uid, "CPSC-3720")
+            for _ in range(5):
+                self.add_random_block(uid)
+        for mins in (0, 30, 60):
+            batch = self.sql.match_course("CPSC-3720", mins)
+            self.assertEqual(set(batch), set(users[:25]))
+            for uid in users[:25]:
+                self.assertEqual(batch[uid], self.sql.suggest_matches(uid, "CPSC-3720", mins))
+
+    def test_top_partners(self):
+        users = [self.sql.create_user(f"u{i}") for i in range(20)]
+        for uid in users:
+            self.sql.enroll_course(uid, "CPSC-3720")
+            for _ in range(5):
+                self.add_random_block(uid)
+        me = users[0]
+        # expected: union of overlap per partner, computed the slow way
+        totals = {}
+        for m in self.sql.suggest_matches(me, "CPSC-3720"):
+            minutes = totals.setdefault(m.partner_id, set())
+            minutes.update((m.day_of_week, t) for t in range(m.overlap_start_min, m.overlap_end_min))
+        expected = sorted(((len(v), p) for p, v in totals.items()), key=lambda x: (-x[0], x[1]))[:4]
+        stored = StudyBuddyService(self.db, use_overlap_table=True)
+        for svc in (self.sql, self.indexed, stored):
+            ranked = svc.top_partners(me, "CPSC-3720", k=4)
+            self.assertEqual([(r.total_minutes, r.partner_id) for r in ranked], expected)
+            for r in ranked:
+                self.assertEqual(r.windows, [m for m in self.sql.suggest_matches(me, "CPSC-3720")
+                                             if m.partner_id == r.partner_id])
+
+    def test_not_enrolled_returns_nothing(self):
+        me = self.indexed.create_user("me")
+        other = self.indexed.create_user("other")
+        self.indexed.enroll_course(other, "CPSC-3720")
+        self.indexed.add_availability(me, 0, 600, 720)
+        self.indexed.add_availability(other, 0, 600, 720)
+        self.assertEqual(self.indexed.suggest_matches(me, "CPSC-3720"), [])
+
+if __name__ == "__main__":
+    unittest.main()
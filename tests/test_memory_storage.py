@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.memory_storage import MemoryStorage
+from studybuddy.database.migrations import ensure_schema
+from studybuddy.database.sql_storage import Storage
+
+def user_names(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return sorted(r[0] for r in conn.execute("select name from users"))
+    finally:
+        conn.close()
+
+class TestMemoryStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "serve.db"
+        disk = Storage(self.path)
+        ensure_schema(disk)
+        StudyBuddyService(disk).create_user("on disk")
+        disk.close()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_warm_load_and_snapshot(self):
+        db = MemoryStorage(self.path)
+        svc = StudyBuddyService(db)
+        self.assertEqual([u["name"] for u in db.query_all("select name from users")], ["on disk"])
+        self.assertFalse(db.snapshot())   # nothing changed yet
+        svc.create_user("in memory")
+        self.assertEqual(user_names(self.path), ["on disk"])
+        self.assertTrue(db.snapshot())
+        self.assertEqual(user_names(self.path), ["in memory", "on disk"])
+        self.assertFalse(self.path.with_name("serve.db.snapshot").exists())
+        db.close()
+
+    def test_failed_replace_keeps_the_old_file(self):
+        db = MemoryStorage(self.path)
+        StudyBuddyService(db).create_user("lost")
+        with mock.patch("studybuddy.database.memory_storage.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                db.snapshot()
+        self.assertEqual(user_names(self.path), ["on disk"])
+        # still dirty, the next snapshot writes it
+        self.assertTrue(db.snapshot())
+        self.assertEqual(user_names(self.path), ["lost", "on disk"])
+        db.close()
+
+    def test_writes_during_paged_snapshot(self):
+        db = MemoryStorage(self.path, snapshot_pages=1, snapshot_pause_s=0)
+        svc = StudyBuddyService(db)
+        with db.transaction():
+            for i in range(300):
+                svc.create_user(f"seed {i:03}")
+        done = threading.Event()
+        def write():
+            i = 0
+            while not done.is_set():
+                svc.create_user(f"live {i}")
+                i += 1
+        writer = threading.Thread(target=write)
+        writer.start()
+        try:
+            db.snapshot()
+        finally:
+            done.set()
+            writer.join()
+        conn = sqlite3.connect(str(self.path))
+        self.assertEqual(conn.execute("pragma integrity_check").fetchone()[0], "ok")
+        self.assertGreaterEqual(conn.execute("select count(*) from users").fetchone()[0], 301)
+        conn.close()
+        db.close()
+
+    def test_scheduler_and_close(self):
+        db = MemoryStorage(self.path)
+        scheduler = db.start_snapshots(0.01)
+        StudyBuddyService(db).create_user("scheduled")
+        for _ in range(500):
+            if scheduler.snapshots:
+                break
+            threading.Event().wait(0.01)
+        self.assertGreaterEqual(scheduler.snapshots, 1)
+        self.assertIn("scheduled", user_names(self.path))
+        StudyBuddyService(db).create_user("at exit")
+        db.close()
+        self.assertFalse(scheduler.is_alive())
+        self.assertIn("at exit", user_names(self.path))
+
+    def test_menu_in_memory_mode(self):
+        env = dict(os.environ, STUDYBUDDY_DB=str(self.path), STUDYBUDDY_STORAGE_MODE="memory")
+        result = subprocess.run([sys.executable, "-m", "studybuddy.run_app"], input="1\nfrom menu\nn\n0\n",
+                                env=env, capture_output=True, text=True, timeout=60,
+                                cwd=Path(__file__).resolve().parent.parent)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(user_names(self.path), ["from menu", "on disk"])
+
+if __name__ == "__main__":
+    unittest.main()
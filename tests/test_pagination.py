@@ -0,0 +1,40 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from tests.helpers import make_memory_db
+
+class TestKeysetPagination(unittest.TestCase):
+    def setUp(self):
+        self.svc = StudyBuddyService(make_memory_db())
+        self.users = [self.svc.create_user(f"u{i}") for i in range(23)]
+        for uid in self.users:
+            self.svc.enroll_course(uid, "CPSC-3720")
+        for code in ("BIO-1220", "MATH-1010", "CHEM-1010"):
+            self.svc.enroll_course(self.users[0], code)
+
+    def walk(self, fetch_page):
+        items, cursor = [], None
+        while True:
+            page = fetch_page(cursor)
+            items.extend(page.items)
+            if page.next_cursor is None:
+                return items
+            cursor = page.next_cursor
+
+    def test_pages_cover_full_listing_in_order(self):
+        me = self.users[0]
+        self.assertEqual(self.walk(lambda after: self.svc.page_classmates(me, "CPSC-3720", after, limit=5)),
+                         sorted(self.svc.find_classmates(me, "CPSC-3720"), key=lambda u: u.id))
+        self.assertEqual([r["code"] for r in self.walk(lambda after: self.svc.page_all_courses(after, limit=3))],
+                         [r["code"] for r in self.svc.list_all_courses()])
+        self.assertEqual([r["code"] for r in self.walk(lambda after: self.svc.page_courses_for_user(me, after, 2))],
+                         [r["code"] for r in self.svc.list_courses_for_user(me)])
+
+        for i, other in enumerate(self.users[1:8]):
+            sid = self.svc.request_session(me, other, "CPSC-3720", i % 2, 600 + 60 * (i // 2), 660 + 60 * (i // 2))
+            self.svc.respond_session(sid, other, True)
+        sessions = self.walk(lambda after: self.svc.page_confirmed_sessions_for_user(me, after, limit=2))
+        self.assertEqual([s.id for s in sessions], [s.id for s in sorted(
+            self.svc.list_confirmed_sessions_for_user(me), key=lambda s: (s.day_of_week, s.start_min, s.id))])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.migrations import upgrade
+from tests.helpers import make_memory_db
+
+class TestPendingRequests(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db)
+        self.users = [self.svc.create_user(f"u{i}") for i in range(5)]
+        for uid in self.users:
+            self.svc.enroll_course(uid, "CPSC-3720")
+
+    # the counter must always equal the listing it summarizes
+    def assertCountsMatch(self):
+        for uid in self.users:
+            self.assertEqual(self.svc.pending_count(uid), len(self.svc.list_pending_requests_for_user(uid)), uid)
+
+    def test_counter_follows_requests_and_answers(self):
+        a, b, c, d, _ = self.users
+        first = self.svc.request_session(a, b, "CPSC-3720", 0, 600, 660)
+        group = self.svc.request_group_session(a, [b, c, d], "CPSC-3720", 1, 600, 660)
+        self.assertEqual([self.svc.pending_count(u) for u in (a, b, c, d)], [0, 2, 1, 1])
+        inbox = self.svc.list_pending_requests_for_user(b)
+        self.assertEqual([(r.session_id, r.requester_id) for r in inbox], [(first, a), (group, a)])
+        self.svc.respond_session(first, b, True)
+        self.assertCountsMatch()
+        # one decline takes the group session out of everyone's inbox
+        self.svc.respond_session(group, c, False)
+        self.assertEqual([self.svc.pending_count(u) for u in (b, c, d)], [0, 0, 0])
+        self.assertCountsMatch()
+        pending = self.svc.request_session(c, d, "CPSC-3720", 2, 600, 660)
+        self.db.execute("delete from sessions where id = :s", {"s": pending})
+        self.assertCountsMatch()
+        orphan = self.svc.request_session(c, d, "CPSC-3720", 2, 600, 660)
+        self.svc.delete_user(c)
+        self.assertEqual(self.db.query_one("select status from sessions where id = :s", {"s": orphan})["status"],
+                         "canceled")
+        self.svc.schedule_sessions("CPSC-3720", [(a, d)], duration_min=30)
+        self.assertCountsMatch()
+
+    def test_pages_are_keyset_ranges(self):
+        a, b = self.users[:2]
+        ids = [self.svc.request_session(a, b, "CPSC-3720", i % 7, 600 + i, 601 + i) for i in range(25)]
+        seen, cursor = [], None
+        while True:
+            page = self.svc.page_pending_requests_for_user(b, after=cursor, limit=10)
+            seen += [r.session_id for r in page.items]
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, ids)
+        plan = " ".join(r["detail"] for r in self.db.conn.execute(
+            "explain query plan select session_id from session_participants "
+            "where user_id = 1 and response = 'pending' and session_id > 5 order by session_id limit 10"))
+        self.assertIn("idx_session_participants_user_response", plan)
+
+    def test_upgrade_backfills_counts(self):
+        a, b = self.users[:2]
+        self.svc.request_session(a, b, "CPSC-3720", 0, 600, 660)
+        self.db.execute("update users set pending_count = 0")
+        self.db.execute("pragma user_version = 1")
+        self.assertEqual(upgrade(self.db), ["pending_counts", "confirmed_bookings"])
+        self.assertEqual(self.svc.pending_count(b), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.pooled_storage import PooledStorage
+from tests.helpers import SCHEMA_PATH
+
+class TestPooledStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = PooledStorage(Path(self.tmp.name) / "pool.db")
+        self.db.execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+        self.svc = StudyBuddyService(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_wal_and_separate_reader_per_thread(self):
+        self.assertEqual(self.db.query_one("pragma journal_mode")[0], "wal")
+        readers = []
+        def grab():
+            readers.append(self.db._reader())
+        threads = [threading.Thread(target=grab) for _ in range(3)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(len({id(r) for r in readers}), 3)
+        self.assertNotIn(self.db.conn, readers)
+
+    def test_concurrent_writers_and_readers(self):
+        self.svc.enroll_course(self.svc.create_user("seed"), "CPSC-3720")
+        errors = []
+        def work(n):
+            try:
+                for i in range(20):
+                    uid = self.svc.create_user(f"w{n}-{i}")
+                    self.svc.enroll_course(uid, "CPSC-3720")
+                    self.assertTrue(self.svc.user_exists(uid))
+                    self.svc.find_classmates(uid, "CPSC-3720")
+            except Exception as ex:  # collected so the main thread can fail the test
+                errors.append(ex)
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(6)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.svc.list_courses_for_user(1)), 1)
+        self.assertEqual(self.db.query_one("select count(*) as n from enrollments")["n"], 121)
+
+    def test_transaction_reads_its_own_writes(self):
+        with self.db.transaction():
+            uid = self.db.execute("insert into users(name) values('Ana')")
+            self.assertIsNotNone(self.db.query_one("select 1 from users where id = :u", {"u": uid}))
+
+if __name__ == "__main__":
+    unittest.main()
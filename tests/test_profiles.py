@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from pathlib import Path
+from studybuddy.database.pooled_storage import PooledStorage
+from studybuddy.database.profiles import PROFILES, get_profile
+from studybuddy.database.sql_storage import Storage
+
+def pragma(db, name):
+    return db.conn.execute(f"pragma {name}").fetchone()[0]
+
+class TestStorageProfiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "profiles.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            get_profile("fastest")
+        with self.assertRaises(ValueError):
+            Storage(self.path, profile="fastest")
+
+    def test_default_is_durable(self):
+        db = Storage(self.path, profile="durable")
+        self.assertEqual(pragma(db, "synchronous"), 2)
+        self.assertEqual(pragma(db, "journal_mode"), "delete")
+        self.assertEqual(pragma(db, "foreign_keys"), 1)
+        db.close()
+
+    def test_balanced_switches_to_wal(self):
+        db = Storage(self.path, profile="balanced")
+        self.assertEqual(pragma(db, "journal_mode"), "wal")
+        self.assertEqual(pragma(db, "synchronous"), 1)
+        self.assertEqual(pragma(db, "cache_size"), PROFILES["balanced"].cache_size)
+        db.close()
+        # journal mode sticks to the file, durable doesn't undo it
+        db = Storage(self.path, profile="durable")
+        self.assertEqual(pragma(db, "journal_mode"), "wal")
+        db.close()
+
+    def test_use_profile_restores_settings(self):
+        db = Storage(self.path, profile="balanced")
+        with db.use_profile("bulk-load") as inner:
+            self.assertIs(inner, db)
+            self.assertEqual(db.profile.name, "bulk-load")
+            self.assertEqual(pragma(db, "synchronous"), 0)
+            self.assertEqual(pragma(db, "cache_size"), PROFILES["bulk-load"].cache_size)
+        self.assertEqual(db.profile.name, "balanced")
+        self.assertEqual(pragma(db, "synchronous"), 1)
+        self.assertEqual(pragma(db, "cache_size"), PROFILES["balanced"].cache_size)
+        self.assertEqual(pragma(db, "journal_mode"), "wal")
+        db.close()
+
+    def test_use_profile_inside_transaction(self):
+        db = Storage(self.path, profile="balanced")
+        with db.transaction():
+            with self.assertRaises(RuntimeError):
+                with db.use_profile("bulk-load"):
+                    pass
+            self.assertEqual(db.profile.name, "balanced")
+        self.assertEqual(pragma(db, "synchronous"), 1)
+        # the other way round is fine
+        with db.use_profile("bulk-load"):
+            with db.transaction():
+                db.execute("create table t (x)")
+        self.assertEqual(pragma(db, "synchronous"), 1)
+        db.close()
+
+    def test_pooled_use_profile_inside_transaction(self):
+        db = PooledStorage(self.path, profile="balanced")
+        with db.transaction():
+            with self.assertRaises(RuntimeError):
+                with db.use_profile("bulk-load"):
+                    pass
+        with db.use_profile("bulk-load"):
+            self.assertEqual(pragma(db, "synchronous"), 0)
+        self.assertEqual(pragma(db, "synchronous"), 1)
+        db.close()
+
+    def test_pooled_storage_applies_profile(self):
+        db = PooledStorage(self.path, profile="bulk-load")
+        self.assertEqual(pragma(db, "journal_mode"), "wal")
+        self.assertEqual(pragma(db, "synchronous"), 0)
+        self.assertEqual(db._reader().execute("pragma cache_size").fetchone()[0],
+                         PROFILES["bulk-load"].cache_size)
+        db.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+import re
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.migrations import OVERLAP_INDEXES, OVERLAP_TRIGGERS, REBUILD_OVERLAPS_SQL
+from studybuddy.database.sql_storage import Storage
+from tests.helpers import SCHEMA_PATH
+
+# Runs every public StudyBuddyService method against a real database, records each
+# statement it sends and checks its EXPLAIN QUERY PLAN. A "SCAN <table>" line means
+# sqlite reads the whole table (or a whole index) - that should only happen for
+# queries that really list an entire table.
+
+# queries that are allowed to scan because they return the whole table anyway
+FULL_LISTINGS = {
+    "select code, coalesce(title, '') as title from courses order by code",
+    "select id, user_id, day_of_week, start_min, end_min from availability order by user_id, day_of_week, start_min",
+    # rebuilding / checking course_overlaps goes over every enrollment
+    " ".join(REBUILD_OVERLAPS_SQL.split()),
+    "select count(*) as n from course_overlaps",
+    # is course_overlaps enabled (sqlite_master has no index; once per service)
+    "select count(*) as n from sqlite_master where type in ('trigger', 'index') and name in ("
+    + ", ".join(f"'{name}'" for name in [*OVERLAP_TRIGGERS, *OVERLAP_INDEXES]) + ")",
+    "select user_id, course_code from enrollments order by course_code, user_id",
+    # double-booking audit walks every participant once (index only), then seeks
+    "select a.user_id, a.session_id as first_id, b.session_id as second_id from session_participants a "
+    "join session_participants b on b.user_id = a.user_id and b.session_id > a.session_id "
+    "join sessions sa on sa.id = a.session_id join sessions sb on sb.id = b.session_id "
+    "where sa.status = 'confirmed' and sb.status = 'confirmed' and sa.day_of_week = sb.day_of_week "
+    "and sa.start_min < sb.end_min and sb.start_min < sa.end_min order by a.user_id, first_id, second_id",
+}
+
+class RecordingStorage(Storage):
+    def __init__(self):
+        super().__init__(":memory:")
+        self.statements = []
+
+    def execute(self, sql, params={}):
+        self.statements.append((sql, params))
+        return super().execute(sql, params)
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        self.statements.append((sql, rows[0] if rows else {}))
+        return super().executemany(sql, rows)
+
+    def query_all(self, sql, params={}):
+        self.statements.append((sql, params))
+        return super().query_all(sql, params)
+
+    def query_iter(self, sql, params={}, chunk_size=500):
+        self.statements.append((sql, params))
+        return super().query_iter(sql, params, chunk_size)
+
+    def query_one(self, sql, params={}):
+        self.statements.append((sql, params))
+        return super().query_one(sql, params)
+
+class TestQueryPlans(unittest.TestCase):
+    def setUp(self):
+        self.db = RecordingStorage()
+        self.db.execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+        self.svc = StudyBuddyService(self.db)
+
+    # calls every public service method at least once; returns the names called
+    def exercise_service(self):
+        svc = self.svc
+        a, b = svc.create_user("Ana"), svc.create_user("Ben")
+        svc.create_users_many([{"name": "Cy"}])
+        svc.user_exists(a)
+        svc.update_user_name(a, "Ana B")
+        svc.enroll_course(a, "CPSC-3720", "Software Eng")
+        svc.enroll_course(b, "CPSC-3720")
+        svc.enroll_course_many([{"user_id": b, "course_code": "MATH-1010"}])
+        svc.list_all_courses()
+        svc.list_courses_for_user(a)
+        svc.add_availability(a, 0, 600, 720)
+        aid = svc.add_availability(b, 0, 630, 700)
+        svc.add_availability_many([{"user_id": b, "day_of_week": 1, "start_min": 60, "end_min": 120}])
+        svc.subtract_availability(a, 0, 650, 660)
+        svc.compact_availability(a)
+        svc.compact_availability()
+        svc.normalize_availability = True
+        svc.add_availability(a, 0, 700, 800)
+        svc.normalize_availability = False
+        svc.find_classmates(a, "CPSC-3720")
+        svc.suggest_matches(a, "CPSC-3720")
+        svc.match_course("CPSC-3720")
+        svc.top_partners(a, "CPSC-3720", k=3)
+        svc.check_overlaps("CPSC-3720")
+        svc.check_overlaps()
+        svc.rebuild_overlaps()
+        stored = StudyBuddyService(self.db, use_overlap_table=True)
+        stored.suggest_matches(a, "CPSC-3720")
+        stored.top_partners(a, "CPSC-3720", k=3)
+        list(stored.iter_suggest_matches(a, "CPSC-3720"))
+        svc.find_group_slots("CPSC-3720", group_size=2, user_id=a)
+        svc.request_group_session(a, [b], "CPSC-3720", 1, 60, 120)
+        sid = svc.request_session(a, b, "CPSC-3720", 0, 630, 700)
+        svc.list_pending_requests_for_user(b)
+        list(svc.iter_pending_requests_for_user(b))
+        svc.page_pending_requests_for_user(b, after=1, limit=1)
+        svc.pending_count(b)
+        svc.respond_session(sid, b, True)
+        svc.respond_sessions([{"session_id": svc.request_session(a, b, "CPSC-3720", 2, 60, 120),
+                               "user_id": b, "accept": True}])
+        svc.respond_session(svc.request_session(a, b, "CPSC-3720", 0, 800, 860), b, False)
+        svc.schedule_sessions("CPSC-3720", [(a, b)], duration_min=20)
+        svc.find_conflicts([a, b], 0, 600, 720)
+        svc.audit_session_conflicts()
+        svc.list_confirmed_sessions_for_user(a)
+        list(svc.iter_all_courses())
+        list(svc.iter_courses_for_user(a))
+        list(svc.iter_classmates(a, "CPSC-3720"))
+        list(svc.iter_suggest_matches(a, "CPSC-3720"))
+        list(svc.iter_confirmed_sessions_for_user(a))
+        svc.page_all_courses("A", limit=1)
+        svc.page_courses_for_user(a, limit=1)
+        svc.page_classmates(a, "CPSC-3720", after=1, limit=1)
+        svc.page_confirmed_sessions_for_user(a, after=(0, 0, 0), limit=1)
+        svc.remove_availability(aid)
+        svc.drop_course(b, "CPSC-3720")
+        svc.delete_user(b)
+        return {"create_user", "create_users_many", "user_exists", "update_user_name",
+                "enroll_course", "enroll_course_many", "list_all_courses", "list_courses_for_user",
+                "add_availability", "add_availability_many", "find_classmates", "suggest_matches",
+                "match_course", "top_partners", "check_overlaps", "rebuild_overlaps", "find_group_slots", "request_session",
+                "request_group_session", "schedule_sessions", "respond_session", "respond_sessions", "find_conflicts", "audit_session_conflicts",
+                "list_pending_requests_for_user", "iter_pending_requests_for_user",
+                "page_pending_requests_for_user", "pending_count",
+                "list_confirmed_sessions_for_user", "remove_availability", "drop_course", "delete_user",
+                "subtract_availability", "compact_availability", "iter_all_courses",
+                "iter_courses_for_user", "iter_classmates", "iter_suggest_matches",
+                "iter_confirmed_sessions_for_user", "page_all_courses", "page_courses_for_user",
+                "page_classmates", "page_confirmed_sessions_for_user"}
+
+    def test_every_public_method_is_exercised(self):
+        public = {name for name in dir(StudyBuddyService)
+                  if not name.startswith("_") and callable(getattr(StudyBuddyService, name))}
+        self.assertEqual(public - self.exercise_service(), set(),
+                         "add new service methods to exercise_service")
+
+    def test_no_full_table_scans(self):
+        self.exercise_service()
+        for sql, params in self.db.statements:
+            normalized = " ".join(sql.split())
+            if normalized in FULL_LISTINGS:
+                continue
+            plan = [r["detail"] for r in self.db.conn.execute("explain query plan " + sql, params)]
+            scans = [line for line in plan if re.match(r"SCAN (?!CONSTANT ROW)", line)]
+            self.assertEqual(scans, [], f"full scan in: {normalized}\nplan: {plan}")
+
+    # suggest_matches / top_partners read course_overlaps in index order, and the
+    # live join top_partners streams comes out in its group by order
+    def test_overlap_reads_need_no_sort(self):
+        self.exercise_service()
+        stored = [(sql, params) for sql, params in self.db.statements
+                  if "from course_overlaps" in sql and "where course_code = :course" in sql]
+        live = [(sql, params) for sql, params in self.db.statements
+                if "group by partner_id" in sql and "order by partner_id" in sql]
+        self.assertNotEqual(stored, [])
+        self.assertNotEqual(live, [])
+        for sql, params in stored:
+            plan = [r["detail"] for r in self.db.conn.execute("explain query plan " + sql, params)]
+            self.assertFalse(any("TEMP B-TREE" in line for line in plan), plan)
+        for sql, params in live:
+            plan = [r["detail"] for r in self.db.conn.execute("explain query plan " + sql, params)]
+            self.assertNotIn("USE TEMP B-TREE FOR ORDER BY", plan)
+
+if __name__ == "__main__":
+    unittest.main()
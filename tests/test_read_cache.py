@@ -0,0 +1,47 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from tests.helpers import make_memory_db
+
+class TestReadCache(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db, use_read_cache=True)
+        self.plain = StudyBuddyService(self.db)  # uncached view of the same data
+
+    def assert_fresh(self, me, course):
+        self.assertEqual(self.svc.find_classmates(me, course), self.plain.find_classmates(me, course))
+        self.assertEqual([tuple(r) for r in self.svc.list_courses_for_user(me)],
+                         [tuple(r) for r in self.plain.list_courses_for_user(me)])
+        self.assertEqual([tuple(r) for r in self.svc.list_all_courses()],
+                         [tuple(r) for r in self.plain.list_all_courses()])
+
+    def test_repeated_reads_hit(self):
+        uid = self.svc.create_user("Ana")
+        for _ in range(5):
+            self.assertTrue(self.svc.user_exists(uid))
+        self.assertEqual(self.svc.read_cache.stats()["hits"], 4)
+
+    def test_writes_invalidate(self):
+        self.assertFalse(self.svc.user_exists(1))
+        me = self.svc.create_user("Ana")
+        self.assertTrue(self.svc.user_exists(me))  # the cached "no" was invalidated
+        other = self.svc.create_user("Ben")
+        self.svc.enroll_course(me, "CPSC-3720")
+        self.assert_fresh(me, "CPSC-3720")
+        self.svc.enroll_course(other, "CPSC-3720")
+        self.assert_fresh(me, "CPSC-3720")
+        self.svc.update_user_name(other, "Benjamin")
+        self.assert_fresh(me, "CPSC-3720")
+        self.svc.enroll_course(me, "MATH-1010")
+        self.assert_fresh(me, "MATH-1010")
+        self.svc.drop_course(me, "CPSC-3720")
+        self.assert_fresh(me, "CPSC-3720")
+        self.svc.enroll_course(me, "CPSC-3720")
+        self.svc.delete_user(other)
+        self.assert_fresh(me, "CPSC-3720")
+        self.assertFalse(self.svc.user_exists(other))
+        self.svc.enroll_course_many([{"user_id": me, "course_code": "BIO-1220"}])
+        self.assert_fresh(me, "BIO-1220")
+
+if __name__ == "__main__":
+    unittest.main()
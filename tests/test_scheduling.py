@@ -0,0 +1,98 @@
+import random
+import unittest
+from studybuddy.application.matching import assign_pair_slots
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.domain.domain_types import SessionStatus
+from studybuddy.domain.intervals import intersect_intervals
+from tests.helpers import make_memory_db
+
+class TestAssignPairSlots(unittest.TestCase):
+    def test_intersect_intervals(self):
+        self.assertEqual(intersect_intervals([(0, 60), (120, 240)], [(30, 150), (200, 300)]),
+                         [(30, 60), (120, 150), (200, 240)])
+        self.assertEqual(intersect_intervals([(0, 60)], []), [])
+
+    def test_constrained_pair_goes_first(self):
+        # 1 and 2 only share 60..120; 1 and 3 share 0..240. In input order the
+        # flexible pair would take the tight window first (best fit is not enough),
+        # most-constrained-first keeps both placeable
+        blocks = [(1, 0, 0, 240), (2, 0, 60, 120), (3, 0, 0, 240)]
+        placed, unplaced = assign_pair_slots([(1, 3), (1, 2)], blocks, [], 60)
+        self.assertEqual(unplaced, [])
+        self.assertEqual(placed, [(0, 0, 0, 60), (1, 0, 60, 120)])
+
+    def test_busy_time_and_reasons(self):
+        blocks = [(1, 0, 0, 120), (2, 0, 0, 120), (3, 1, 0, 120)]
+        busy = [(2, 0, 0, 60)]
+        placed, unplaced = assign_pair_slots([(1, 2), (1, 2), (1, 3), (4, 4)], blocks, busy, 60)
+        self.assertEqual(placed, [(0, 0, 60, 120)])
+        self.assertEqual([i for i, _ in unplaced], [1, 2, 3])
+        self.assertIn("taken by other pairs", unplaced[0][1])
+        self.assertIn("no shared free time", unplaced[1][1])
+        self.assertIn("same user", unplaced[2][1])
+
+class TestScheduleSessions(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db)
+        rng = random.Random(5)
+        self.users = [self.svc.create_user(f"u{i}") for i in range(40)]
+        for uid in self.users:
+            self.svc.enroll_course(uid, "CPSC-3720")
+            for _ in range(3):
+                start = rng.randrange(480, 1140, 15)
+                self.svc.add_availability(uid, rng.randrange(7), start, start + rng.randrange(60, 300, 15))
+        self.pairs = [tuple(rng.sample(self.users, 2)) for _ in range(150)]
+
+    def test_sessions_fit_availability_without_double_booking(self):
+        a, b = self.users[:2]
+        self.svc.add_availability(a, 6, 0, 120)
+        self.svc.add_availability(b, 6, 0, 120)
+        # a confirmed session the scheduler has to work around
+        self.svc.respond_session(self.svc.request_session(a, b, "CPSC-3720", 6, 0, 60), b, True)
+        result = self.svc.schedule_sessions("CPSC-3720", [(a, b)] + self.pairs, duration_min=45)
+        self.assertEqual(len(result.sessions) + len(result.unplaced), len(self.pairs) + 1)
+        self.assertTrue(result.sessions)
+        self.assertTrue(result.unplaced)
+        self.assertEqual((result.sessions[0].day_of_week, result.sessions[0].start_min), (6, 60))
+        free = {}
+        for r in self.db.query_all("select user_id, day_of_week, start_min, end_min from availability"):
+            free.setdefault((r["user_id"], r["day_of_week"]), set()).update(range(r["start_min"], r["end_min"]))
+        replies = []
+        for s in result.sessions:
+            self.assertEqual(s.status, SessionStatus.pending)
+            self.assertEqual(s.end_min - s.start_min, 45)
+            people = self.db.query_all(
+                "select user_id, role, response from session_participants where session_id = :s", {"s": s.id})
+            self.assertEqual(sorted((p["role"], p["response"]) for p in people),
+                             [("invitee", "pending"), ("requester", "accepted")])
+            for p in people:
+                self.assertLessEqual(set(range(s.start_min, s.end_min)), free[(p["user_id"], s.day_of_week)])
+                if p["role"] == "invitee":
+                    replies.append({"session_id": s.id, "user_id": p["user_id"], "accept": True})
+        # accepting everything confirms every session without a double booking
+        self.svc.respond_sessions(replies, on_reject=lambda row, ex: self.fail(str(ex)))
+        self.assertEqual(self.svc.audit_session_conflicts(), [])
+
+    def test_pairs_outside_the_course_are_not_scheduled(self):
+        a, b = self.users[:2]
+        outsider = self.svc.create_user("not enrolled")
+        for uid in (a, b, outsider):
+            self.svc.add_availability(uid, 6, 0, 120)
+        result = self.svc.schedule_sessions("CPSC-3720", [(a, outsider), (outsider, 999), (a, b)], duration_min=60)
+        self.assertEqual(len(result.sessions), 1)
+        self.assertEqual([(u.requester_id, u.invitee_id) for u in result.unplaced], [(a, outsider), (outsider, 999)])
+        self.assertEqual(result.unplaced[0].reason, f"user {outsider} not enrolled in CPSC-3720")
+        self.assertEqual(result.unplaced[1].reason, f"user {outsider} and user 999 not enrolled in CPSC-3720")
+
+    def test_one_transaction(self):
+        self.db.execute("create trigger fail_late before insert on session_participants "
+                        "when (select count(*) from session_participants) >= 10 "
+                        "begin select raise(abort, 'boom'); end")
+        before = self.db.query_one("select count(*) as n from sessions")["n"]
+        with self.assertRaises(Exception):
+            self.svc.schedule_sessions("CPSC-3720", self.pairs)
+        self.assertEqual(self.db.query_one("select count(*) as n from sessions")["n"], before)
+
+if __name__ == "__main__":
+    unittest.main()
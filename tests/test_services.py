@@ -63,9 +63,8 @@ class TestStudyBuddyService(unittest.TestCase):
         self.assertEqual(classmates[1].name, "Charlie")
 
     def test_request_session(self):
-        # Mock execute and query_one for session creation
-        self.mock_db.execute.return_value = None
-        self.mock_db.query_one.return_value = {"id": 42}
+        # Mock execute, which hands back the new session's row id
+        self.mock_db.execute.return_value = 42
         session_id = self.service.request_session(1, 2, "CPSC-1010", 0, 600, 660)
         self.assertEqual(session_id, 42)
         self.mock_db.execute.assert_called()
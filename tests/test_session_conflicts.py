@@ -0,0 +1,90 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.migrations import upgrade
+from studybuddy.domain.errors import SessionConflictError
+from tests.helpers import make_memory_db
+
+class TestSessionConflicts(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db)
+        self.a, self.b, self.c = (self.svc.create_user(n) for n in ("Ana", "Ben", "Cy"))
+        for uid in (self.a, self.b, self.c):
+            self.svc.enroll_course(uid, "CPSC-3720")
+        self.sid = self.svc.request_session(self.a, self.b, "CPSC-3720", 0, 600, 660)
+        self.svc.respond_session(self.sid, self.b, True)
+
+    def test_request_overlapping_confirmed_session_is_rejected(self):
+        with self.assertRaises(SessionConflictError) as ctx:
+            self.svc.request_session(self.c, self.b, "CPSC-3720", 0, 630, 700)
+        self.assertEqual(ctx.exception.conflicts, {self.b: [self.sid]})
+        self.assertIn(str(self.sid), str(ctx.exception))
+        # nothing was written
+        self.assertEqual(self.db.query_one("select count(*) as n from sessions")["n"], 1)
+
+    def test_touching_and_other_day_sessions_are_fine(self):
+        self.svc.request_session(self.c, self.b, "CPSC-3720", 0, 660, 720)
+        self.svc.request_session(self.c, self.a, "CPSC-3720", 1, 600, 660)
+
+    def test_accept_checks_sessions_confirmed_after_the_request(self):
+        pending = self.svc.request_session(self.c, self.a, "CPSC-3720", 2, 600, 660)
+        other = self.svc.request_session(self.b, self.a, "CPSC-3720", 2, 630, 690)
+        self.svc.respond_session(other, self.a, True)
+        with self.assertRaises(SessionConflictError) as ctx:
+            self.svc.respond_session(pending, self.a, True)
+        self.assertEqual(ctx.exception.session_ids, [other])
+        row = self.db.query_one("""select s.status, sp.response from sessions s
+            join session_participants sp on sp.session_id = s.id
+            where s.id = :sid and sp.user_id = :uid""", {"sid": pending, "uid": self.a})
+        self.assertEqual((row["status"], row["response"]), ("pending", "pending"))
+        # declining is always allowed
+        self.svc.respond_session(pending, self.a, False)
+
+    def test_only_nearby_bookings_are_compared(self):
+        # b has a day full of back to back sessions; the check still finds the one
+        # that started earlier and runs into the requested slot
+        for start in range(660, 1200, 30):
+            sid = self.svc.request_session(self.a, self.b, "CPSC-3720", 0, start, start + 30)
+            self.svc.respond_session(sid, self.b, True)
+        long_one = self.svc.request_session(self.a, self.b, "CPSC-3720", 0, 1200, 1380)
+        self.svc.respond_session(long_one, self.b, True)
+        self.assertEqual(self.svc.find_conflicts([self.b, self.c], 0, 1300, 1320), {self.b: [long_one]})
+        self.assertEqual(self.svc.find_conflicts([self.b], 0, 1380, 1440), {})
+        self.assertEqual(len(self.svc.find_conflicts([self.b], 0, 650, 700)[self.b]), 3)
+
+    def test_bookings_follow_session_changes(self):
+        def booked():
+            return sorted((r["user_id"], r["session_id"]) for r in self.db.query_all(
+                "select user_id, session_id from confirmed_bookings"))
+        self.assertEqual(booked(), [(self.a, self.sid), (self.b, self.sid)])
+        group = self.svc.request_group_session(self.c, [self.a, self.b], "CPSC-3720", 3, 600, 660)
+        self.svc.respond_session(group, self.a, True)
+        self.assertEqual(len(booked()), 2)
+        self.svc.respond_session(group, self.b, True)
+        self.assertEqual(len(booked()), 5)
+        self.db.execute("update sessions set start_min = 540 where id = :s", {"s": group})
+        self.assertEqual(len(self.svc.find_conflicts([self.c], 3, 500, 560)[self.c]), 1)
+        self.svc.delete_user(self.a)
+        self.assertEqual(booked(), [(self.b, self.sid), (self.b, group), (self.c, group)])
+        self.db.execute("update sessions set status = 'canceled' where id = :s", {"s": group})
+        self.db.execute("delete from sessions where id = :s", {"s": self.sid})
+        self.assertEqual(booked(), [])
+
+    def test_upgrade_fills_bookings(self):
+        self.db.execute("delete from confirmed_bookings")
+        self.db.execute("pragma user_version = 2")
+        self.assertEqual(upgrade(self.db), ["confirmed_bookings"])
+        self.assertEqual(self.svc.find_conflicts([self.a], 0, 630, 640), {self.a: [self.sid]})
+
+    def test_audit_reports_existing_double_bookings(self):
+        self.assertEqual(self.svc.audit_session_conflicts(), [])
+        # legacy data written before the checks existed
+        sid = self.db.execute("""insert into sessions (course_code, day_of_week, start_min, end_min, status)
+            values ('CPSC-3720', 0, 650, 700, 'confirmed')""")
+        self.db.execute("insert into session_participants (session_id, user_id, role, response) values (:s, :u, 'invitee', 'accepted')",
+                        {"s": sid, "u": self.b})
+        report = self.svc.audit_session_conflicts()
+        self.assertEqual([(r.user_id, r.session_id, r.other_session_id) for r in report], [(self.b, self.sid, sid)])
+
+if __name__ == "__main__":
+    unittest.main()
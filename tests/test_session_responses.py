@@ -0,0 +1,87 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.migrations import upgrade
+from studybuddy.domain.errors import SessionConflictError, SessionNotPendingError
+from tests.helpers import SCHEMA_PATH, make_memory_db
+
+class TestSessionResponses(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+        self.svc = StudyBuddyService(self.db)
+        self.users = [self.svc.create_user(f"u{i}") for i in range(5)]
+        for uid in self.users:
+            self.svc.enroll_course(uid, "CPSC-3720")
+
+    def counts(self, sid):
+        row = self.db.query_one("select status, participant_count, accepted_count from sessions where id = :sid",
+                                {"sid": sid})
+        return row["status"], row["participant_count"], row["accepted_count"]
+
+    def test_counters_follow_responses(self):
+        me, *others = self.users
+        sid = self.svc.request_group_session(me, others, "CPSC-3720", 0, 600, 660)
+        self.assertEqual(self.counts(sid), ("pending", 5, 1))
+        for uid in others[:-1]:
+            self.svc.respond_session(sid, uid, True)
+        self.svc.respond_session(sid, others[0], True)   # repeated reply changes nothing
+        self.assertEqual(self.counts(sid), ("pending", 5, 4))
+        self.svc.respond_session(sid, others[-1], True)
+        self.assertEqual(self.counts(sid), ("confirmed", 5, 5))
+        with self.assertRaises(SessionNotPendingError):   # answered sessions take no more replies
+            self.svc.respond_session(sid, others[0], False)
+        self.assertEqual(self.counts(sid), ("confirmed", 5, 5))
+        self.svc.delete_user(others[0])
+        self.assertEqual(self.counts(sid), ("confirmed", 4, 4))
+
+    def test_declined_session_cannot_be_confirmed_later(self):
+        a, b, c = self.users[:3]
+        sid = self.svc.request_group_session(a, [b, c], "CPSC-3720", 0, 600, 660)
+        self.svc.respond_session(sid, b, False)
+        with self.assertRaises(SessionNotPendingError):
+            self.svc.respond_session(sid, b, True)
+        with self.assertRaises(SessionNotPendingError):
+            self.svc.respond_session(sid, c, True)
+        self.assertEqual(self.counts(sid), ("declined", 3, 1))
+
+    def test_canceled_session_cannot_be_confirmed(self):
+        a, b = self.users[:2]
+        sid = self.svc.request_session(a, b, "CPSC-3720", 0, 600, 660)
+        self.svc.delete_user(a)   # the requester is gone, so the request is canceled
+        self.assertEqual(self.counts(sid), ("canceled", 1, 0))
+        rejected = []
+        self.assertEqual(self.svc.respond_sessions([{"session_id": sid, "user_id": b, "accept": True}],
+                                                   on_reject=lambda row, ex: rejected.append(type(ex))), 0)
+        self.assertEqual(rejected, [SessionNotPendingError])
+        self.assertEqual(self.counts(sid), ("canceled", 1, 0))
+
+    def test_batch_replies_share_one_transaction_and_report_conflicts(self):
+        a, b, c = self.users[:3]
+        first = self.svc.request_session(a, b, "CPSC-3720", 0, 600, 660)
+        clash = self.svc.request_session(c, b, "CPSC-3720", 0, 630, 700)
+        other = self.svc.request_session(a, c, "CPSC-3720", 1, 600, 660)
+        rejected = []
+        applied = self.svc.respond_sessions([
+            {"session_id": first, "user_id": b, "accept": True},
+            {"session_id": clash, "user_id": b, "accept": True},   # b is booked by now
+            {"session_id": other, "user_id": c, "accept": True},
+        ], on_reject=lambda row, ex: rejected.append((row["session_id"], ex)))
+        self.assertEqual(applied, 2)
+        self.assertEqual([(sid, type(ex)) for sid, ex in rejected], [(clash, SessionConflictError)])
+        self.assertEqual([self.counts(s)[0] for s in (first, clash, other)], ["confirmed", "pending", "confirmed"])
+
+    def test_upgrade_backfills_counters_on_old_databases(self):
+        a, b = self.users[:2]
+        sid = self.svc.request_session(a, b, "CPSC-3720", 0, 600, 660)
+        self.svc.respond_session(sid, b, True)
+        # back to the old layout, then start up the way run_app does
+        for trigger in ("insert", "response", "delete"):
+            self.db.execute(f"drop trigger trg_session_participants_{trigger}")
+        for column in ("participant_count", "accepted_count"):
+            self.db.execute(f"alter table sessions drop column {column}")
+        self.db.execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+        self.assertEqual(upgrade(self.db), ["session_counters", "pending_counts", "confirmed_bookings"])
+        self.assertEqual(self.counts(sid), ("confirmed", 2, 2))
+        self.assertEqual(upgrade(self.db), [])
+
+if __name__ == "__main__":
+    unittest.main()
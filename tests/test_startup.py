@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from studybuddy.database.migrations import SCHEMA_VERSION, ensure_schema
+from studybuddy.database.sql_storage import Storage
+
+class TestStartup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "app.db"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_schema_only_runs_when_user_version_is_behind(self):
+        db = Storage(self.path)
+        self.assertTrue(ensure_schema(db))
+        self.assertEqual(db.query_one("pragma user_version")[0], SCHEMA_VERSION)
+        db.close()
+        db = Storage(self.path)
+        self.assertFalse(ensure_schema(db))
+        # foreign keys (and so the delete cascades) don't depend on the schema script
+        self.assertEqual(db.query_one("pragma foreign_keys")[0], 1)
+        db.close()
+
+    def test_cli_reaches_prompt_and_reports_timing(self):
+        env = dict(os.environ, STUDYBUDDY_DB=str(self.path), STUDYBUDDY_STARTUP_TIMING="1")
+        result = subprocess.run([sys.executable, "-m", "studybuddy.run_app"], input="0\n", env=env,
+                                capture_output=True, text=True, timeout=60,
+                                cwd=Path(__file__).resolve().parent.parent)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("choice: ", result.stdout)
+        self.assertIn("time to first prompt", result.stderr)
+        self.assertIn("schema check", result.stderr)
+
+if __name__ == "__main__":
+    unittest.main()
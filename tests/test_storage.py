@@ -0,0 +1,133 @@
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.database.instrumentation import QueryStats, instrument_service
+from studybuddy.database.sql_storage import Storage
+from tests.helpers import SCHEMA_PATH, make_memory_db
+
+class TestStorageTransaction(unittest.TestCase):
+    def setUp(self):
+        self.db = make_memory_db()
+
+    def test_execute_returns_new_row_id(self):
+        first = self.db.execute("insert into users(name) values(:n)", {"n": "Ana"})
+        second = self.db.execute("insert into users(name) values(:n)", {"n": "Ben"})
+        self.assertEqual(second, first + 1)
+
+    def test_transaction_commits_once_and_rolls_back_on_error(self):
+        with self.db.transaction():
+            uid = self.db.execute("insert into users(name) values('Ana')")
+            with self.db.transaction():  # nested blocks join the outer one
+                self.db.execute("insert into courses(code) values('CPSC-3720')")
+            self.assertTrue(self.db.conn.in_transaction)
+        self.assertFalse(self.db.conn.in_transaction)
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.execute("delete from users where id = :u", {"u": uid})
+                raise RuntimeError("boom")
+        self.assertIsNotNone(self.db.query_one("select 1 from users where id = :u", {"u": uid}))
+
+    def test_failed_nested_block_is_rolled_back_to_its_savepoint(self):
+        with self.db.transaction():
+            self.db.execute("insert into users(name) values('kept')")
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    self.db.execute("insert into users(name) values('undone')")
+                    raise RuntimeError("boom")
+        self.assertEqual([r["name"] for r in self.db.query_all("select name from users")], ["kept"])
+
+    def test_bulk_retry_inside_a_transaction_writes_each_row_once(self):
+        svc = StudyBuddyService(self.db)
+        rejected = []
+        with self.db.transaction():
+            svc.create_users_many([{"name": "a"}, {"name": "b"}, {"id": 1, "name": "dup"}, {"name": "c"}],
+                                  on_reject=lambda row, ex: rejected.append(row["name"]))
+        # id 1 is taken by the batch's own first row, so "dup" is the one rejected
+        self.assertEqual([r["name"] for r in self.db.query_all("select name from users order by id")],
+                         ["a", "b", "c"])
+        self.assertEqual(rejected, ["dup"])
+
+    def test_bulk_availability_rejects_invalid_ranges_without_aborting(self):
+        svc = StudyBuddyService(self.db)
+        uid = svc.create_user("Ana")
+        rejected = []
+        written = svc.add_availability_many([
+            {"user_id": uid, "day_of_week": 1, "start_min": 60, "end_min": 120},
+            {"user_id": uid, "day_of_week": 9, "start_min": 60, "end_min": 120},
+            {"user_id": uid, "day_of_week": 2, "start_min": 300, "end_min": 200},
+            {"user_id": uid, "day_of_week": 3, "start_min": 60, "end_min": 120},
+        ], on_reject=lambda row, ex: rejected.append((row["day_of_week"], type(ex))))
+        self.assertEqual(written, 2)
+        self.assertEqual(rejected, [(9, ValueError), (2, ValueError)])
+        self.assertEqual([r["day_of_week"] for r in self.db.query_all(
+            "select day_of_week from availability order by day_of_week")], [1, 3])
+
+    # two connections that both read, then write: the second one waits for the
+    # first to commit instead of failing its lock upgrade with "database is locked"
+    def test_read_then_write_transactions_on_two_connections_wait_for_each_other(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "shared.db"
+            Storage(path).execute_script(SCHEMA_PATH.read_text(encoding="utf-8"))
+            errors = []
+            def worker(name):
+                db = Storage(path)
+                try:
+                    with db.transaction():
+                        db.query_one("select count(*) as n from users")
+                        time.sleep(0.1)
+                        db.execute("insert into users(name) values(:n)", {"n": name})
+                except Exception as ex:
+                    errors.append(ex)
+                finally:
+                    db.conn.close()
+            threads = [threading.Thread(target=worker, args=(f"u{i}",)) for i in range(2)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(errors, [])
+            db = Storage(path)
+            self.assertEqual(db.query_one("select count(*) as n from users")["n"], 2)
+            db.conn.close()
+
+class TestStreaming(unittest.TestCase):
+    def test_query_iter_and_iter_variants(self):
+        db = make_memory_db()
+        svc = StudyBuddyService(db)
+        svc.create_users_many({"name": f"u{i}"} for i in range(1200))
+        svc.enroll_course_many({"user_id": uid, "course_code": "CPSC-3720"} for uid in range(1, 1201))
+        rows = db.query_iter("select id from users order by id", chunk_size=100)
+        self.assertEqual(next(rows)["id"], 1)
+        self.assertEqual(sum(1 for _ in rows), 1199)
+        self.assertEqual(list(svc.iter_classmates(1, "CPSC-3720")), svc.find_classmates(1, "CPSC-3720"))
+        self.assertFalse(hasattr(svc.find_classmates(1, "CPSC-3720")[0], "__dict__"))  # slotted models
+
+class TestQueryStats(unittest.TestCase):
+    def test_records_statements_methods_commits_and_slow_log(self):
+        db = make_memory_db()
+        svc = StudyBuddyService(db)
+        stats = db.enable_stats(QueryStats(slow_query_ms=0))  # log everything as slow
+        instrument_service(svc, stats)
+        uid = svc.create_user("Ana")
+        svc.enroll_course(uid, "CPSC-3720")
+        svc.user_exists(uid)
+
+        snap = stats.snapshot()
+        self.assertEqual(snap["commits"], 2)  # one per logical operation
+        self.assertEqual(snap["methods"]["enroll_course"]["count"], 1)
+        exists = snap["statements"]["select 1 as ok from users where id = :u"]
+        self.assertEqual((exists["count"], exists["rows"]), (1, 1))
+        self.assertEqual(snap["slow_queries"][-1]["params"], {"u": uid})
+        self.assertIn(f"where id = {uid}", snap["slow_queries"][-1]["expanded"])
+
+        db.disable_stats()
+        svc.user_exists(uid)
+        self.assertEqual(stats.snapshot()["statements"][
+            "select 1 as ok from users where id = :u"]["count"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
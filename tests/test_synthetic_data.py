@@ -0,0 +1,28 @@
+import unittest
+from studybuddy.application.services import StudyBuddyService
+from studybuddy.application.synthetic_data import SyntheticConfig, generate
+from tests.helpers import make_memory_db
+
+class TestSyntheticData(unittest.TestCase):
+    def build(self, seed):
+        svc = StudyBuddyService(make_memory_db())
+        config = SyntheticConfig(users=60, courses=8, enrollments_per_user=3, blocks_per_user=4, seed=seed)
+        return svc, generate(svc, config)
+
+    def dump(self, svc):
+        return [
+            [tuple(r) for r in svc.db.query_all(f"select * from {table} order by 1, 2")]
+            for table in ("enrollments", "availability", "sessions")
+        ]
+
+    def test_same_seed_same_database(self):
+        svc_a, summary = self.build(seed=3)
+        svc_b, _ = self.build(seed=3)
+        self.assertEqual(self.dump(svc_a), self.dump(svc_b))
+        self.assertEqual(summary.enrollments, 60 * 3)
+        self.assertEqual(summary.blocks, 60 * 4)
+        confirmed = svc_a.db.query_one("select count(*) as n from sessions where status = 'confirmed'")["n"]
+        self.assertEqual(confirmed, summary.sessions)
+
+if __name__ == "__main__":
+    unittest.main()